@@ -24,8 +24,9 @@ from src.ui.window_mixins import OptionsMixin
 from src.components.sub_windows import OptionsWindow, HelpWindow
 from src.ui.link_master.dialogs import AppRegistrationDialog, ImportTypeDialog
 from src.core.image_loader import ImageLoader
-from src.core.link_master.database import get_lm_registry, get_lm_db
+from src.core.link_master.database import get_lm_registry, get_lm_db, release_lm_db
 from src.core.link_master.scanner import Scanner
+from src.core.link_master.thumbnail_index import ThumbnailIndex
 from PyQt6.QtCore import QSettings
 from src.ui.flow_layout import FlowLayout
 from src.ui.link_master.item_card import ItemCard
@@ -37,6 +38,7 @@ from src.ui.link_master.notes_panel import NotesPanel
 from src.ui.link_master.library_panel import LibraryPanel
 from src.core.link_master.thumbnail_manager import ThumbnailManager
 from src.apps.scanner_worker import ScannerWorker
+from src.core.link_master.fs_watcher import FsWatcher
 from src.apps.size_scanner_worker import SizeScannerWorker
 from PyQt6.QtCore import QThread, QTimer
 
@@ -113,6 +115,11 @@ class LinkMasterWindow(LMCardPoolMixin, LMTagsMixin, LMFileManagementMixin, LMPo
         self.cat_scanner_worker = ScannerWorker(self.scanner, self.deployer, self.db)
         self.pkg_scanner_worker = ScannerWorker(self.scanner, self.deployer, self.db)
         
+        # Both workers reuse per-item probe/status results until the watcher reports a change
+        self.fs_watcher = FsWatcher(self)
+        self.cat_scanner_worker.watcher = self.fs_watcher
+        self.pkg_scanner_worker.watcher = self.fs_watcher
+        
         self.cat_scanner_worker.moveToThread(self.scanner_thread)
         self.pkg_scanner_worker.moveToThread(self.scanner_thread)
         
@@ -181,6 +188,7 @@ class LinkMasterWindow(LMCardPoolMixin, LMTagsMixin, LMFileManagementMixin, LMPo
         self.logger.debug(f"[Profile] Misc setup took {time.perf_counter()-t_misc:.3f}s")
         
         self._init_ui()
+        self._init_image_priority()
         
         # Initialize Toast for notifications
         # Position below header/tag bar (approx 100px)
@@ -1698,7 +1706,9 @@ class LinkMasterWindow(LMCardPoolMixin, LMTagsMixin, LMFileManagementMixin, LMPo
             self.tools_panel.btn_check_sizes.setEnabled(False)
             self.tools_panel.btn_check_sizes.setText("📦 走査中...")
         
-        self.size_worker = SizeScannerWorker(self.db, self.storage_root)
+        # Explicit check: ignore the mtime cache (files overwritten in place keep the
+        # directory mtime) and rebuild it from the full walk
+        self.size_worker = SizeScannerWorker(self.db, self.storage_root, use_cache=False)
         self.size_worker.progress.connect(self._on_size_scan_progress)
         self.size_worker.all_finished.connect(self._on_size_scan_finished)
         self.size_worker.start()
@@ -2131,6 +2141,18 @@ class LinkMasterWindow(LMCardPoolMixin, LMTagsMixin, LMFileManagementMixin, LMPo
         all_configs = self.db.get_all_folder_configs()
         folder_configs = {k.replace('\\', '/'): v for k, v in all_configs.items()}
 
+        # Auto-detected thumbnails for cards without a DB image, one index lookup per directory
+        auto_paths = []
+        for layout in (self.cat_layout, self.pkg_layout):
+            for i in range(layout.count()):
+                widget = layout.itemAt(i).widget()
+                if isinstance(widget, ItemCard) and hasattr(widget, 'path'):
+                    try: rel_path = os.path.relpath(widget.path, storage_root).replace('\\', '/')
+                    except ValueError: continue
+                    if not folder_configs.get(rel_path, {}).get('image_path'):
+                        auto_paths.append(widget.path)
+        auto_thumbs = ThumbnailIndex(self.db, self.scanner, storage_root).resolve_paths(auto_paths)
+
         for prefix, layout in [('cat', self.cat_layout), ('pkg', self.pkg_layout)]:
             for i in range(layout.count()):
                 widget = layout.itemAt(i).widget()
@@ -2149,9 +2171,7 @@ class LinkMasterWindow(LMCardPoolMixin, LMTagsMixin, LMFileManagementMixin, LMPo
                                 img_path = os.path.join(storage_root, cfg_img)
                         else:
                             # Phase 28: Fallback to automatic thumbnail detection if not in DB
-                            auto_thumb = self.scanner.detect_thumbnail(widget.path)
-                            if auto_thumb:
-                                img_path = os.path.join(widget.path, auto_thumb)
+                            img_path = auto_thumbs.get(widget.path)
                         
                         # Phase 28: Proper empty string handling for display_name
                         raw_name = cfg.get('display_name')
@@ -2324,6 +2344,9 @@ class LinkMasterWindow(LMCardPoolMixin, LMTagsMixin, LMFileManagementMixin, LMPo
             app_id=self.current_app_id,
             generation_id=gen_id # NEW: Track specific switch generation
         )
+        # Stale-while-revalidate: show the last snapshot of this view now; the scan below revalidates it
+        if not is_same_path:
+            self._render_scan_snapshot(path, app_data, "view", gen_id)
         # Re-trigger work - worker.run is already connected to scanner_thread.started
         # but since thread is already running, we use QMetaObject.invokeMethod
         from PyQt6.QtCore import QMetaObject, Q_ARG, Qt
@@ -2414,6 +2437,7 @@ class LinkMasterWindow(LMCardPoolMixin, LMTagsMixin, LMFileManagementMixin, LMPo
         self.pkg_scanner_worker.set_params(path, target_root, storage_root, context="contents",
                                            app_data=app_data, target_key=self.current_target_key,
                                            generation_id=self._app_switch_generation)
+        self._render_scan_snapshot(path, app_data, "contents", self._app_switch_generation)
         from PyQt6.QtCore import QMetaObject, Qt
         QMetaObject.invokeMethod(self.pkg_scanner_worker, "run", Qt.ConnectionType.QueuedConnection)
 
@@ -2778,9 +2802,10 @@ class LinkMasterWindow(LMCardPoolMixin, LMTagsMixin, LMFileManagementMixin, LMPo
                             # Ensure current self.db is closed if it matches (prevent lock)
                             if hasattr(self, 'db') and self.db and getattr(self.db, 'app_name', None) == app_data['name']:
                                 self.logger.info("Closing current DB before deletion.")
-                                # self.db doesn't have a close(), it uses 'with get_connection()'
-                                # But we should set it to None to avoid further use.
+                                # Set it to None to avoid further use.
                                 self.db = None
+                            # Pooled connections keep the DB file open (locked on Windows).
+                            release_lm_db(app_data['name'])
 
                             shutil.rmtree(app_dir)
                             self.logger.info(f"Deleted app directory: {app_dir}")
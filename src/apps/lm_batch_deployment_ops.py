@@ -14,6 +14,9 @@ from PyQt6.QtWidgets import (
 from src.core.lang_manager import _
 from src.core.link_master.deployer import DeploymentCollisionError
 from src.ui.styles import apply_common_dialog_style
+from src.core.link_master.conflict_index import TagConflictIndex
+from src.core.link_master.dependency_graph import get_dependency_graph
+from src.core.link_master.batch_scheduler import BatchDeployScheduler, BatchTask
 from .lm_batch_ops_worker import TagConflictWorker
 
 class LMDeploymentOpsMixin:
@@ -129,84 +132,20 @@ class LMDeploymentOpsMixin:
         """
         Recursively find all required libraries for the given rel_paths.
         Returns a list of rel_paths for libraries in deployment order (dependencies first).
+        Served by the cached LibraryDependencyGraph (rebuilt only when library data changes).
         """
-        import json
-        resolved_libs = [] # List of rel_path
-        seen_lib_names = {} # lib_name -> selected_rel_path
-        
-        all_configs = self.db.get_all_folder_configs()
-        # Group libraries by name for resolution
-        libraries_by_name = {}
-        for rp, cfg in all_configs.items():
-            if cfg.get('is_library'):
-                lname = cfg.get('lib_name')
-                if lname:
-                    if lname not in libraries_by_name: libraries_by_name[lname] = []
-                    cfg['_rel_path'] = rp
-                    libraries_by_name[lname].append(cfg)
-
-        def resolve_recursive(rel_path):
-            cfg = all_configs.get(rel_path, {})
-            deps_str = cfg.get('lib_deps', '[]')
-            try:
-                deps = json.loads(deps_str) if deps_str else []
-            except:
-                deps = []
-                
-            for dep in deps:
-                # Handle both string (legacy/simple) and dict (advanced) formats
-                if isinstance(dep, str): 
-                    dep_name = dep
-                    mode = 'priority'
-                    target_ver = None
-                else: 
-                    dep_name = dep.get('name')
-                    mode = dep.get('version_mode', 'priority') # 'latest', 'priority', 'specific'
-                    target_ver = dep.get('version')
-                
-                if not dep_name: continue
-                if dep_name in seen_lib_names: 
-                     continue 
-                
-                # Find candidates
-                candidates = libraries_by_name.get(dep_name, [])
-                if not candidates:
-                    self.logger.warning(f"Dependency not found: {dep_name}")
-                    continue
-                
-                # Filter/Sort based on Mode
-                selected_cfg = None
-                
-                if mode == 'specific' and target_ver:
-                    # Find exact match
-                    for c in candidates:
-                        if c.get('lib_version') == target_ver:
-                            selected_cfg = c
-                            break
-                    if not selected_cfg:
-                        self.logger.warning(f"Specific version {target_ver} for {dep_name} not found. Falling back to priority.")
-                
-                if not selected_cfg:
-                    # Sort candidates
-                    if mode == 'latest':
-                        candidates.sort(key=lambda x: x.get('lib_version', ''), reverse=True)
-                    else:
-                        candidates.sort(key=lambda x: (x.get('lib_priority', 0), x.get('lib_version', '')), reverse=True)
-                        
-                    selected_cfg = candidates[0]
-
-                selected_rp = selected_cfg['_rel_path']
-                
-                seen_lib_names[dep_name] = selected_rp
-                resolve_recursive(selected_rp) 
-                
-                if selected_rp not in resolved_libs:
-                    resolved_libs.append(selected_rp)
-
-        for rp in rel_paths:
-            resolve_recursive(rp)
-            
-        return resolved_libs
+        return get_dependency_graph(self.db).resolve(rel_paths)
+
+    def _get_conflict_index(self):
+        """Lazily built TagConflictIndex for the current app DB (None if unavailable)."""
+        db = getattr(self, 'db', None)
+        if db is None or not db.has_conflict_index():
+            return None
+        index = getattr(self, '_conflict_index', None)
+        if index is None or index.db is not db:
+            index = TagConflictIndex(db)
+            self._conflict_index = index
+        return index
 
     def _check_tag_conflict(self, rel_path, config, app_data, cached_configs=None):
         """
@@ -222,13 +161,19 @@ class LMDeploymentOpsMixin:
         scope = config.get('conflict_scope', 'disabled')
         if scope == 'disabled': return None
         
+        target_root = app_data.get(self.current_target_key)
+        if not target_root: return None
+        
+        # Indexed path: O(#tags) lookups instead of a scan over every folder config
+        index = self._get_conflict_index() if cached_configs is None else None
+        if index is not None:
+            index.sync()
+            return index.find_conflict(rel_path.replace('\\', '/'), my_tags, scope)
+        
         if cached_configs is not None:
              all_configs = cached_configs
         else:
              all_configs = self.db.get_all_folder_configs()
-             
-        target_root = app_data.get(self.current_target_key)
-        if not target_root: return None
         
         current_category = os.path.dirname(rel_path).replace('\\', '/')
         
@@ -265,68 +210,10 @@ class LMDeploymentOpsMixin:
         
         return None
 
-    def _deploy_single(self, rel_path, update_ui=True, show_result=False, force_sweep=False):
-        """Deploy a single item by relative path. Core method for all deploy operations."""
-        app_data = self.app_combo.currentData()
-        if not app_data: return False
-        
-        # Reset cancellation flag
-        self._last_deploy_cancelled = False
-        
-        full_src = os.path.join(self.storage_root, rel_path)
-        
-        # 🚨 Safety Check: Block empty relative paths (prevents accidental root targeting)
-        if not rel_path or rel_path == ".":
-            self.logger.error(f"Deployment blocked: relative path is empty ({rel_path}).")
-            return False
-        
-        # Phase 5: Reverse Swap Check (Package -> Category)
-        # ... [omitting logic for brevity in ReplacementContent but it stays in file] ...
-        try:
-            parent_rel = os.path.dirname(rel_path).replace('\\', '/')
-            if parent_rel and parent_rel != '.':
-                parent_config = self.db.get_folder_config(parent_rel) or {}
-                if parent_config.get('category_deploy_status') == 'deployed':
-                    # Confirm swap
-                    msg = QMessageBox(self)
-                    msg.setWindowTitle(_("Package Deploy"))
-                    msg.setText(_("Parent category '{cat}' is currently deployed.\nDeploying this package requires unlinking the category.\n\nProceed?").format(cat=os.path.basename(parent_rel)))
-                    msg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.Cancel)
-                    msg.setDefaultButton(QMessageBox.StandardButton.Cancel)
-                    apply_common_dialog_style(msg)
-                    
-                    if msg.exec() != QMessageBox.StandardButton.Yes:
-                        self._last_deploy_cancelled = True
-                        return False
-                    
-                    # Unlink Category
-                    self.logger.debug(f"[Swap] Unlinking parent category: {parent_rel}")
-                    self._unlink_single(parent_rel, update_ui=False)
-                    # Clear DB status
-                    self.db.update_folder_display_config(parent_rel, category_deploy_status=None)
-                    
-                    # Force update UI to remove blue border from category
-                    if update_ui:
-                        self._force_refresh_visible_cards()
-        except Exception as e:
-            self.logger.error(f"Reverse swap check failed: {e}")
-        
-        config = self.db.get_folder_config(rel_path) or {}
+    def _resolve_deploy_target(self, rel_path, config, app_data):
+        """Returns (deploy_rule, transfer_mode, conflict_policy, target_link) for the current target."""
         folder_name = os.path.basename(rel_path.rstrip('\\/'))
         
-        # 🚨 Safety Check: Prevent deployment if folder_name is empty or whitespace-only
-        if not folder_name or not folder_name.strip():
-            self.logger.error(f"Safety Block: Deployment blocked due to empty folder name. rel_path={rel_path}")
-            msg = QMessageBox(self.window() if hasattr(self, 'window') else self)
-            msg.setIcon(QMessageBox.Icon.Critical)
-            msg.setWindowTitle(_("Safety Block"))
-            msg.setText(_("Deployment blocked: Folder name is empty or whitespace-only.\n\n"
-                  "rel_path: {rel_path}\n\n"
-                  "This can happen if the package is at the root level of storage.").format(rel_path=rel_path))
-            apply_common_dialog_style(msg)
-            msg.exec()
-            return False
-        
         # Phase 5 & 40: Resolve Deployment Rule based on current target
         target_key = getattr(self, 'current_target_key', 'target_root')
         item_rule_key = 'deploy_rule'
@@ -389,6 +276,72 @@ class LMDeploymentOpsMixin:
                     target_link = target_root
             else:
                 target_link = os.path.join(target_root, folder_name)
+        
+        return deploy_rule, transfer_mode, c_policy, target_link
+
+    def _deploy_single(self, rel_path, update_ui=True, show_result=False, force_sweep=False):
+        """Deploy a single item by relative path. Core method for all deploy operations."""
+        app_data = self.app_combo.currentData()
+        if not app_data: return False
+        
+        # Reset cancellation flag
+        self._last_deploy_cancelled = False
+        
+        full_src = os.path.join(self.storage_root, rel_path)
+        
+        # 🚨 Safety Check: Block empty relative paths (prevents accidental root targeting)
+        if not rel_path or rel_path == ".":
+            self.logger.error(f"Deployment blocked: relative path is empty ({rel_path}).")
+            return False
+        
+        # Phase 5: Reverse Swap Check (Package -> Category)
+        # ... [omitting logic for brevity in ReplacementContent but it stays in file] ...
+        try:
+            parent_rel = os.path.dirname(rel_path).replace('\\', '/')
+            if parent_rel and parent_rel != '.':
+                parent_config = self.db.get_folder_config(parent_rel) or {}
+                if parent_config.get('category_deploy_status') == 'deployed':
+                    # Confirm swap
+                    msg = QMessageBox(self)
+                    msg.setWindowTitle(_("Package Deploy"))
+                    msg.setText(_("Parent category '{cat}' is currently deployed.\nDeploying this package requires unlinking the category.\n\nProceed?").format(cat=os.path.basename(parent_rel)))
+                    msg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.Cancel)
+                    msg.setDefaultButton(QMessageBox.StandardButton.Cancel)
+                    apply_common_dialog_style(msg)
+                    
+                    if msg.exec() != QMessageBox.StandardButton.Yes:
+                        self._last_deploy_cancelled = True
+                        return False
+                    
+                    # Unlink Category
+                    self.logger.debug(f"[Swap] Unlinking parent category: {parent_rel}")
+                    self._unlink_single(parent_rel, update_ui=False)
+                    # Clear DB status
+                    self.db.update_folder_display_config(parent_rel, category_deploy_status=None)
+                    
+                    # Force update UI to remove blue border from category
+                    if update_ui:
+                        self._force_refresh_visible_cards()
+        except Exception as e:
+            self.logger.error(f"Reverse swap check failed: {e}")
+        
+        config = self.db.get_folder_config(rel_path) or {}
+        folder_name = os.path.basename(rel_path.rstrip('\\/'))
+        
+        # 🚨 Safety Check: Prevent deployment if folder_name is empty or whitespace-only
+        if not folder_name or not folder_name.strip():
+            self.logger.error(f"Safety Block: Deployment blocked due to empty folder name. rel_path={rel_path}")
+            msg = QMessageBox(self.window() if hasattr(self, 'window') else self)
+            msg.setIcon(QMessageBox.Icon.Critical)
+            msg.setWindowTitle(_("Safety Block"))
+            msg.setText(_("Deployment blocked: Folder name is empty or whitespace-only.\n\n"
+                  "rel_path: {rel_path}\n\n"
+                  "This can happen if the package is at the root level of storage.").format(rel_path=rel_path))
+            apply_common_dialog_style(msg)
+            msg.exec()
+            return False
+        
+        deploy_rule, transfer_mode, c_policy, target_link = self._resolve_deploy_target(rel_path, config, app_data)
 
         # 🚨 Phase 42: Proactive Exhaustive transition sweep BEFORE deployment.
         # This ensures old physical files (e.g. from Flat mode) are cleared before we deploy the new state.
@@ -475,14 +428,11 @@ class LMDeploymentOpsMixin:
         if config.get('is_library', 0):
             lib_name = config.get('lib_name')
             if lib_name:
-                lib_name_norm = lib_name.strip().lower()
-                all_configs = self.db.get_all_folder_configs()
-                for other_path, other_cfg in all_configs.items():
+                versions = get_dependency_graph(self.db).library_versions(lib_name)
+                other_configs = self.db.get_folder_configs([p for p in versions if p != rel_path])
+                for other_path, other_cfg in other_configs.items():
                     if other_path == rel_path: continue
-                    other_lib_name = other_cfg.get('lib_name')
-                    if other_lib_name and other_lib_name.strip().lower() == lib_name_norm and \
-                       other_cfg.get('last_known_status') == 'linked' and \
-                       other_cfg.get('is_library', 0):
+                    if other_cfg.get('last_known_status') == 'linked' and other_cfg.get('is_library', 0):
                         
                         old_ver = other_cfg.get('lib_version', 'Unknown')
                         new_ver = config.get('lib_version', 'Unknown')
@@ -556,30 +506,7 @@ class LMDeploymentOpsMixin:
             except DeploymentCollisionError as e:
                 self.logger.warning(f"Deployment aborted due to collisions: {full_src}")
                 
-                # Show Dialog
-                detail_txt = _("The following file collisions were detected. Deployment aborted.\n\n")
-                
-                # Limit display to first 10
-                display_limit = 10
-                count = 0
-                for item in e.collisions:
-                    if count >= display_limit:
-                        detail_txt += _("...and {n} others.").format(n=len(e.collisions) - count)
-                        break
-                    
-                    # item is dict: target, source_existing, source_conflicting
-                    tgt = item['target']
-                    src_exist = os.path.basename(item['source_existing'])
-                    src_new = os.path.basename(item['source_conflicting'])
-                    detail_txt += f"Target: {tgt}\n  - Existing: {src_exist}\n  - Conflict: {src_new}\n\n"
-                    count += 1
-                    
-                msg_box = FramelessMessageBox(self.window() if hasattr(self, 'window') else self)
-                msg_box.setIcon(FramelessMessageBox.Icon.Critical)
-                msg_box.setWindowTitle(_("Deployment Collision"))
-                msg_box.setText(detail_txt)
-                # apply_common_dialog_style(msg_box)
-                msg_box.exec()
+                self._show_collision_dialog(e.collisions)
                 return False
             
             if success:
@@ -628,6 +555,32 @@ class LMDeploymentOpsMixin:
 
         return success
 
+    def _show_collision_dialog(self, collisions):
+        """Lists the file collisions that aborted a deployment."""
+        detail_txt = _("The following file collisions were detected. Deployment aborted.\n\n")
+
+        # Limit display to first 10
+        display_limit = 10
+        count = 0
+        for item in collisions:
+            if count >= display_limit:
+                detail_txt += _("...and {n} others.").format(n=len(collisions) - count)
+                break
+
+            # item is dict: target, source_existing, source_conflicting
+            tgt = item['target']
+            src_exist = os.path.basename(item['source_existing'])
+            src_new = os.path.basename(item['source_conflicting'])
+            detail_txt += f"Target: {tgt}\n  - Existing: {src_exist}\n  - Conflict: {src_new}\n\n"
+            count += 1
+
+        msg_box = FramelessMessageBox(self.window() if hasattr(self, 'window') else self)
+        msg_box.setIcon(FramelessMessageBox.Icon.Critical)
+        msg_box.setWindowTitle(_("Deployment Collision"))
+        msg_box.setText(detail_txt)
+        # apply_common_dialog_style(msg_box)
+        msg_box.exec()
+
     def _unlink_single(self, rel_path, update_ui=True, _cascade=True):
         """Remove link for a single item by relative path."""
         app_data = self.app_combo.currentData()
@@ -675,6 +628,59 @@ class LMDeploymentOpsMixin:
                             self._unlink_single(dep_rel, update_ui=True, _cascade=False)
 
         # Phase 5: Resolve Deployment Rule and Transfer Mode (Identical logic to _deploy_single)
+        deploy_rule, transfer_mode = self._resolve_unlink_rule(config, app_data)
+
+        # Proceed with unlinking
+        self.logger.debug(f"Exhaustive sweep unlinking for: {rel_path} (Rule: {deploy_rule}, Mode: {transfer_mode})")
+        
+        self._undeploy_from_roots(rel_path, config, app_data, search_roots, deploy_rule, transfer_mode, self.deployer)
+
+        # Phase: Exhaustive Transition Sweep for Manual Unlink
+        # If the user clicks Unlink, we want to make sure it's REALLY unlinked even if rules changed.
+        current_status = config.get('last_known_status')
+        if current_status == 'linked' or current_status == 'partial':
+             self.logger.debug(f"[Unlink-Sweep] Performing exhaustive cleanup for: {rel_path}")
+             failed_paths_list = [] # Renaming to avoid any scope confusion
+             try:
+                 target_roots = [app_data.get(k) for k in ['target_root', 'target_root_2', 'target_root_3'] if app_data.get(k)]
+                 # Phase 28: Optimized sweep call (verify: also catch links missing from the ledger)
+                 _, result_failed = self.deployer.remove_links_pointing_to(target_roots, full_src, package_rel_path=rel_path, verify=True)
+                 if result_failed:
+                     failed_paths_list = result_failed
+                 
+                 if failed_paths_list:
+                     self._show_cleanup_failure_dialog(failed_paths_list)
+             except Exception as e:
+                 self.logger.warning(f"Exhaustive cleanup during unlink failed: {e}")
+             
+             # Phase 42: Allow UI to breathe after sweep
+             from PyQt6.QtWidgets import QApplication
+             QApplication.processEvents()
+
+        # Phase 28: Optimization - Stop exhaustive sweeping of all targets on every deploy/unlink.
+        # This was causing "Target not found" warnings and massive filesystem overhead.
+        # self.deployer.remove_links_pointing_to(search_roots, full_src) 
+        self.logger.debug(f"Unlink complete for: {rel_path} (targeted roots only)")
+        self.db.update_folder_display_config(rel_path, last_known_status='unlinked')
+
+        if update_ui:
+            self._update_card_by_path(full_src)
+            if hasattr(self, '_update_total_link_count'):
+                self._update_total_link_count()
+            
+            if hasattr(self, 'library_panel') and self.library_panel:
+                self.library_panel.refresh()
+            
+            self._refresh_tag_visuals()
+        
+        # Phase 7: Pruning - Delegated to Safe Deployer Logic
+        if hasattr(self, 'deployer') and self.deployer:
+            self._prune_after_unlink(rel_path, config, search_roots, deploy_rule, self.deployer)
+
+        return True
+
+    def _resolve_unlink_rule(self, config, app_data):
+        """Returns (deploy_rule, transfer_mode) used to undeploy an item."""
         deploy_rule = config.get('deploy_rule')
         
         # Determine App-Default based on selected target
@@ -699,9 +705,16 @@ class LMDeploymentOpsMixin:
         transfer_mode = config.get('transfer_mode')
         if not transfer_mode or transfer_mode == "default":
             transfer_mode = app_data.get('transfer_mode', 'symlink')
+        
+        return deploy_rule, transfer_mode
 
-        # Proceed with unlinking
-        self.logger.debug(f"Exhaustive sweep unlinking for: {rel_path} (Rule: {deploy_rule}, Mode: {transfer_mode})")
+    def _undeploy_from_roots(self, rel_path, config, app_data, search_roots, deploy_rule, transfer_mode, deployer):
+        """
+        Filesystem part of _unlink_single: removes rel_path's deployment under each search root.
+        No Qt access, so batch unlinks can run it on worker threads (with a forked deployer).
+        """
+        full_src = os.path.join(self.storage_root, rel_path)
+        t_roots = {os.path.normpath(app_data.get(k)).lower() for k in ['target_root', 'target_root_2', 'target_root_3'] if app_data.get(k)}
         
         for search_root in search_roots:
             if not search_root or not os.path.exists(search_root):
@@ -738,13 +751,13 @@ class LMDeploymentOpsMixin:
             if deploy_rule in ('files', 'custom'):
                  # Safe Batch Undeploy: delete source-matched files only, then prune empty dirs
                  # We use target_link as base because it accounts for skip_levels offset
-                 deleted_count = self._safe_batch_undeploy(full_src, target_link, deploy_rule, rules_json=rules_json)
+                 deleted_count = self._safe_batch_undeploy(full_src, target_link, deploy_rule, rules_json=rules_json,
+                                                           deployer=deployer, protected_roots=t_roots)
                  if deleted_count > 0:
                       self.logger.debug(f"Batch undeploy ({deploy_rule}): removed {deleted_count} items from {search_root}")
             else:
                  # 🚨 Safety Check: Avoid unlinking the search root itself unless it is genuinely a link to us
                  if target_link:
-                     t_roots = {os.path.normpath(app_data.get(k)).lower() for k in ['target_root', 'target_root_2', 'target_root_3'] if app_data.get(k)}
                      if os.path.normpath(target_link).lower() in t_roots:
                          # extra safety: only allow if it's a symlink (we don't want to rmtree a root!)
                          if not os.path.islink(target_link):
@@ -755,119 +768,56 @@ class LMDeploymentOpsMixin:
                               self.logger.error(f"Unlink Safety: Blocked attempt to unlink root via empty rel_path.")
                               continue
 
-                 if self.deployer.undeploy(target_link, transfer_mode=transfer_mode, source_path_hint=full_src):
+                 if deployer.undeploy(target_link, transfer_mode=transfer_mode, source_path_hint=full_src):
                       self.logger.debug(f"Unlinked/Undeployed: {target_link}")
 
-        # Phase: Exhaustive Transition Sweep for Manual Unlink
-        # If the user clicks Unlink, we want to make sure it's REALLY unlinked even if rules changed.
-        current_status = config.get('last_known_status')
-        if current_status == 'linked' or current_status == 'partial':
-             self.logger.debug(f"[Unlink-Sweep] Performing exhaustive cleanup for: {rel_path}")
-             failed_paths_list = [] # Renaming to avoid any scope confusion
-             try:
-                 target_roots = [app_data.get(k) for k in ['target_root', 'target_root_2', 'target_root_3'] if app_data.get(k)]
-                 # Phase 28: Optimized sweep call
-                 _, result_failed = self.deployer.remove_links_pointing_to(target_roots, full_src, package_rel_path=rel_path)
-                 if result_failed:
-                     failed_paths_list = result_failed
-                 
-                 if failed_paths_list:
-                     self._show_cleanup_failure_dialog(failed_paths_list)
-             except Exception as e:
-                 self.logger.warning(f"Exhaustive cleanup during unlink failed: {e}")
-             
-             # Phase 42: Allow UI to breathe after sweep
-             from PyQt6.QtWidgets import QApplication
-             QApplication.processEvents()
-
-        # Phase 28: Optimization - Stop exhaustive sweeping of all targets on every deploy/unlink.
-        # This was causing "Target not found" warnings and massive filesystem overhead.
-        # self.deployer.remove_links_pointing_to(search_roots, full_src) 
-        self.logger.debug(f"Unlink complete for: {rel_path} (targeted roots only)")
-        self.db.update_folder_display_config(rel_path, last_known_status='unlinked')
+    def _prune_after_unlink(self, rel_path, config, search_roots, deploy_rule, deployer):
+        """Removes directories left empty by an unlink (search roots are protected)."""
+        for search_root in search_roots:
+            if not search_root: continue
+            try:
+                # Determine the effective pruning start path
+                if deploy_rule == 'tree':
+                    # For Tree mode, we must respect skip_levels to find the correct pruning entry point
+                    import json
+                    skip_val = 0
+                    rules_json = config.get('deployment_rules')
+                    if rules_json:
+                        try:
+                            rules_obj = json.loads(rules_json)
+                            skip_val = int(rules_obj.get('skip_levels', 0))
+                        except: pass
 
-        if update_ui:
-            self._update_card_by_path(full_src)
-            if hasattr(self, '_update_total_link_count'):
-                self._update_total_link_count()
-            
-            if hasattr(self, 'library_panel') and self.library_panel:
-                self.library_panel.refresh()
-            
-            self._refresh_tag_visuals()
-        
-        # Phase 7: Pruning - Delegated to Safe Deployer Logic
-        if hasattr(self, 'deployer') and self.deployer:
-            for search_root in search_roots:
-                if not search_root: continue
-                try:
-                    # Determine the effective pruning start path
-                    if deploy_rule == 'tree':
-                        # For Tree mode, we must respect skip_levels to find the correct pruning entry point
-                        import json
-                        skip_val = 0
-                        rules_json = config.get('deployment_rules')
-                        if rules_json:
-                            try:
-                                rules_obj = json.loads(rules_json)
-                                skip_val = int(rules_obj.get('skip_levels', 0))
-                            except: pass
-                        
-                        parts = rel_path.replace('\\', '/').split('/')
-                        if len(parts) > skip_val:
-                            mirrored = "/".join(parts[skip_val:])
-                            prune_entry = os.path.join(search_root, mirrored)
-                        else:
-                            prune_entry = search_root
-                    elif deploy_rule == 'files':
-                        prune_entry = search_root # Files are directly in search root
+                    parts = rel_path.replace('\\', '/').split('/')
+                    if len(parts) > skip_val:
+                        mirrored = "/".join(parts[skip_val:])
+                        prune_entry = os.path.join(search_root, mirrored)
                     else:
-                        # Folder mode
-                        folder_name = os.path.basename(rel_path)
-                        prune_entry = os.path.join(search_root, folder_name)
-
-                    parent_dir = os.path.dirname(prune_entry)
-                    # Phase 32: Ensure search roots are protected during pruning
-                    self.deployer._cleanup_empty_parents(parent_dir, protected_roots=set(search_roots))
-                except Exception as e:
-                    self.logger.warning(f"Failed to prune parents for {search_root}: {e}")
+                        prune_entry = search_root
+                elif deploy_rule == 'files':
+                    prune_entry = search_root # Files are directly in search root
+                else:
+                    # Folder mode
+                    folder_name = os.path.basename(rel_path)
+                    prune_entry = os.path.join(search_root, folder_name)
 
-        return True
+                parent_dir = os.path.dirname(prune_entry)
+                # Phase 32: Ensure search roots are protected during pruning
+                deployer._cleanup_empty_parents(parent_dir, protected_roots=set(search_roots))
+            except Exception as e:
+                self.logger.warning(f"Failed to prune parents for {search_root}: {e}")
 
     def _find_packages_depending_on_library(self, lib_name: str) -> list:
         """Find all linked packages that have a dependency on the specified library."""
-        import json
-        dependent_packages = []
-        all_configs = self.db.get_all_folder_configs()
-        
-        lib_name_lower = lib_name.strip().lower() if lib_name else ""
-        
-        for rel_path, cfg in all_configs.items():
-            # Skip if not linked
-            if cfg.get('last_known_status') != 'linked':
-                continue
-            
-            # Skip libraries themselves
-            if cfg.get('is_library', 0):
-                continue
-            
-            # Check if this package depends on the library
-            deps_str = cfg.get('lib_deps', '')
-            if deps_str:
-                try:
-                    deps = json.loads(deps_str) if isinstance(deps_str, str) else deps_str
-                    if isinstance(deps, list):
-                        for dep in deps:
-                            dep_name = dep.get('name', '') if isinstance(dep, dict) else str(dep)
-                            if dep_name.strip().lower() == lib_name_lower:
-                                dependent_packages.append(rel_path)
-                                break
-                except:
-                    pass
-        
-        return dependent_packages
-
-    def _safe_batch_undeploy(self, source_path: str, target_base: str, deploy_rule: str, rules_json: str = None) -> int:
+        candidates = get_dependency_graph(self.db).dependents(lib_name)
+        if not candidates:
+            return []
+        configs = self.db.get_folder_configs(candidates)
+        return [rp for rp in candidates
+                if configs.get(rp, {}).get('last_known_status') == 'linked' and not configs[rp].get('is_library', 0)]
+
+    def _safe_batch_undeploy(self, source_path: str, target_base: str, deploy_rule: str, rules_json: str = None,
+                             deployer=None, protected_roots=None) -> int:
         """
         Unified safe undeploy for Tree, Files (Flatten), and Custom modes.
         Walks the source and deletes matching files in the target according to rules.
@@ -899,6 +849,10 @@ class LMDeploymentOpsMixin:
         
         deleted_count = 0
         deleted_dirs = set()
+        removed_targets = []
+        deployer = deployer or getattr(self, 'deployer', None)
+        if deployer:
+            deployer.invalidate_link_status([source_path], [target_base])
         
         self.logger.debug(f"Starting safe batch undeploy: rule={deploy_rule}, target={target_base}")
         
@@ -952,9 +906,8 @@ class LMDeploymentOpsMixin:
                             os.remove(target_file)
                             self.logger.info(f"Removed (Batch): {target_file}")
                         
-                        # Phase 42: Clear DB tracking
-                        try: self.db.remove_deployed_file_entry(target_file)
-                        except: pass
+                        # Phase 42: Clear DB tracking (flushed in one transaction below)
+                        removed_targets.append(target_file)
 
                         deleted_count += 1
                         # Mark parent for pruning
@@ -966,14 +919,19 @@ class LMDeploymentOpsMixin:
                     except Exception as e:
                         self.logger.warning(f"Failed to delete {target_file}: {e}")
 
+        if removed_targets:
+            try: self.db.remove_deployed_file_entries(removed_targets)
+            except: pass
+
         # Prune empty directories
         if deleted_dirs:
             sorted_dirs = sorted(list(deleted_dirs), key=len, reverse=True)
-            app_data = self.app_combo.currentData() if hasattr(self, 'app_combo') else None
-            protected_roots = set()
-            if app_data:
-                for k in ['target_root', 'target_root_2', 'target_root_3']:
-                    if app_data.get(k): protected_roots.add(os.path.normpath(app_data[k]).lower())
+            if protected_roots is None:
+                app_data = self.app_combo.currentData() if hasattr(self, 'app_combo') else None
+                protected_roots = set()
+                if app_data:
+                    for k in ['target_root', 'target_root_2', 'target_root_3']:
+                        if app_data.get(k): protected_roots.add(os.path.normpath(app_data[k]).lower())
             
             for d in sorted_dirs:
                 curr = d
@@ -989,11 +947,255 @@ class LMDeploymentOpsMixin:
                     
         return deleted_count
 
+    # =========================================================================
+    # Batch Scheduler: plan a multi-selection together, run it on a worker pool
+    # =========================================================================
+    def _batch_configs(self, rel_paths):
+        """{rel_path: config} for rel_paths (one query, per-item fallback for case mismatches)."""
+        configs = self.db.get_folder_configs(rel_paths)
+        for rel in rel_paths:
+            if rel not in configs:
+                configs[rel] = self.db.get_folder_config(rel) or {}
+        return configs
+
+    def _run_batch_sweep(self, target_roots, packages, verify=False):
+        """One shared remove_links_pointing_to sweep for all packages (toast/dialog once)."""
+        if not packages or not target_roots: return
+        try:
+            removed, failed_paths = self.deployer.remove_links_pointing_to_many(target_roots, packages, verify=verify)
+            if removed:
+                self.logger.debug(f"[Batch-Sweep] Cleaned up legacy files/links for {len(removed)} package(s)")
+                from src.ui.toast import Toast
+                active_win = QApplication.activeWindow() or (self.window() if hasattr(self, 'window') else self)
+                Toast.show_toast(active_win, _("Transition sync: Legacy files cleaned up"), preset="info")
+            if failed_paths:
+                self._show_cleanup_failure_dialog(failed_paths)
+        except Exception as e:
+            self.logger.warning(f"Batch transition sweep failed: {e}")
+        QApplication.processEvents()
+
+    def _plan_batch_deploy(self, rel_paths, app_data):
+        """
+        Builds scheduler tasks for rel_paths plus the libraries they need.
+        Items needing a confirmation (parent category swap, library version switch,
+        tag conflict, also inside the batch) and everything depending on them are
+        returned as sequential, in input order, for _deploy_single.
+        Returns (tasks, sweep_packages, sequential).
+        """
+        import json
+        rel_paths = list(dict.fromkeys(r.replace('\\', '/') for r in rel_paths if r and r != '.'))
+        graph = get_dependency_graph(self.db)
+        required = {rel: graph.resolve([rel]) for rel in rel_paths}
+        libs = [lib for rel in rel_paths for lib in required[rel] if lib not in required]
+        items = list(dict.fromkeys(libs + rel_paths))
+        for lib in items:
+            if lib not in required:
+                required[lib] = graph.resolve([lib])
+        
+        configs = self._batch_configs(items)
+        parents = {os.path.dirname(rel) for rel in items if os.path.dirname(rel)}
+        parent_configs = self.db.get_folder_configs(parents) if parents else {}
+        target_key = getattr(self, 'current_target_key', 'target_root')
+        
+        sequential = set()
+        batch_libs = {}   # normalized lib_name -> rel_path
+        batch_tags = {}   # tag -> [(rel_path, category)]
+        for rel in items:
+            cfg = configs[rel]
+            folder_name = os.path.basename(rel.rstrip('\\/'))
+            category = os.path.dirname(rel)
+            if not folder_name.strip() or not app_data.get(target_key):
+                sequential.add(rel); continue
+            if parent_configs.get(category, {}).get('category_deploy_status') == 'deployed':
+                sequential.add(rel); continue
+            
+            lib_name = (cfg.get('lib_name') or '').strip().lower() if cfg.get('is_library', 0) else ''
+            if lib_name:
+                if batch_libs.get(lib_name, rel) != rel:
+                    sequential.add(rel); continue
+                others = [p for p in graph.library_versions(lib_name) if p != rel]
+                other_cfgs = self.db.get_folder_configs(others) if others else {}
+                if any(c.get('last_known_status') == 'linked' and c.get('is_library', 0) for c in other_cfgs.values()):
+                    sequential.add(rel); continue
+            
+            scope = cfg.get('conflict_scope', 'disabled')
+            tags = [t.strip().lower() for t in (cfg.get('conflict_tag') or '').split(',') if t.strip()]
+            if tags and scope != 'disabled':
+                if self._check_tag_conflict(rel, cfg, app_data):
+                    sequential.add(rel); continue
+                # A batch member deployed earlier would be linked by the time this one runs
+                if any(o != rel and (scope != 'category' or c == category)
+                       for t in tags for o, c in batch_tags.get(t, ())):
+                    sequential.add(rel); continue
+            
+            if lib_name:
+                batch_libs[lib_name] = rel
+            for t in tags:
+                batch_tags.setdefault(t, []).append((rel, category))
+        
+        # Anything needing a sequential library goes sequential too (_deploy_single deploys its deps)
+        changed = True
+        while changed:
+            changed = False
+            for rel in items:
+                if rel not in sequential and any(lib in sequential for lib in required[rel]):
+                    sequential.add(rel); changed = True
+        
+        tasks, sweep_packages = [], []
+        for rel in items:
+            if rel in sequential: continue
+            cfg = configs[rel]
+            deploy_rule, transfer_mode, c_policy, target_link = self._resolve_deploy_target(rel, cfg, app_data)
+            rules_dict = {}
+            if cfg.get('deployment_rules'):
+                try: rules_dict = json.loads(cfg['deployment_rules'])
+                except: pass
+            full_src = os.path.join(self.storage_root, rel)
+            if cfg.get('last_known_status') in ('linked', 'partial', 'none'):
+                sweep_packages.append((full_src, rel, [target_link]))
+            
+            def run(deployer, rel=rel, full_src=full_src, target_link=target_link, deploy_rule=deploy_rule,
+                    transfer_mode=transfer_mode, c_policy=c_policy, rules_dict=rules_dict):
+                status_info = deployer.get_link_status(target_link, expected_source=full_src,
+                                                       expected_transfer_mode=transfer_mode,
+                                                       deploy_rule=deploy_rule, rules=rules_dict)
+                if status_info.get('status') == 'linked':
+                    return {'status': 'linked', 'is_intentional': status_info.get('is_intentional')}
+                try:
+                    success = deployer.deploy_with_rules(full_src, target_link, rules_dict,
+                                                         deploy_rule=deploy_rule, transfer_mode=transfer_mode,
+                                                         conflict_policy=c_policy, package_rel_path=rel)
+                except DeploymentCollisionError as e:
+                    return {'status': 'collision', 'collisions': e.collisions}
+                if not success:
+                    return {'status': 'error'}
+                post_res = deployer.get_link_status(target_link, expected_source=full_src,
+                                                    deploy_rule=deploy_rule, rules=rules_dict)
+                return {'status': post_res.get('status', 'linked'), 'is_intentional': post_res.get('is_intentional')}
+            
+            deps = [lib for lib in required[rel] if lib != rel]
+            tasks.append(BatchTask(rel, target_link, run, deps))
+        
+        return tasks, sweep_packages, [rel for rel in rel_paths if rel in sequential]
+
+    def _deploy_batch(self, rel_paths):
+        """
+        Deploys rel_paths with one shared transition sweep and the parallel scheduler.
+        Returns (rel_paths left for _deploy_single, [(rel_path, result)] of failed tasks).
+        """
+        app_data = self.app_combo.currentData()
+        if not app_data: return [], []
+        
+        t0 = time.perf_counter()
+        tasks, sweep_packages, sequential = self._plan_batch_deploy(rel_paths, app_data)
+        if not tasks:
+            return sequential, []
+        
+        target_roots = [app_data.get(k) for k in ['target_root', 'target_root_2', 'target_root_3'] if app_data.get(k)]
+        self._run_batch_sweep(target_roots, sweep_packages)
+        
+        scheduler = BatchDeployScheduler(self.deployer)
+        results = scheduler.run(scheduler.plan(tasks), poll=QApplication.processEvents)
+        
+        updates, failed = [], []
+        for task in tasks:
+            res = results.get(task.rel_path) or {'status': 'error'}
+            if res['status'] in ('collision', 'error'):
+                failed.append((task.rel_path, res))
+            else:
+                updates.append({'rel_path': task.rel_path, 'last_known_status': res['status'],
+                                'is_intentional': 1 if res.get('is_intentional') else 0})
+        self.db.bulk_update_items(updates)
+        self.logger.info(f"[BatchDeploy] {len(updates)} deployed, {len(failed)} failed, "
+                         f"{len(sequential)} sequential: {time.perf_counter() - t0:.3f}s")
+        return sequential, failed
+
+    def _show_batch_deploy_failures(self, failed, pending_count=0):
+        """One dialog listing every failed batch task; pending_count items still follow individually."""
+        display_limit = 10
+        detail_txt = _("Failed to deploy {n} item(s):").format(n=len(failed)) + "\n\n"
+        for rel, res in failed[:display_limit]:
+            if res['status'] == 'collision' and res.get('collisions'):
+                first = res['collisions'][0]
+                detail_txt += _("- {rel}: file collision at {target}").format(rel=rel, target=first['target'])
+                if len(res['collisions']) > 1:
+                    detail_txt += " " + _("(+{n} more)").format(n=len(res['collisions']) - 1)
+                detail_txt += "\n"
+            else:
+                detail_txt += f"- {rel}\n"
+        if len(failed) > display_limit:
+            detail_txt += _("...and {n} others.").format(n=len(failed) - display_limit) + "\n"
+        if pending_count:
+            detail_txt += "\n" + _("The other {n} item(s) that need confirmation will be processed next.").format(n=pending_count)
+        
+        msg_box = FramelessMessageBox(self)
+        msg_box.setIcon(FramelessMessageBox.Icon.Warning)
+        msg_box.setWindowTitle(_("Deploy Error"))
+        msg_box.setText(detail_txt)
+        msg_box.exec()
+
+    def _unlink_batch(self, rel_paths):
+        """
+        Unlinks rel_paths on the parallel scheduler with one shared exhaustive sweep.
+        Returns the rel_paths left for _unlink_single (libraries needing the cascade prompt).
+        """
+        app_data = self.app_combo.currentData()
+        if not app_data: return rel_paths
+        
+        t0 = time.perf_counter()
+        rel_paths = list(dict.fromkeys(r.replace('\\', '/') for r in rel_paths if r and r != '.'))
+        batch = set(rel_paths)
+        configs = self._batch_configs(rel_paths)
+        base_roots = [app_data.get(k) for k in ['target_root', 'target_root_2', 'target_root_3'] if app_data.get(k) is not None]
+        target_roots = [r for r in base_roots if r]
+        
+        tasks, sweep_packages, sequential, prunes = [], [], [], []
+        for rel in rel_paths:
+            cfg = configs[rel]
+            lib_name = cfg.get('lib_name') if cfg.get('is_library', 0) else None
+            if lib_name and set(self._find_packages_depending_on_library(lib_name)) - batch:
+                sequential.append(rel); continue
+            
+            search_roots = list(base_roots)
+            if cfg.get('target_override'):
+                search_roots.append(cfg['target_override'])
+            deploy_rule, transfer_mode = self._resolve_unlink_rule(cfg, app_data)
+            full_src = os.path.join(self.storage_root, rel)
+            if cfg.get('last_known_status') in ('linked', 'partial'):
+                sweep_packages.append((full_src, rel, None))
+            
+            def run(deployer, rel=rel, cfg=cfg, search_roots=search_roots, deploy_rule=deploy_rule, transfer_mode=transfer_mode):
+                self._undeploy_from_roots(rel, cfg, app_data, search_roots, deploy_rule, transfer_mode, deployer)
+                return {'status': 'unlinked'}
+            
+            target_link = self._resolve_deploy_target(rel, cfg, app_data)[3] if target_roots else full_src
+            tasks.append(BatchTask(rel, target_link, run))
+            prunes.append((rel, cfg, search_roots, deploy_rule))
+        
+        if tasks:
+            scheduler = BatchDeployScheduler(self.deployer)
+            scheduler.run(scheduler.plan(tasks), poll=QApplication.processEvents)
+            # Manual unlink: verify on disk as well (ledger-unknown legacy links)
+            self._run_batch_sweep(target_roots, sweep_packages, verify=True)
+            # Prune only now: the sweep can empty directories the tasks left behind
+            for rel, cfg, search_roots, deploy_rule in prunes:
+                self._prune_after_unlink(rel, cfg, search_roots, deploy_rule, self.deployer)
+            self.db.bulk_update_items([{'rel_path': t.rel_path, 'last_known_status': 'unlinked'} for t in tasks])
+            self.logger.info(f"[BatchUnlink] {len(tasks)} unlinked, {len(sequential)} sequential: {time.perf_counter() - t0:.3f}s")
+        return sequential
+
     def _deploy_items(self, rel_paths, skip_refresh=False):
-        """Deploy multiple items. Wrapper around _deploy_single."""
+        """Deploy multiple items. Batches run on the parallel scheduler; items that
+        need a confirmation dialog fall back to _deploy_single."""
         if hasattr(self.deployer, 'clear_actions'): self.deployer.clear_actions()
         
-        for rel in rel_paths:
+        remaining = rel_paths
+        if len(rel_paths) > 1:
+            remaining, failed = self._deploy_batch(rel_paths)
+            if failed:
+                self._show_batch_deploy_failures(failed, pending_count=len(remaining))
+        
+        for rel in remaining:
             if not self._deploy_single(rel, update_ui=False, show_result=False):
                 # If it was cancelled by user, don't show error dialog
                 if getattr(self, '_last_deploy_cancelled', False):
@@ -1029,8 +1231,13 @@ class LMDeploymentOpsMixin:
                 self._update_total_link_count()
 
     def _remove_links(self, rel_paths, skip_refresh=False):
-        """Remove links for multiple items. Wrapper around _unlink_single."""
-        for rel in rel_paths:
+        """Remove links for multiple items. Batches run on the parallel scheduler;
+        libraries that need the cascade prompt fall back to _unlink_single."""
+        remaining = rel_paths
+        if len(rel_paths) > 1:
+            remaining = self._unlink_batch(rel_paths)
+        
+        for rel in remaining:
             if not self._unlink_single(rel, update_ui=False):
                 self.logger.warning(f"Failed to remove link for {rel}")
         
@@ -1049,6 +1256,8 @@ class LMDeploymentOpsMixin:
         app_data = self.app_combo.currentData()
         if not app_data: return
         
+        self._apply_tag_conflict_delta()
+        
         if not hasattr(self, '_tag_refresh_pending'):
             self._tag_refresh_pending = False
             
@@ -1075,6 +1284,32 @@ class LMDeploymentOpsMixin:
         
         self._tag_sync_thread.start()
     
+    def _apply_tag_conflict_delta(self):
+        """
+        Immediately marks visible package cards that gained a tag conflict since the
+        last refresh (TagConflictIndex delta), without waiting for the full worker pass.
+        Cleared conflicts are left to the worker, which also owns occupancy conflicts.
+        """
+        index = self._get_conflict_index()
+        if index is None or not self.storage_root: return
+        index.sync()
+        gained = {p for p in index.take_flipped() if index.is_conflicted(p)}
+        if not gained: return
+        
+        pkg_lay = getattr(self, 'pkg_layout', None)
+        if not pkg_lay: return
+        for i in range(pkg_lay.count()):
+            item = pkg_lay.itemAt(i)
+            card = item.widget() if item else None
+            if not card or getattr(card, 'has_logical_conflict', False): continue
+            try:
+                rel = os.path.relpath(getattr(card, 'path', ''), self.storage_root).replace('\\', '/')
+            except ValueError:
+                continue
+            if rel in gained:
+                card.has_logical_conflict = True
+                card._update_style()
+
     def _cleanup_tag_thread(self):
         """Clean up the Python reference to the thread."""
         self._tag_sync_thread = None
@@ -1143,7 +1378,10 @@ class LMDeploymentOpsMixin:
             QTimer.singleShot(0, lambda: self._refresh_tag_visuals())
 
     def _refresh_category_cards_cached(self, cached_configs):
-        """Updated helper to accept cache from async worker."""
+        """Updated helper to accept cache from async worker.
+        The worker has already persisted its flags, so children are read through the
+        indexed get_direct_children_configs() instead of re-filtering the full map per card.
+        """
         app_data = self.app_combo.currentData()
         if not app_data: return
         target_root = app_data.get(self.current_target_key)
@@ -1156,7 +1394,7 @@ class LMDeploymentOpsMixin:
                 if item and item.widget():
                     card = item.widget()
                     if hasattr(card, 'path') and hasattr(card, 'set_children_status'):
-                        h_l, h_c, h_p, h_u, h_ic, h_i = self._scan_children_status(card.path, target_root, cached_configs=cached_configs)
+                        h_l, h_c, h_p, h_u, h_ic, h_i = self._scan_children_status(card.path, target_root)
                         card.set_children_status(
                             has_linked=h_l, 
                             has_conflict=h_c, 
@@ -1232,11 +1470,13 @@ class LMDeploymentOpsMixin:
         linked_children = []
         
         try:
+            # One indexed query for all direct children instead of one lookup per folder
+            child_configs = {rel.lower(): cfg for rel, cfg in self.db.get_direct_children_configs(category_rel_path)}
             for item in os.listdir(category_abs):
                 child_path = os.path.join(category_abs, item)
                 if os.path.isdir(child_path) and not item.startswith('.') and item not in ('_Trash', 'Trash'):
                     child_rel = os.path.join(category_rel_path, item).replace('\\', '/')
-                    child_cfg = self.db.get_folder_config(child_rel) or {}
+                    child_cfg = child_configs.get(child_rel.lower()) or {}
                     
                     # Collect conflict tags
                     child_tag = child_cfg.get('conflict_tag')
@@ -1300,10 +1540,9 @@ class LMDeploymentOpsMixin:
                 return
 
             self.logger.info(f"[CategoryDeploy] Swapping {len(linked_children)} child packages")
-            for child_rel in linked_children:
-                self._unlink_single(child_rel, update_ui=False)
-                # Phase 5: Ensure button reset for unlinked packages
-                self.db.update_folder_display_config(child_rel, last_known_status='none')
+            self._remove_links(linked_children, skip_refresh=True)
+            # Phase 5: Ensure button reset for unlinked packages
+            self.db.bulk_update_items([{'rel_path': child_rel, 'last_known_status': 'none'} for child_rel in linked_children])
         
         # --- Deploy the category itself ---
         success = self._deploy_single(category_rel_path, update_ui=False, show_result=False)
@@ -2,6 +2,7 @@ from PyQt6.QtCore import QObject, pyqtSignal
 import os
 import logging
 from src.core.link_master.database import LinkMasterDB
+from src.core.link_master.conflict_index import TagConflictIndex, conflict_rows_from_configs
 
 logger = logging.getLogger("TagConflictWorker")
 
@@ -11,7 +12,7 @@ class TagConflictWorker(QObject):
     Fetches DB configs and builds an active tag map.
     Phase 28.5: Uses isolated DB connection to avoid Threading crashes.
     """
-    finished = pyqtSignal(object) # returns dict { 'active_tags_map': ..., 'all_configs': ... }
+    finished = pyqtSignal(object) # returns dict { 'abs_config_map': ..., 'all_configs': ... }
     
     def __init__(self, db_path, storage_root, target_root=None):
         super().__init__()
@@ -19,6 +20,28 @@ class TagConflictWorker(QObject):
         self.storage_root = storage_root
         self.target_root = target_root
         
+    def _make_exists(self):
+        """
+        os.path.exists replacement backed by one os.listdir per parent directory.
+        A full refresh used to stat every DB entry (twice); siblings share a listing.
+        """
+        listings = {}
+
+        def exists(p):
+            abs_p = os.path.join(self.storage_root, p) if not os.path.isabs(p) else p
+            parent, name = os.path.split(os.path.normpath(abs_p))
+            names = listings.get(parent)
+            if names is None:
+                try:
+                    names = set(os.listdir(parent))
+                    if os.name == 'nt':
+                        names = {n.lower() for n in names}
+                except OSError:
+                    names = set()
+                listings[parent] = names
+            return (name.lower() if os.name == 'nt' else name) in names
+        return exists
+
     def run(self):
         if not self.storage_root:
             logger.debug("TagConflictWorker: storage_root is None, skipping run.")
@@ -27,29 +50,30 @@ class TagConflictWorker(QObject):
 
         import time
         start_t = time.time()
+        local_db = None
         try:
             # Create ISOLATED DB instance for this thread
             local_db = LinkMasterDB(db_path=self.db_path)
             
-            # 1. Build Index of Active States
-            all_configs = local_db.get_all_folder_configs()
-            active_tags_map = {}
+            # 1. Build Index of Active States (only the columns conflict detection reads)
+            all_configs = local_db.get_subtree_configs("", columns=[
+                'last_known_status', 'is_library', 'lib_name', 'target_override',
+                'conflict_tag', 'conflict_scope'])
             active_library_names = set()
             active_targets_map = {} # norm_target -> rel_path
             tag_conflicted_categories = set()
-            
+            exists = self._make_exists()
+
+            def is_live(p):
+                # Skip trash items, corrupted paths and orphaned DB entries (folder no longer exists on disk)
+                if not p or '/Trash/' in p or p.startswith('..') or '/Trash' in p:
+                    return False
+                return exists(p)
+
             # Step 1: Collect Active State (Linked items) and Library Names
             linked_count = 0
             for p, cfg in all_configs.items():
-                if not p: continue
-
-                # Skip trash items and corrupted paths
-                if '/Trash/' in p or p.startswith('..') or '/Trash' in p:
-                    continue
-                
-                # Skip orphaned DB entries (folder no longer exists on disk)
-                abs_check = os.path.join(self.storage_root, p) if not os.path.isabs(p) else p
-                if not os.path.exists(abs_check):
+                if not is_live(p):
                     continue
                     
                 if cfg.get('last_known_status') == 'linked':
@@ -67,27 +91,11 @@ class TagConflictWorker(QObject):
                         norm_target = target_path.replace('\\', '/').lower()
                         active_targets_map[norm_target] = p
 
-                    # Tag tracking (Index ALL linked tags)
-                    if cfg.get('conflict_scope', 'disabled') != 'disabled':
-                        tag_str = cfg.get('conflict_tag')
-                        if tag_str:
-                            tags = [t.strip() for t in tag_str.split(',') if t.strip()]
-                            for t in tags:
-                                if not t: continue
-                                rel_p = p
-                                if os.path.isabs(p):
-                                    try: rel_p = os.path.relpath(p, self.storage_root)
-                                    except: pass
-                                
-                                cat_path = os.path.dirname(rel_p).replace('\\', '/')
-                                if t not in active_tags_map: active_tags_map[t] = []
-                                active_tags_map[t].append({
-                                    'path': p,
-                                    'scope': cfg.get('conflict_scope', 'disabled'),
-                                    'cat': cat_path
-                                })
-
-            logger.debug(f"[Profile] TagConflictWorker: Indexed {len(all_configs)} items, {linked_count} linked. Found {len(active_tags_map)} active tags.")
+            # Tag tracking: conflict_tag -> linked packages index (lm_conflict_tags)
+            rows = None if local_db.has_conflict_index() else conflict_rows_from_configs(all_configs)
+            tag_index = TagConflictIndex(local_db, track_changes=False, keep=is_live, rows=rows)
+
+            logger.debug(f"[Profile] TagConflictWorker: Indexed {len(all_configs)} items, {linked_count} linked.")
 
             # Step 2: Identify Conflicts and Library Alts for ALL items
             conflict_count = 0
@@ -96,15 +104,7 @@ class TagConflictWorker(QObject):
             abs_config_map = {} # For UI thread matching
 
             for p, cfg in all_configs.items():
-                if not p: continue
-
-                # Skip trash items and corrupted paths (same filter as Step 1)
-                if '/Trash/' in p or p.startswith('..') or '/Trash' in p:
-                    continue
-                
-                # Skip orphaned DB entries (folder no longer exists on disk)
-                abs_check = os.path.join(self.storage_root, p) if not os.path.isabs(p) else p
-                if not os.path.exists(abs_check):
+                if not is_live(p):
                     continue
                     
                 # Normalized path for matching
@@ -133,24 +133,9 @@ class TagConflictWorker(QObject):
                         alt_count += 1
                 
                 # B. Tag Match Conflict
-                tag_str = cfg.get('conflict_tag')
-                scope = cfg.get('conflict_scope', 'disabled')
-                if tag_str and scope != 'disabled':
-                    my_tags = [t.strip() for t in tag_str.split(',') if t.strip()]
-                    for tag in my_tags:
-                        matches = active_tags_map.get(tag, [])
-                        for m in matches:
-                            if m.get('path') == p: continue
-                            if scope == 'global' or m['scope'] == 'global':
-                                has_logical_conflict = True
-                                logger.debug(f"[ConflictDebug] TAG GLOBAL: '{p}' conflicts with '{m.get('path')}' via tag '{tag}'")
-                                break
-                            if scope == 'category' and m['cat'] == my_cat:
-                                has_logical_conflict = True
-                                logger.debug(f"[ConflictDebug] TAG CATEGORY: '{p}' conflicts with '{m.get('path')}' via tag '{tag}' in category '{my_cat}'")
-                                break
-                        if has_logical_conflict:
-                            break
+                if tag_index.is_conflicted(rel_p.replace('\\', '/')):
+                    has_logical_conflict = True
+                    logger.debug(f"[ConflictDebug] TAG: '{p}' shares a conflict tag with a linked package")
                 
                 # C. Global Physical Occupancy Check
                 if not has_logical_conflict and self.target_root:
@@ -189,7 +174,6 @@ class TagConflictWorker(QObject):
             
             # 3. Return results (now includes abs_config_map)
             result = {
-                'active_tags_map': active_tags_map,
                 'active_library_names': list(active_library_names),
                 'active_targets_map': active_targets_map,
                 'tag_conflicted_categories': list(tag_conflicted_categories),
@@ -203,3 +187,7 @@ class TagConflictWorker(QObject):
             logger.error(f"TagConflictWorker Error: {e}")
             logger.error(traceback.format_exc())
             self.finished.emit(None)
+        finally:
+            # QThreads are invisible to the pool's dead-thread pruning
+            if local_db is not None:
+                local_db.release_connection()
@@ -34,6 +34,32 @@ class LMCardPoolMixin:
                     self.deploy_button_opacity = int(saved_opacity) / 100.0
             except: pass
 
+    def _init_image_priority(self):
+        """Loads card images nearest the viewport first; re-ranks pending loads on scroll (call after UI setup)."""
+        self.image_loader.set_priority_provider(self._card_image_priority)
+        for scroll in (getattr(self, 'cat_scroll', None), getattr(self, 'pkg_scroll', None)):
+            if scroll is not None:
+                scroll.verticalScrollBar().valueChanged.connect(lambda _v: self.image_loader.schedule_reprioritize())
+
+    def _card_image_priority(self, card) -> float:
+        """Pixel distance of card from its scroll area's viewport (0 = visible); hidden cards go last."""
+        if sip.isdeleted(card) or card.isHidden():
+            return float('inf')
+        if hasattr(self, 'cat_container') and card.parent() == self.cat_container:
+            scroll = self.cat_scroll
+        elif hasattr(self, 'pkg_container') and card.parent() == self.pkg_container:
+            scroll = self.pkg_scroll
+        else:
+            return 0
+        top = scroll.verticalScrollBar().value()
+        bottom = top + scroll.viewport().height()
+        geo = card.geometry()
+        if geo.bottom() < top:
+            return top - geo.bottom()
+        if geo.top() > bottom:
+            return geo.top() - bottom
+        return 0
+
     def _set_deploy_button_opacity(self, opacity: int):
         """Update deploy button opacity for all cards in pool and active."""
         f_opacity = opacity / 100.0
@@ -193,6 +219,15 @@ class LMCardPoolMixin:
         cat_layout = getattr(self, 'cat_layout', None)
         pkg_layout = getattr(self, 'pkg_layout', None)
         
+        # Pending image loads of released cards are dropped (running ones still fill the cache)
+        released = []
+        if context in ["all", "category", "cat", "view"]:
+            released += self._active_cat_cards
+        if context in ["all", "package", "pkg", "contents"]:
+            released += self._active_pkg_cards
+        if hasattr(self, 'image_loader'):
+            self.image_loader.drop_owners(released)
+
         # 1. Categories
         if context in ["all", "category", "cat", "view"]:
             if cat_layout:
@@ -268,6 +303,8 @@ class LMCardPoolMixin:
         
         if card in active_list:
             active_list.remove(card)
+        if hasattr(self, 'image_loader'):
+            self.image_loader.drop_owners((card,))
             
         # Remove from layout if possible
         if is_package and hasattr(self, 'pkg_layout'):
@@ -23,6 +23,7 @@ import os
 import time
 from src.core.lang_manager import _
 from src.ui.link_master.item_card import ItemCard
+from src.core.link_master.scan_snapshot import get_scan_snapshots, results_signature
 import re # Phase 33: Natural Sort
 
 
@@ -50,7 +51,31 @@ class LMScanHandlerMixin:
         
         self._refresh_debounce_timer.start()
     
-    def _on_scan_results_ready(self, results, original_path, context="view", app_id=None, gen_id=0):
+    def _render_scan_snapshot(self, path, app_data, context, gen_id=0):
+        """
+        Renders the stored scan snapshot of path if its key (dir mtime + DB revision)
+        still matches. The scan queued by the caller revalidates it; if its result is
+        identical, _on_scan_results_ready keeps the cards instead of redrawing.
+        """
+        if not hasattr(self, '_snapshot_shown'):
+            self._snapshot_shown = {}  # context -> (path, signature) of the rendered snapshot
+        self._snapshot_shown.pop(context, None)
+        try:
+            hit = get_scan_snapshots(self.db).get(path, app_data.get(self.current_target_key))
+        except Exception as e:
+            self.logger.debug(f"[Snapshot] lookup failed for {path}: {e}")
+            return False
+        if not hit:
+            return False
+        results, signature = hit
+        t0 = time.perf_counter()
+        self._on_scan_results_ready(results, path, context, self.current_app_id, gen_id, from_snapshot=True)
+        self._scan_in_progress = True  # the revalidating scan is still running
+        self._snapshot_shown[context] = (os.path.normpath(path), signature)
+        self.logger.debug(f"[Snapshot] Rendered {len(results)} item(s) for {path} in {time.perf_counter() - t0:.3f}s")
+        return True
+
+    def _on_scan_results_ready(self, results, original_path, context="view", app_id=None, gen_id=0, from_snapshot=False):
         """Populates the category and package layouts based on scan results and context."""
         import time
         start_t = time.perf_counter()
@@ -71,6 +96,15 @@ class LMScanHandlerMixin:
         if not app_data: return
         storage_root = app_data.get('storage_root')
         
+        # Watch what this view was built from, so the next rescan only re-probes changed dirs
+        self._update_fs_watch(context, original_path, results, storage_root, app_data)
+
+        # Revalidation of a rendered snapshot: nothing to redraw if the scan found the same
+        shown = None if from_snapshot else getattr(self, '_snapshot_shown', {}).pop(context, None)
+        if shown and shown[0] == os.path.normpath(original_path) and shown[1] == results_signature(results):
+            self.logger.debug(f"[Snapshot] Revalidated {original_path} ({context}): unchanged, redraw skipped")
+            return
+        
         # 2. Get display configurations and folder configs
         configs = self._get_display_configs(original_path, context, storage_root, app_data)
         folder_configs = configs['folder_configs']
@@ -95,6 +129,28 @@ class LMScanHandlerMixin:
             self.setUpdatesEnabled(True)
 
 
+    def _update_fs_watch(self, context, original_path, results, storage_root, app_data):
+        """Replaces the watched set for context: scanned dir, its items and the matching target dirs."""
+        watcher = getattr(self, 'fs_watcher', None)
+        if not watcher: return
+        paths = [original_path] + [r.get('abs_path') for r in results]
+        rel = ''
+        if storage_root and original_path:
+            try:
+                rel = os.path.relpath(original_path, storage_root)
+                if rel == '.' or rel.startswith('..'): rel = ''
+            except ValueError:
+                rel = ''
+        for key in ('target_root', 'target_root_2', 'target_root_3'):
+            root = app_data.get(key)
+            if not root: continue
+            paths.append(root)
+            if rel: paths.append(os.path.join(root, rel))
+        try:
+            watcher.set_group(context, paths)
+        except Exception as e:
+            self.logger.debug(f"[FsWatcher] watch update failed: {e}")
+
     def _validate_scan_context(self, original_path, context, app_id=None, gen_id=0):
         """Phase 28/43: Scan version tracking and context validation to prevent stale results."""
         # Phase 43: Generation ID Check (Main Race Fix)
@@ -559,8 +615,7 @@ class LMScanHandlerMixin:
         child_tags = set()
         child_libs = set()
         
-        from src.core.file_handler import FileHandler # This import is not used here, but kept for consistency if it was intended elsewhere.
-        
+        # Indexed parent_rel lookup: touches only this category's rows
         children = self.db.get_direct_children_configs(folder_rel) if cached_configs is None else []
         if cached_configs:
             folder_rel_lower = folder_rel.lower()
@@ -644,10 +699,7 @@ class LMScanHandlerMixin:
         target_root = app_data.get(self.current_target_key)
         if not target_root: return
         
-        # Phase 28 Optimization: Fetch DB once!
-        all_configs_raw = self.db.get_all_folder_configs()
-        cached_configs = {k.replace('\\', '/'): v for k, v in all_configs_raw.items()}
-        
+        # Each category reads only its direct children via the indexed parent_rel column
         cat_count = 0
         for layout in [self.cat_layout, self.pkg_layout]:
             for i in range(layout.count()):
@@ -656,8 +708,7 @@ class LMScanHandlerMixin:
                     card = item.widget()
                     if isinstance(card, ItemCard) and card.is_package is False:
                             cat_count += 1
-                            # Pass cache
-                            h_l, h_c, h_p, h_u, h_ic, h_i = self._scan_children_status(card.path, target_root, cached_configs=cached_configs)
+                            h_l, h_c, h_p, h_u, h_ic, h_i = self._scan_children_status(card.path, target_root)
                             card.set_children_status(
                                 has_linked=h_l, 
                                 has_conflict=h_c, 
@@ -766,11 +817,8 @@ class LMScanHandlerMixin:
             rel_path = os.path.relpath(path, storage_root).replace('\\', '/')
             parent_rel = os.path.dirname(rel_path)
             
-            all_configs = self.db.get_all_folder_configs()
-            siblings = []
-            for r, cfg in all_configs.items():
-                if os.path.dirname(r) == parent_rel:
-                    siblings.append((r, cfg.get('sort_order', 0)))
+            siblings = [(r, cfg.get('sort_order', 0)) for r, cfg in
+                        self.db.get_direct_children_configs(parent_rel, columns=['sort_order'])]
             
             if not siblings:
                 new_order = 0
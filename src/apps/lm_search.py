@@ -4,30 +4,38 @@ Phase 19.8: Major search overhaul with modes, depth limit, NOT search
 Phase 32: Background thread search to prevent UI freeze
 """
 import os
+import json
 import time
+from collections import deque
 from PyQt6.QtWidgets import QLabel
 from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal, QObject
 from src.core.lang_manager import _
 from src.ui.link_master.item_card import ItemCard
+from src.apps.scanner_worker import is_package_listing
 
 
 class SearchWorker(QObject):
-    """Worker to perform file system search in background thread."""
-    finished = pyqtSignal(list)  # Emit search results when done
-    error = pyqtSignal(str)
+    """
+    Breadth-first search of storage_root down to max_depth levels, run in a
+    background thread. Hits are streamed in pages tagged with the search
+    generation so the window can drop pages from superseded searches.
+    """
+    page_ready = pyqtSignal(int, list)  # generation, page of results
+    finished = pyqtSignal(int, int)     # generation, total hits (always emitted)
+    error = pyqtSignal(int, str)        # generation, message
     
-    def __init__(self, storage_root, folder_configs, non_inheritable, 
-                 terms, not_terms, include_tags, exclude_tags, logic, selected_segments):
+    PAGE_SIZE = 50
+    PAGE_INTERVAL = 0.1  # Flush a partial page after this many seconds
+    
+    def __init__(self, generation, storage_root, folder_configs, non_inheritable, match, is_excluded, max_depth=2):
         super().__init__()
+        self.generation = generation
         self.storage_root = storage_root
         self.folder_configs = folder_configs
         self.non_inheritable = non_inheritable
-        self.terms = terms
-        self.not_terms = not_terms
-        self.include_tags = include_tags
-        self.exclude_tags = exclude_tags
-        self.logic = logic
-        self.selected_segments = selected_segments
+        self.match = match              # (name, config, effective_tags, item_type) -> bool
+        self.is_excluded = is_excluded  # (rel_path, patterns) -> bool (Deployer._is_excluded)
+        self.max_depth = max(1, max_depth)
         self._cancelled = False
     
     def cancel(self):
@@ -35,119 +43,108 @@ class SearchWorker(QObject):
     
     def run(self):
         """Execute search in background thread."""
+        total = 0
         try:
-            results = self._search_two_levels(self.storage_root)
-            if not self._cancelled:
-                self.finished.emit(results)
+            page = []
+            last_flush = time.perf_counter()
+            for result in self._walk():
+                page.append(result)
+                total += 1
+                now = time.perf_counter()
+                # The first hit goes out alone so it renders immediately
+                if total == 1 or len(page) >= self.PAGE_SIZE or now - last_flush >= self.PAGE_INTERVAL:
+                    self.page_ready.emit(self.generation, page)
+                    page = []
+                    last_flush = now
+            if page and not self._cancelled:
+                self.page_ready.emit(self.generation, page)
         except Exception as e:
             if not self._cancelled:
-                self.error.emit(str(e))
+                self.error.emit(self.generation, str(e))
+        finally:
+            self.finished.emit(self.generation, total)
     
-    def _search_two_levels(self, storage_path):
-        """Scan two levels of directories for matching items."""
-        results = []
-        if not storage_path or not os.path.isdir(storage_path):
-            return results
-        
+    def _parse_tags(self, config):
+        return {t.strip().lower() for t in (config.get('tags') or '').split(',') if t.strip()}
+    
+    @staticmethod
+    def _exclude_patterns(config):
+        """'exclude' patterns from a folder's deployment rules, relative to that folder."""
+        rules = config.get('deployment_rules')
+        if not rules: return []
         try:
-            with os.scandir(storage_path) as cat_iter:
-                for cat_entry in cat_iter:
-                    if self._cancelled:
-                        return results
-                    if not cat_entry.is_dir():
-                        continue
-                    if cat_entry.name.startswith('_'):
-                        continue
-                    
-                    cat_abs = cat_entry.path
-                    cat_rel = cat_entry.name
-                    cat_config = self.folder_configs.get(cat_rel.replace('\\', '/'), {})
-                    cat_type = 'category'
-                    
-                    cat_own_tags = {t.strip().lower() for t in (cat_config.get('tags') or '').split(',') if t.strip()}
-                    cat_effective_tags = cat_own_tags
-                    cat_inheritable_tags = cat_own_tags - self.non_inheritable
-                    
-                    if self._check_match(cat_entry.name, cat_config, cat_effective_tags):
-                        results.append({
-                            'name': cat_entry.name,
-                            'path': cat_abs,
-                            'rel_path': cat_rel,
-                            'config': cat_config,
-                            'type': cat_type,
-                            'effective_tags': cat_effective_tags
-                        })
-                    
-                    # Level 2: Packages
-                    try:
-                        with os.scandir(cat_abs) as pkg_iter:
-                            for pkg_entry in pkg_iter:
-                                if self._cancelled:
-                                    return results
-                                if not pkg_entry.is_dir():
-                                    continue
-                                if pkg_entry.name.startswith('_'):
-                                    continue
-                                
-                                pkg_abs = pkg_entry.path
-                                pkg_rel = f"{cat_rel}/{pkg_entry.name}"
-                                pkg_config = self.folder_configs.get(pkg_rel.replace('\\', '/'), {})
-                                pkg_type = pkg_config.get('folder_type', 'package')
-                                
-                                pkg_own_tags = {t.strip().lower() for t in (pkg_config.get('tags') or '').split(',') if t.strip()}
-                                pkg_effective_tags = pkg_own_tags | cat_inheritable_tags
-                                
-                                if self._check_match(pkg_entry.name, pkg_config, pkg_effective_tags):
-                                    results.append({
-                                        'name': pkg_entry.name,
-                                        'path': pkg_abs,
-                                        'rel_path': pkg_rel,
-                                        'config': pkg_config,
-                                        'type': pkg_type,
-                                        'effective_tags': pkg_effective_tags
-                                    })
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+            patterns = json.loads(rules).get('exclude', []) if isinstance(rules, str) else rules.get('exclude', [])
+        except (ValueError, AttributeError):
+            return []
+        return patterns if isinstance(patterns, list) else []
+    
+    def _walk(self):
+        """
+        Yields matching result dicts. Level 1 is always a category; deeper 'auto'
+        folders are classified from their own listing when the walk reaches them,
+        and folders at the depth limit are treated as packages. The walk never
+        descends into packages or terminal folders.
+        """
+        if not self.storage_root or not os.path.isdir(self.storage_root):
+            return
         
-        return results
+        # (abs_path, rel_path, depth, inheritable tags, exclude patterns) of folders to list
+        queue = deque([(self.storage_root, "", 0, set(), [])])
+        while queue:
+            if self._cancelled: return
+            dir_abs, dir_rel, depth, inheritable, parent_excludes = queue.popleft()
+            try:
+                with os.scandir(dir_abs) as it:
+                    entries = [e for e in it if e.is_dir()]
+            except OSError:
+                continue
+            
+            for entry in entries:
+                if self._cancelled: return
+                if entry.name.startswith('_'): continue  # Skip _Trash etc
+                rel = f"{dir_rel}/{entry.name}" if dir_rel else entry.name
+                if self.is_excluded(rel, []) or (parent_excludes and self.is_excluded(entry.name, parent_excludes)):
+                    continue
+                
+                level = depth + 1
+                config = self.folder_configs.get(rel, {})
+                folder_type = config.get('folder_type') or 'auto'
+                if level == 1:
+                    item_type = 'category'
+                elif folder_type in ('category', 'package'):
+                    item_type = folder_type
+                elif level >= self.max_depth:
+                    item_type = 'package'
+                else:
+                    item_type = self._classify(entry.path)
+                
+                if config.get('effective_tags') is not None:
+                    effective_tags = set(filter(None, config['effective_tags'].split(',')))
+                else:
+                    effective_tags = self._parse_tags(config)
+                    if level > 1 and config.get('inherit_tags', 1) != 0:
+                        effective_tags = effective_tags | inheritable
+                
+                if self.match(entry.name, config, effective_tags, item_type):
+                    yield {
+                        'name': config.get('display_name') or entry.name,
+                        'path': entry.path,
+                        'rel_path': rel,
+                        'config': config,
+                        'type': item_type,
+                        'effective_tags': effective_tags
+                    }
+                
+                if item_type == 'category' and level < self.max_depth and not config.get('is_terminal'):
+                    queue.append((entry.path, rel, level, effective_tags - self.non_inheritable,
+                                  self._exclude_patterns(config)))
     
-    def _check_match(self, name, config, effective_tags):
-        """Check if item matches search criteria."""
-        name_lower = name.lower()
-        memo = (config.get('memo') or '').lower()
-        
-        # NOT terms exclusion
-        for nt in self.not_terms:
-            if nt in name_lower or nt in memo:
-                return False
-        
-        # Exclude tags
-        for et in self.exclude_tags:
-            if et in effective_tags:
-                return False
-        
-        # Positive matching
-        if self.logic == 'and':
-            if self.terms and not all(t in name_lower or t in memo for t in self.terms):
-                return False
-            if self.include_tags and not self.include_tags.issubset(effective_tags):
-                return False
-        else:  # 'or' logic
-            matched = False
-            if self.terms:
-                if any(t in name_lower or t in memo for t in self.terms):
-                    matched = True
-            if self.include_tags:
-                if self.include_tags & effective_tags:
-                    matched = True
-            if not self.terms and not self.include_tags:
-                matched = True
-            if not matched:
-                return False
-        
-        return True
+    def _classify(self, abs_path):
+        try:
+            with os.scandir(abs_path) as it:
+                return 'package' if is_package_listing(it) else 'category'
+        except OSError:
+            return 'package'
 
 
 class LMSearchMixin:
@@ -174,6 +171,7 @@ class LMSearchMixin:
         
         # If no active filter, just refresh current path normally
         if not query and not selected_tags:
+            self._cancel_search()
             if hasattr(self, 'current_view_path') and self.current_view_path:
                 self._load_items_for_path(self.current_view_path)
             elif storage_root:
@@ -194,8 +192,6 @@ class LMSearchMixin:
 
         self._show_search_indicator()
         
-        folder_configs = self.db.get_all_folder_configs()
-        
         # Parse query for terms and NOT terms (! prefix)
         terms = []
         not_terms = []
@@ -220,158 +216,295 @@ class LMSearchMixin:
         # Get non-inheritable tags
         non_inheritable = getattr(self, 'non_inheritable_tags', set())
         
-        # Search function - only scan categories (level 1) and their direct children (level 2 = packages)
-        # DO NOT recurse into packages
-        def search_two_levels(storage_path):
-            results = []
-            if not storage_path or not os.path.isdir(storage_path): return results
-            
-            from PyQt6.QtWidgets import QApplication
-            
-            try:
-                # Level 1: Categories (direct children of storage_root)
-                with os.scandir(storage_path) as cat_iter:
-                    for cat_entry in cat_iter:
-                        # Process UI events to keep UI responsive
-                        QApplication.processEvents()
-                        
-                        if not cat_entry.is_dir(): continue
-                        if cat_entry.name.startswith('_'): continue  # Skip _Trash etc
-                        
-                        cat_abs = cat_entry.path
-                        cat_rel = cat_entry.name
-                        
-                        cat_config = folder_configs.get(cat_rel.replace('\\', '/'), {})
-                        
-                        # FORCE type based on path depth, not DB
-                        # Level 1 = category (no "/" in rel_path)
-                        cat_type = 'category'
-                        
-                        # Category tags
-                        cat_own_tags = {t.strip().lower() for t in (cat_config.get('tags') or '').split(',') if t.strip()}
-                        cat_effective_tags = cat_own_tags
-                        # Filter inheritable tags (for passing to children) - remove non-inheritable
-                        cat_inheritable_tags = cat_own_tags - non_inheritable
-                        
-                        # Check if category matches
-                        cat_matches = self._check_match(
-                            cat_entry.name, cat_config, cat_effective_tags,
-                            terms, not_terms, include_tags, exclude_tags, logic
-                        )
-                        
-                        if cat_matches:
-                            results.append({
-                                'name': cat_config.get('display_name') or cat_entry.name,
-                                'path': cat_abs,
-                                'rel_path': cat_rel,
-                                'config': cat_config,
-                                'type': cat_type,
-                                'effective_tags': cat_effective_tags
-                            })
-                        
-                        # Level 2: Packages (direct children of category)
-                        # Always scan level 2 - they are packages
-                        try:
-                            with os.scandir(cat_abs) as pkg_iter:
-                                for pkg_entry in pkg_iter:
-                                    if not pkg_entry.is_dir(): continue
-                                    if pkg_entry.name.startswith('_'): continue
-                                    
-                                    pkg_abs = pkg_entry.path
-                                    pkg_rel = f"{cat_rel}/{pkg_entry.name}"
-                                    
-                                    pkg_config = folder_configs.get(pkg_rel.replace('\\', '/'), {})
-                                    
-                                    # FORCE type based on path depth
-                                    # Level 2 = package (has "/" in rel_path)
-                                    pkg_type = 'package'
-                                    
-                                    # Package tags (inherit from category, but only inheritable tags)
-                                    can_inherit = pkg_config.get('inherit_tags', 1) != 0
-                                    pkg_own_tags = {t.strip().lower() for t in (pkg_config.get('tags') or '').split(',') if t.strip()}
-                                    # Use cat_inheritable_tags (filtered), not cat_effective_tags
-                                    pkg_effective_tags = pkg_own_tags | (cat_inheritable_tags if can_inherit else set())
-                                    
-                                    # Check if package matches
-                                    pkg_matches = self._check_match(
-                                        pkg_entry.name, pkg_config, pkg_effective_tags,
-                                        terms, not_terms, include_tags, exclude_tags, logic,
-                                        selected_segments=selected_segments
-                                    )
-                                    
-                                    if pkg_matches:
-                                        results.append({
-                                            'name': pkg_config.get('display_name') or pkg_entry.name,
-                                            'path': pkg_abs,
-                                            'rel_path': pkg_rel,
-                                            'config': pkg_config,
-                                            'type': pkg_type,
-                                            'effective_tags': pkg_effective_tags
-                                        })
-                        except Exception as e:
-                            self.logger.error(f"Search Error in category {cat_abs}: {e}")
-                            
-            except Exception as e:
-                self.logger.error(f"Search Error in {storage_path}: {e}")
-                
-            return results
-
-        all_results = search_two_levels(storage_root)
-        
-        self.logger.debug(f"[Search] Total results: {len(all_results)}")
+        # Phase 46: Each search gets a generation; pages from older generations are dropped
+        self._cancel_search()
+        self._search_context = {
+            'target_root': target_root, 
+            'app_id': app_id, 
+            'storage_root': storage_root, 
+            'query': query,
+            'mode': mode,
+            'generation': self._search_generation,
+            'started': False,
+            'cat_hits': 0,
+            'pkg_hits': 0,
+            'shown_parents': set()
+        }
         
-        # Debug: Log types of each result
-        for r in all_results[:10]:  # First 10 for debugging
-            self.logger.debug(f"[Search] Result: {r['name']} -> type={r['type']}, rel_path={r['rel_path']}")
+        def matches(name, config, effective_tags, item_type):
+            return self._matches_search(name, config, effective_tags, item_type, terms, not_terms,
+                                        include_tags, exclude_tags, logic, selected_segments)
         
-        # Split results by type
-        cat_results = [r for r in all_results if r['type'] == 'category']
-        pkg_results = [r for r in all_results if r['type'] == 'package']
+        try:
+            self.db.refresh_effective_tags()
+        except Exception as e:
+            self.logger.warning(f"[Search] Effective tag refresh failed: {e}")
         
-        self.logger.debug(f"[Search] Before mode filter: cats={len(cat_results)}, pkgs={len(pkg_results)}, mode={mode}")
-
+        # Phase 45: Answer from the FTS index when it covers the requested depth.
+        # unicode61 only matches token prefixes, which would drop mid-word hits
+        # ("mod" in "MyMod") before the exact substring check: walk instead.
+        max_depth = self._get_search_max_depth()
+        if max_depth == 2 and self.db.has_substring_search_index():
+            try:
+                all_results = self._indexed_search(storage_root, terms, not_terms, include_tags, exclude_tags,
+                                                   logic, selected_segments, non_inheritable)
+            except Exception as e:
+                self.logger.error(f"[Search] Index search failed, falling back to scan: {e}")
+                all_results = None
+            if all_results is not None:
+                self.logger.debug(f"[Search] Total results: {len(all_results)}")
+                cat_results, pkg_results = self._apply_search_mode(all_results)
+                self._display_search_results(cat_results, pkg_results)
+                return
+        
+        # Streaming walk: pages arrive via _on_search_page as they are found
+        self._start_search_worker(storage_root, non_inheritable, matches, max_depth)
+    
+    def _get_search_max_depth(self):
+        """Folder levels below storage_root that search visits (registry 'search_max_depth', default 2)."""
+        try:
+            return max(1, int(self.registry.get_setting('search_max_depth', '2') or 2))
+        except (ValueError, TypeError, AttributeError):
+            return 2
+    
+    def _start_search_worker(self, storage_root, non_inheritable, match, max_depth):
+        """Run a SearchWorker for the current search generation in its own thread."""
+        folder_configs = self.db.get_all_folder_configs()
+        worker = SearchWorker(self._search_generation, storage_root, folder_configs, non_inheritable,
+                              match, self.deployer._is_excluded, max_depth)
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        
+        thread.started.connect(worker.run)
+        worker.page_ready.connect(self._on_search_page)
+        worker.error.connect(self._on_search_error)
+        worker.finished.connect(self._on_search_finished)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        
+        # Keep cancelled workers referenced until their thread winds down
+        if not hasattr(self, '_search_threads'):
+            self._search_threads = {}
+        self._search_threads[self._search_generation] = (thread, worker)
+        gen = self._search_generation
+        thread.finished.connect(lambda: self._search_threads.pop(gen, None))
+        
+        self._search_t0 = time.perf_counter()
+        thread.start()
+    
+    def _cancel_search(self):
+        """Stop any running search walk and start a new generation; stale pages are ignored."""
+        self._search_generation = getattr(self, '_search_generation', 0) + 1
+        for thread, worker in list(getattr(self, '_search_threads', {}).values()):
+            try:
+                worker.cancel()
+            except RuntimeError:
+                pass
+    
+    def _on_search_page(self, generation, results):
+        """A page of hits from SearchWorker (main thread)."""
+        ctx = getattr(self, '_search_context', None)
+        if not ctx or generation != ctx.get('generation'):
+            return
+        if not ctx['started']:
+            self.logger.debug(f"[Profile] Search first result after {time.perf_counter() - self._search_t0:.3f}s")
+        cat_results, pkg_results = self._apply_search_mode(results)
+        if cat_results or pkg_results or not ctx['started']:
+            self._display_search_results(cat_results, pkg_results, append=ctx['started'], final=False)
+    
+    def _on_search_finished(self, generation, total):
+        ctx = getattr(self, '_search_context', None)
+        if not ctx or generation != ctx.get('generation'):
+            return
+        self.logger.debug(f"[Search] Total results: {total} ({time.perf_counter() - self._search_t0:.3f}s)")
+        self._display_search_results([], [], append=ctx['started'], final=True)
+    
+    def _on_search_error(self, generation, message):
+        self.logger.error(f"[Search] Search failed (gen {generation}): {message}")
+    
+    def _apply_search_mode(self, results):
+        """
+        Split results into (categories, packages) for the current search mode.
+        Parents already produced by earlier pages are not repeated.
+        """
+        ctx = self._search_context
+        mode = ctx['mode']
+        cat_results = [r for r in results if r['type'] == 'category']
+        pkg_results = [r for r in results if r['type'] == 'package']
         
-        # Apply search mode filtering
         if mode == 'categories_only':
             # Only show categories that match
             pkg_results = []
         elif mode == 'cats_with_packages':
-            # Show categories that contain matching packages
-            if pkg_results:
-                matched_parent_cats = set()
-                for pkg in pkg_results:
-                    parts = pkg['rel_path'].replace('\\', '/').split('/')
-                    if len(parts) >= 1:
-                        matched_parent_cats.add(parts[0])
-                
-                # Filter categories to only those with matching packages
-                cat_results = [c for c in cat_results if c['name'] in matched_parent_cats]
-                
-                # Also add parent categories that aren't in results
-                for cat_name in matched_parent_cats:
-                    cat_path = os.path.join(storage_root, cat_name)
-                    if os.path.isdir(cat_path):
-                        if not any(c['name'] == cat_name for c in cat_results):
-                            cat_results.append({
-                                'name': cat_name,
-                                'path': cat_path,
-                                'rel_path': cat_name,
-                                'config': folder_configs.get(cat_name, {}),
-                                'type': 'category'
-                            })
-            else:
-                cat_results = []  # No matching packages = no categories
+            # Show the categories that contain matching packages
+            cat_results = []
+            seen = ctx['shown_parents']
+            for pkg in pkg_results:
+                parent = pkg['rel_path'].rpartition('/')[0]
+                if not parent or parent in seen: continue
+                seen.add(parent)
+                config = self.db.get_folder_config(parent) or {}
+                cat_results.append({
+                    'name': config.get('display_name') or parent.rsplit('/', 1)[-1],
+                    'path': os.path.join(ctx['storage_root'], *parent.split('/')),
+                    'rel_path': parent,
+                    'config': config,
+                    'type': 'category'
+                })
         # mode == 'all_packages' (default) - show all matches as-is
+        return cat_results, pkg_results
+    
+    def _get_search_disk_tree(self, storage_root):
+        """
+        {category: [package names]} for the two searchable levels, as on disk.
+        Only directories whose mtime changed since the last search are re-listed;
+        newly seen folders get a default config row so the index covers them.
+        """
+        cache = getattr(self, '_search_disk_cache', None)
+        if not cache or cache['root'] != storage_root:
+            cache = {'root': storage_root, 'mtime': None, 'cats': {}}
+        try:
+            root_mtime = os.stat(storage_root).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+        
+        if root_mtime != cache['mtime']:
+            with os.scandir(storage_root) as it:
+                names = [e.name for e in it if not e.name.startswith('_') and e.is_dir()]
+            cache['cats'] = {n: cache['cats'].get(n, (None, [])) for n in names}
+            cache['mtime'] = root_mtime
+        
+        new_paths = []
+        for cat, (cat_mtime, pkgs) in list(cache['cats'].items()):
+            cat_abs = os.path.join(storage_root, cat)
+            try:
+                mtime = os.stat(cat_abs).st_mtime_ns
+            except OSError:
+                del cache['cats'][cat]
+                continue
+            if mtime == cat_mtime:
+                continue
+            try:
+                with os.scandir(cat_abs) as it:
+                    pkgs = [e.name for e in it if not e.name.startswith('_') and e.is_dir()]
+            except OSError:
+                pkgs = []
+            cache['cats'][cat] = (mtime, pkgs)
+            new_paths.append(cat)
+            new_paths.extend(f"{cat}/{p}" for p in pkgs)
+        
+        if new_paths:
+            self.db.ensure_folder_configs(new_paths)
+        self._search_disk_cache = cache
+        return {cat: pkgs for cat, (_, pkgs) in cache['cats'].items()}
 
-        self._search_context = {
-            'target_root': target_root, 
-            'app_id': app_id, 
-            'storage_root': storage_root, 
-            'query': query
-        }
+    def _indexed_search(self, storage_root, terms, not_terms, include_tags, exclude_tags, logic, selected_segments, non_inheritable):
+        """
+        Index-backed equivalent of the two-level scan. The FTS index narrows the
+        candidates (plus packages inheriting a matching category tag); candidates
+        are then checked exactly against name, display name, memo, author, URLs and
+        effective tags. Returns None if storage_root is unavailable.
+        """
+        disk = self._get_search_disk_tree(storage_root)
+        if disk is None: return None
+        
+        def parse_tags(config):
+            return {t.strip().lower() for t in (config.get('tags') or '').split(',') if t.strip()}
+        
+        cat_configs = self.db.get_folder_configs(disk.keys())
+        cat_inheritable = {cat: parse_tags(cat_configs.get(cat, {})) - non_inheritable for cat in disk}
+        
+        def inheriting(pred):
+            """Packages under categories whose inheritable tags satisfy pred."""
+            hits = set()
+            for cat, tags in cat_inheritable.items():
+                if any(pred(t) for t in tags):
+                    hits.update(f"{cat}/{p}" for p in disk[cat])
+            return hits
+        
+        # 1. Candidates from the index (short trigram terms are only checked exactly)
+        candidates = None
+        for term in terms:
+            if len(term) < 3 and any(len(t) >= 3 for t in terms):
+                continue
+            hits = self.db.search_index(term) | inheriting(lambda t, term=term: term in t)
+            candidates = hits if candidates is None else candidates & hits
+        if candidates is None:
+            tag_groups = selected_segments or ([include_tags] if include_tags else [])
+            if tag_groups:
+                group = set(tag_groups[0]) | include_tags
+                candidates = inheriting(lambda t: t in group)
+                for tag in group:
+                    candidates |= self.db.search_index(tag, ('tags',))
+        
+        # Same visibility rules as SearchWorker._walk: excluded folders (global patterns,
+        # or the category's own exclude rules for its packages) and terminal categories' contents
+        is_excluded = self.deployer._is_excluded
+        all_paths = {}
+        for cat, pkgs in disk.items():
+            if is_excluded(cat, []):
+                continue
+            all_paths[cat] = (cat, 'category')
+            cat_config = cat_configs.get(cat, {})
+            if cat_config.get('is_terminal'):
+                continue
+            cat_excludes = SearchWorker._exclude_patterns(cat_config)
+            for p in pkgs:
+                rel = f"{cat}/{p}"
+                if is_excluded(rel, []) or (cat_excludes and is_excluded(p, cat_excludes)):
+                    continue
+                all_paths[rel] = (cat, 'package')
+        if candidates is None:
+            candidates = set(all_paths)
+        else:
+            candidates &= all_paths.keys()
+        for nt in not_terms:
+            if len(nt) >= 3:
+                candidates -= self.db.search_index(nt)
+        
+        # 2. Exact check on the (usually small) candidate set
+        configs = self.db.get_folder_configs(candidates)
+        results = []
+        for rel in sorted(candidates):
+            cat, item_type = all_paths[rel]
+            config = configs.get(rel, {})
+            name = rel.rsplit('/', 1)[-1]
+            if config.get('effective_tags') is not None:
+                effective_tags = set(filter(None, config['effective_tags'].split(',')))
+            else:
+                effective_tags = parse_tags(config)
+                if item_type == 'package' and config.get('inherit_tags', 1) != 0:
+                    effective_tags |= cat_inheritable[cat]
+            
+            if not self._matches_search(name, config, effective_tags, item_type, terms, not_terms,
+                                        include_tags, exclude_tags, logic, selected_segments):
+                continue
+            
+            results.append({
+                'name': config.get('display_name') or name,
+                'path': os.path.join(storage_root, cat) if item_type == 'category' else os.path.join(storage_root, cat, name),
+                'rel_path': rel,
+                'config': config,
+                'type': item_type,
+                'effective_tags': effective_tags
+            })
+        return results
+
+    def _matches_search(self, name, config, effective_tags, item_type, terms, not_terms, include_tags, exclude_tags, logic, selected_segments):
+        """
+        Exact match shared by the index and the directory walk: terms against name,
+        display name, memo, author, URLs and effective tags, then the tag filters.
+        Thread-safe (reads only its arguments).
+        """
+        text = " ".join([name, config.get('display_name') or '', config.get('description') or '',
+                         config.get('lib_memo') or '', config.get('author') or '',
+                         config.get('url') or '', config.get('url_list') or '', " ".join(effective_tags)]).lower()
+        if not all(t in text for t in terms): return False
+        if any(nt in text for nt in not_terms): return False
+        return self._check_match(name, config, effective_tags, [], [], include_tags, exclude_tags, logic,
+                                 selected_segments=selected_segments if item_type == 'package' else None)
 
-        self._display_search_results(cat_results, pkg_results)
-    
     def _check_match(self, name, config, effective_tags, terms, not_terms, include_tags, exclude_tags, logic, selected_segments=None):
         """Helper to check if an item matches search criteria."""
         # Tag matching (for explicit tag selection via tag bar)
@@ -409,38 +542,41 @@ class LMSearchMixin:
         
         return tag_match and text_match
         
-    def _display_search_results(self, cat_results, pkg_results):
-        """Display search results in respective areas."""
+    def _display_search_results(self, cat_results, pkg_results, append=False, final=True):
+        """
+        Display search results in respective areas. Streamed searches call this
+        once per page with append=True after the first, and once with final=True.
+        """
         ctx = self._search_context
         query = ctx['query']
         storage_root = ctx['storage_root']
         app_data = self.app_combo.currentData()
         if not app_data: return
 
-        # 1. Update Labels
-        self.cat_result_label.setText(_("🔍 {n} hit(s)").format(n=len(cat_results)) if cat_results else _("🔍 0 hits"))
-        self.pkg_result_label.setText(_("🔍 {n} hit(s)").format(n=len(pkg_results)) if pkg_results else _("🔍 0 hits"))
-        
-        # 2. Get Configurations (Reuse helper from LMScanHandlerMixin)
-        configs = self._get_display_configs(storage_root, "search", storage_root, app_data)
+        if not append:
+            # 1. Get Configurations once per search (Reuse helper from LMScanHandlerMixin)
+            ctx['configs'] = self._get_display_configs(storage_root, "search", storage_root, app_data)
+            ctx['started'] = True
+            ctx['cat_hits'] = ctx['pkg_hits'] = 0
+            
+            # 2. Prepare Layouts (Clear, release cards, batch mode)
+            # Phase 32: Remove orphan QLabel widgets (e.g., "No packages match" message)
+            for layout in [self.cat_layout, self.pkg_layout]:
+                if layout:
+                    orphans = []
+                    for i in range(layout.count()):
+                        w = layout.itemAt(i).widget()
+                        if w and isinstance(w, QLabel):
+                            orphans.append(w)
+                    for w in orphans:
+                        layout.removeWidget(w)
+                        w.deleteLater()
+            
+            self._release_all_active_cards("all")
+        configs = ctx['configs']
         folder_configs = configs['folder_configs']
         
-        # 3. Prepare Layouts (Clear, release cards, batch mode)
-        # Phase 32: Remove orphan QLabel widgets (e.g., "No packages match" message)
-        for layout in [self.cat_layout, self.pkg_layout]:
-            if layout:
-                orphans = []
-                for i in range(layout.count()):
-                    w = layout.itemAt(i).widget()
-                    if w and isinstance(w, QLabel):
-                        orphans.append(w)
-                for w in orphans:
-                    layout.removeWidget(w)
-                    w.deleteLater()
-        
-        self._release_all_active_cards("all")
-        
-        # 4. Normalize results to the format expected by _populate_cards Helper
+        # 3. Normalize results to the format expected by _populate_cards Helper
         def normalize_results(results):
             norm = []
             for r in results:
@@ -451,22 +587,35 @@ class LMSearchMixin:
                 norm.append(nr)
             return norm
 
-        # 5. Populate Layouts using unified helpers
+        # 4. Populate Layouts using unified helpers
         # Categories (Limit to 50 for performance)
-        norm_cats = normalize_results(cat_results[:50])
+        shown_cats = max(0, 50 - ctx['cat_hits'])
+        norm_cats = normalize_results(cat_results[:shown_cats])
         self._populate_cards(norm_cats, "search", storage_root, folder_configs, configs)
         
         # Packages (Limit to 100 for performance)
-        norm_pkgs = normalize_results(pkg_results[:100])
+        shown_pkgs = max(0, 100 - ctx['pkg_hits'])
+        norm_pkgs = normalize_results(pkg_results[:shown_pkgs])
         self._populate_cards(norm_pkgs, "search", storage_root, folder_configs, configs)
+        
+        ctx['cat_hits'] += len(cat_results)
+        ctx['pkg_hits'] += len(pkg_results)
+        
+        # 5. Update Labels
+        cat_hits, pkg_hits = ctx['cat_hits'], ctx['pkg_hits']
+        self.cat_result_label.setText(_("🔍 {n} hit(s)").format(n=cat_hits) if cat_hits else _("🔍 0 hits"))
+        self.pkg_result_label.setText(_("🔍 {n} hit(s)").format(n=pkg_hits) if pkg_hits else _("🔍 0 hits"))
+        
+        if not final:
+            return
 
         # 6. Finalize UI (Empty states, indicator, refresh)
-        if not cat_results:
+        if not cat_hits:
             lbl = QLabel(_("No categories match: {q}").format(q=query))
             lbl.setStyleSheet("color: #888; font-style: italic;")
             self.cat_layout.addWidget(lbl)
             
-        if not pkg_results:
+        if not pkg_hits:
             lbl = QLabel(_("No packages match: {q}").format(q=query))
             lbl.setStyleSheet("color: #888; font-style: italic;")
             self.pkg_layout.addWidget(lbl)
@@ -523,6 +672,8 @@ class LMSearchMixin:
     
     def _clear_search(self):
         """Clear search and restore normal view."""
+        self._cancel_search()
+        self._hide_search_indicator()
         self.search_bar.clear()
         self.tag_bar.clear_selection()  # Also clear tag selection
         
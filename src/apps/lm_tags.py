@@ -116,12 +116,15 @@ class LMTagsMixin:
         app_data = self.app_combo.currentData()
         if not app_data: return
         storage_root = app_data.get('storage_root')
-        folder_configs = self.db.get_all_folder_configs()
         
         # Phase 20: Segment-based logic
         selected_segments = self.tag_bar.get_selected_segments()
         visible_count = 0
         
+        # Matching rel_paths straight from the tag index; None = split tags per card
+        matched = self.db.find_items_by_tags(groups=selected_segments) if self.db.has_tag_index() else None
+        folder_configs = self.db.get_all_folder_configs() if matched is None else {}
+        
         for i in range(self.cat_layout.count()):
             item = self.cat_layout.itemAt(i)
             if not item or not item.widget(): continue
@@ -131,15 +134,18 @@ class LMTagsMixin:
             
             try:
                 rel_path = os.path.relpath(card.path, storage_root).replace('\\', '/')
-                config = folder_configs.get(rel_path, {})
-                cat_tags = {t.strip().lower() for t in (config.get('tags') or '').split(',') if t.strip()}
-                
-                # Match logic: (Segment1-Tag1 OR Segment1-Tag2) AND (Segment2-Tag1) ...
-                match = True
-                for segment in selected_segments:
-                    if not any(tag in cat_tags for tag in segment):
-                        match = False
-                        break
+                if matched is not None:
+                    match = rel_path in matched
+                else:
+                    config = folder_configs.get(rel_path, {})
+                    cat_tags = {t.strip().lower() for t in (config.get('tags') or '').split(',') if t.strip()}
+                    
+                    # Match logic: (Segment1-Tag1 OR Segment1-Tag2) AND (Segment2-Tag1) ...
+                    match = True
+                    for segment in selected_segments:
+                        if not any(tag in cat_tags for tag in segment):
+                            match = False
+                            break
                 
                 card.setVisible(match)
                 if match:
@@ -185,6 +191,10 @@ class LMTagsMixin:
                     if rel == ".": rel = ""
                 
                 config = folder_configs.get(rel, {})
+                if rel and config.get('effective_tags') is not None:
+                    # Materialized closure already covers this folder and its ancestors
+                    tags.update(t for t in config['effective_tags'].split(',') if t and t not in self.non_inheritable_tags)
+                    break
                 t_str = config.get('tags', '')
                 if t_str:
                     for t in t_str.split(','):
@@ -3,6 +3,29 @@ import os
 import logging
 import json
 import time
+from src.core.link_master.scan_snapshot import get_scan_snapshots
+from src.core.link_master.thumbnail_index import ThumbnailIndex
+
+PACKAGE_INDICATORS = {'.json', '.ini', '.yaml', '.toml', '.yml', '.txt'}
+_UNRESOLVED = object()
+
+def is_package_listing(entries):
+    """
+    Package heuristic over one directory listing (os.DirEntry iterable):
+    a package-like config file, or files without any subfolders.
+    """
+    has_subdirs = False
+    has_files = False
+    try:
+        for entry in entries:
+            if entry.is_dir() and not entry.name.startswith('.'):
+                has_subdirs = True
+            elif entry.is_file():
+                has_files = True
+                if os.path.splitext(entry.name)[1].lower() in PACKAGE_INDICATORS:
+                    return True
+    except OSError: pass
+    return has_files and not has_subdirs
 
 class ScannerWorker(QObject):
     results_ready = pyqtSignal(list, str, str, str, int) # items_sorted, original_path, context, app_id, gen_id
@@ -26,32 +49,21 @@ class ScannerWorker(QObject):
         self.target_key = None # Ensure target_key is initialized
         self.app_id = ""
         self.generation_id = 0
+        
+        # Incremental re-enrichment: results computed against a directory state are
+        # reused while the FsWatcher version (or, if unwatched, the mtime) is unchanged.
+        self.watcher = None       # FsWatcher, set by LinkMasterWindow
+        self._probe_cache = {}    # item abs path -> (watch_version, mtime_ns, thumbnail, is_package_auto)
+        self._status_cache = {}   # (check_path, source, rule) -> (watch_version, status_res)
 
     def _is_package_auto(self, abs_path):
         """Heuristic: Check if folder contains package-like config files OR is a leaf folder."""
         if not abs_path or not os.path.isdir(abs_path):
             return False
-        package_indicators = {'.json', '.ini', '.yaml', '.toml', '.yml', '.txt'}
-        has_subdirs = False
-        has_files = False
-
         try:
             with os.scandir(abs_path) as it:
-                for entry in it:
-                    if entry.is_dir() and not entry.name.startswith('.'):
-                        has_subdirs = True
-                    elif entry.is_file():
-                        has_files = True
-                        ext = os.path.splitext(entry.name)[1].lower()
-                        if ext in package_indicators:
-                            return True
-        except: pass
-        
-        # If no config found, fallback to structure check
-        if has_files and not has_subdirs:
-            return True
-            
-        return False
+                return is_package_listing(it)
+        except: return False
 
     def set_db(self, db):
         """Update database reference when app changes."""
@@ -97,10 +109,21 @@ class ScannerWorker(QObject):
                 self.finished.emit()
                 return
 
+            # Materialized effective_tags: recompute rows whose ancestry changed before reading
+            try: sn_db.refresh_effective_tags()
+            except Exception as e: logging.warning(f"ScannerWorker: effective tag refresh failed: {e}")
+            # Snapshot key is taken before anything is read, so later changes invalidate it
+            snapshots = None if sn_search_config else get_scan_snapshots(sn_db)
+            snap_key = snapshots.current_key(sn_path) if snapshots else None
             raw_configs = sn_db.get_all_folder_configs()
             # Normalize keys to forward slashes for consistent lookup
             folder_configs = {k.replace('\\', '/'): v for k, v in raw_configs.items()}
             
+            # Case-insensitive key index so per-card fallback lookups are O(1) instead of linear scans
+            self._config_ci_map = {}
+            for rel, cfg in folder_configs.items():
+                self._config_ci_map.setdefault(rel.lower(), cfg)
+
             # Phase 28 Optimization: Pre-group folder configs by parent for O(1) child scan
             self._parent_config_map = {}
             # Phase Hierarchical Filtering: Pre-calculate ancestor paths for favorites and links
@@ -142,7 +165,7 @@ class ScannerWorker(QObject):
             def sort_final(r):
                 config_type = r['config'].get('folder_type', 'auto')
                 if config_type == 'auto':
-                    is_package = self._is_package_auto(r['abs_path'])
+                    is_package = self._probe_item(r['abs_path'])[1]
                 else:
                     is_package = (config_type == 'package')
 
@@ -156,6 +179,8 @@ class ScannerWorker(QObject):
 
             # 5. Final Sort
             items_sorted = sorted(results, key=sort_final)
+            if snapshots:
+                snapshots.put(sn_path, sn_target_root, snap_key, items_sorted)
             
             t_worker_end = time.perf_counter()
             self.logger.debug(f"[WorkerProfile] app={sn_app_id} gen={sn_gen_id} context={sn_context} total={t_worker_end-t_run_start:.3f}s "
@@ -171,13 +196,70 @@ class ScannerWorker(QObject):
             self.logger.error(traceback.format_exc())
             self.error.emit(str(e), sn_gen_id)
         finally:
+            if hasattr(self, '_config_ci_map'): del self._config_ci_map
             if hasattr(self, '_parent_config_map'): del self._parent_config_map
             if hasattr(self, '_favorite_ancestors'): del self._favorite_ancestors
             if hasattr(self, '_linked_ancestors'): del self._linked_ancestors
             self.finished.emit()
 
+    def _probe_item(self, item_abs_path, thumb=_UNRESOLVED):
+        """
+        (thumbnail name, is_package_auto) for a storage folder; rescanned only when it changed.
+        thumb: thumbnail already resolved for the folder's current state (ThumbnailIndex).
+        """
+        version = self.watcher.version(item_abs_path) if self.watcher else None
+        cached = self._probe_cache.get(item_abs_path)
+        if cached and version is not None and cached[0] == version:
+            return cached[2], cached[3]
+        
+        # Unwatched or changed: entries added/removed/renamed update the directory mtime
+        try: mtime = os.stat(item_abs_path).st_mtime_ns
+        except OSError: mtime = None
+        if cached and mtime is not None and cached[1] == mtime:
+            self._probe_cache[item_abs_path] = (version, mtime, cached[2], cached[3])
+            return cached[2], cached[3]
+        
+        if thumb is _UNRESOLVED:
+            thumb = self.scanner.detect_thumbnail(item_abs_path)
+        is_pkg = self._is_package_auto(item_abs_path)
+        self._probe_cache[item_abs_path] = (version, mtime, thumb, is_pkg)
+        return thumb, is_pkg
+
+    def _get_link_status_cached(self, check_path, item_abs_path, deploy_rule, rules_dict):
+        """
+        get_link_status, reusing folder-level symlink results while the target directory
+        holding check_path is unchanged (replacing or removing a link changes its parent).
+        Walk-based rules always go to the deployer, which revalidates via lm_link_status_index.
+        """
+        if deploy_rule != 'folder' or rules_dict or not self.watcher:
+            return self.deployer.get_link_status(check_path, expected_source=item_abs_path, deploy_rule=deploy_rule, rules=rules_dict)
+        
+        key = (check_path, item_abs_path, deploy_rule)
+        version = self.watcher.version(os.path.dirname(check_path))
+        cached = self._status_cache.get(key)
+        if cached and version is not None and cached[0] == version:
+            return cached[1]
+        
+        res = self.deployer.get_link_status(check_path, expected_source=item_abs_path, deploy_rule=deploy_rule, rules=rules_dict)
+        if res.get('type') in ('symlink', 'none'):
+            self._status_cache[key] = (version, res)
+        return res
+
     def _standard_scan_sn(self, sn_path, sn_storage_root, sn_target_root, sn_app_data, folder_configs, sn_db, sn_target_key):
-        items = self.scanner.scan_directory(sn_path)
+        # Thumbnails come from the persistent index (one query per directory),
+        # re-detected only for folders whose mtime moved
+        items = self.scanner.scan_directory(sn_path, detect_thumbnails=False)
+        thumbs = ThumbnailIndex(sn_db, self.scanner, sn_storage_root).resolve(
+            sn_path, [item['name'] for item in items], complete=True)
+        live_paths = set()
+        for item in items:
+            item_abs_path = os.path.join(sn_path, item['name'])
+            live_paths.add(item_abs_path)
+            item['image_rel_path'], _ = self._probe_item(item_abs_path, thumbs.get(item['name']))
+        # Forget entries of folders no longer in this view
+        for stale in [p for p in self._probe_cache if os.path.dirname(p) == sn_path and p not in live_paths]:
+            del self._probe_cache[stale]
+        
         results = []
         for item in items:
             item_abs_path = os.path.join(sn_path, item['name'])
@@ -209,15 +291,19 @@ class ScannerWorker(QObject):
                         if item_rel == ".": item_rel = ""
                         
                         config = folder_configs.get(item_rel, {})
-                        can_inherit = config.get('inherit_tags', 1) != 0
-                        own_tags = {t.strip().lower() for t in (config.get('tags') or '').split(',') if t.strip()}
-                        
-                        potential_to_pass = set()
-                        if can_inherit: potential_to_pass.update(inherited)
-                        filtered_own = {t for t in own_tags if t not in non_inheritable}
-                        potential_to_pass.update(filtered_own)
+                        if config.get('effective_tags') is not None:
+                            all_tags_for_match = set(filter(None, config['effective_tags'].split(',')))
+                            potential_to_pass = all_tags_for_match - non_inheritable
+                        else:
+                            can_inherit = config.get('inherit_tags', 1) != 0
+                            own_tags = {t.strip().lower() for t in (config.get('tags') or '').split(',') if t.strip()}
+                            
+                            potential_to_pass = set()
+                            if can_inherit: potential_to_pass.update(inherited)
+                            filtered_own = {t for t in own_tags if t not in non_inheritable}
+                            potential_to_pass.update(filtered_own)
 
-                        all_tags_for_match = own_tags | inherited
+                            all_tags_for_match = own_tags | (inherited if can_inherit else set())
                         tag_match = True
                         if selected_tags:
                             if logic == 'and': tag_match = selected_tags.issubset(all_tags_for_match)
@@ -231,7 +317,7 @@ class ScannerWorker(QObject):
                         
                         if tag_match and text_match:
                             config_type = config.get('folder_type', 'auto')
-                            is_pkg = self._is_package_auto(item_abs_path) if config_type == 'auto' else (config_type == 'package')
+                            is_pkg = self._probe_item(item_abs_path)[1] if config_type == 'auto' else (config_type == 'package')
                             results.append({
                                 'item': {'name': entry.name},
                                 'abs_path': item_abs_path,
@@ -253,13 +339,10 @@ class ScannerWorker(QObject):
             if item_rel == ".": item_rel = ""
         except: pass
         
+        ci_map = getattr(self, '_config_ci_map', {})
         item_config = folder_configs.get(item_rel)
         if item_config is None:
-            target_lower = item_rel.lower()
-            for key in folder_configs:
-                if key.lower() == target_lower:
-                    item_config = folder_configs[key]
-                    break
+            item_config = ci_map.get(item_rel.lower())
         if item_config is None: item_config = {}
             
         if 'url_list' in item_config: item['url_list'] = item_config['url_list']
@@ -270,7 +353,7 @@ class ScannerWorker(QObject):
         item['folder_type'] = item_config.get('folder_type', 'auto')
         
         config_type = item_config.get('folder_type', 'auto')
-        is_actually_package = self._is_package_auto(item_abs_path) if config_type == 'auto' else (config_type == 'package')
+        is_actually_package = self._probe_item(item_abs_path)[1] if config_type == 'auto' else (config_type == 'package')
 
         # Phase 44: Resolve App Default Deployment Rule for the CURRENT target (A/B/C)
         target_rule_key = 'deployment_rule'
@@ -307,11 +390,7 @@ class ScannerWorker(QObject):
             while curr and curr not in ("", "."):
                 p_cfg = folder_configs.get(curr)
                 if not p_cfg:
-                    curr_lower = curr.lower()
-                    for k in folder_configs:
-                        if k.lower() == curr_lower:
-                            p_cfg = folder_configs[k]
-                            break
+                    p_cfg = ci_map.get(curr.lower())
                 inherited_base = resolve_target_from_config(p_cfg)
                 if inherited_base:
                     effective_target_base = inherited_base
@@ -333,7 +412,7 @@ class ScannerWorker(QObject):
         check_path = effective_target_base if deploy_rule == 'files' else os.path.join(effective_target_base, item['name'])
         
         self.logger.debug(f"[ScanTrace] {item['name']} - Rule:{deploy_rule} Target:{effective_target_base} Key:{sn_target_key}")
-        status_res = self.deployer.get_link_status(check_path, expected_source=item_abs_path, deploy_rule=deploy_rule, rules=rules_dict)
+        status_res = self._get_link_status_cached(check_path, item_abs_path, deploy_rule, rules_dict)
         
         # 2. If 'none', and we are in a subfolder, try the mirrored hierarchical path
         if status_res.get('status') == 'none' and item_rel and '/' in item_rel:
@@ -413,6 +492,10 @@ class ScannerWorker(QObject):
                     rel = os.path.relpath(current, storage_root).replace('\\', '/')
                     if rel == ".": rel = ""
                 config = folder_configs.get(rel, {})
+                if rel and config.get('effective_tags') is not None:
+                    # Materialized closure already covers this folder and its ancestors
+                    tags.update(t for t in config['effective_tags'].split(',') if t and t not in non_inheritable)
+                    break
                 t_str = config.get('tags', '')
                 if t_str:
                     for t in t_str.split(','):
@@ -1,7 +1,10 @@
 from PyQt6.QtCore import QThread, pyqtSignal
 import os
 import datetime
-from src.core.link_master.utils import get_package_size_fast
+from src.core.link_master.size_scanner import SizeScanner
+
+# Size results committed per transaction
+_DB_BATCH = 200
 
 class SizeScannerWorker(QThread):
     """バックグラウンドでパッケージ容量を計算するワーカースレッド"""
@@ -9,37 +12,53 @@ class SizeScannerWorker(QThread):
     finished_item = pyqtSignal(str, int) # rel_path, size
     all_finished = pyqtSignal()
 
-    def __init__(self, db, storage_root, paths_to_scan=None):
+    def __init__(self, db, storage_root, paths_to_scan=None, use_cache=True):
         super().__init__()
         self.db = db
         self.storage_root = storage_root
         self.paths_to_scan = paths_to_scan # List of rel_paths, if None, scans all
+        self.use_cache = use_cache # False: ignore the per-directory (mtime, size) cache
         self._is_running = True
 
     def stop(self):
         self._is_running = False
 
     def run(self):
+        try:
+            self._run()
+        finally:
+            # QThreads are invisible to the pool's dead-thread pruning
+            self.db.release_connection()
+
+    def _run(self):
         if self.paths_to_scan is None:
             # Get all configurations to find packages
             configs = self.db.get_all_folder_configs()
             self.paths_to_scan = list(configs.keys())
 
         total = len(self.paths_to_scan)
-        for i, rel_path in enumerate(self.paths_to_scan):
-            if not self._is_running:
-                break
-            
-            abs_path = os.path.join(self.storage_root, rel_path)
-            if os.path.isdir(abs_path):
-                size = get_package_size_fast(abs_path)
-                now = datetime.datetime.now().isoformat()
-                
-                # Update DB immediately
-                self.db.update_folder_display_config(rel_path, size_bytes=size, scanned_at=now)
-                
-                self.finished_item.emit(rel_path, size)
-            
-            self.progress.emit(i + 1, total)
+        dirs = [p for p in self.paths_to_scan if os.path.isdir(os.path.join(self.storage_root, p))]
+        done = total - len(dirs)
+        pending = []
+
+        def flush():
+            # One transaction per batch instead of one per package
+            self.db.bulk_update_items(pending)
+            pending.clear()
+
+        def on_result(rel_path, size):
+            nonlocal done
+            pending.append({'rel_path': rel_path, 'size_bytes': size,
+                            'scanned_at': datetime.datetime.now().isoformat()})
+            if len(pending) >= _DB_BATCH:
+                flush()
+            done += 1
+            self.finished_item.emit(rel_path, size)
+            self.progress.emit(done, total)
+
+        scanner = SizeScanner(self.db, self.storage_root, use_cache=self.use_cache)
+        scanner.scan(dirs, on_result=on_result, should_stop=lambda: not self._is_running)
+        flush()
 
+        self.progress.emit(total if self._is_running else done, total)
         self.all_finished.emit()
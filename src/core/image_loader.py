@@ -2,12 +2,69 @@
 ファイルI/Oは、必ず src.core.file_handler を介すること。
 """
 
-from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, Qt, QSize
-from PyQt6.QtGui import QPixmap, QImage
-from collections import OrderedDict
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, Qt, QSize, QBuffer, QByteArray, QIODevice, QTimer
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QImageIOHandler
 import os
 import time
 import logging
+import threading
+from src.core.thumbnail_cache import ThumbnailDiskCache, thumbnail_key
+from src.core.pixmap_cache import PixmapMemoryCache, tier_for
+from src.core.image_queue import ImageRequestQueue
+from src.utils.path_utils import get_user_data_path
+
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_thumbnail_disk_cache():
+    """Shared persistent thumbnail store (resource/app/_thumbnails), or None if it cannot be opened."""
+    global _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            try:
+                _disk_cache = ThumbnailDiskCache(
+                    get_user_data_path(os.path.join("resource", "app", "_thumbnails", "thumbnails.db")))
+            except Exception as e:
+                logging.getLogger("ImageLoader").warning(f"Thumbnail disk cache unavailable: {e}")
+                _disk_cache = False
+        return _disk_cache or None
+
+
+def _encode_thumbnail(image: QImage) -> bytes:
+    # PNG keeps transparency; opaque thumbnails are much smaller as JPEG
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    if image.hasAlphaChannel():
+        image.save(buffer, "PNG")
+    else:
+        image.save(buffer, "JPG", 90)
+    buffer.close()
+    return bytes(data)
+
+
+def decode_scaled(path: str, size: QSize) -> QImage:
+    """
+    Decodes path fitted into size (KeepAspectRatio), with EXIF orientation applied.
+
+    Formats whose plugin supports ScaledSize (JPEG: DCT-domain scaling) are
+    decoded directly at the target resolution; others are decoded in full and
+    smooth-scaled. Returns a null QImage on failure.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    source = reader.size()
+    if source.isValid() and reader.supportsOption(QImageIOHandler.ImageOption.ScaledSize):
+        # ScaledSize applies before the orientation transform: fit in the pre-rotation frame
+        rotated = bool(reader.transformation() & QImageIOHandler.Transformation.TransformationRotate90)
+        bounds = size.transposed() if rotated else size
+        reader.setScaledSize(source.scaled(bounds, Qt.AspectRatioMode.KeepAspectRatio))
+        return reader.read()
+    image = reader.read()
+    if image.isNull():
+        return image
+    return image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
 
 class ImageLoadWorker(QRunnable):
     class Signals(QObject):
@@ -28,12 +85,22 @@ class ImageLoadWorker(QRunnable):
         if self._cancelled:
             return
         try:
-            image = QImage(self.path)
+            disk_cache = get_thumbnail_disk_cache()
+            key = thumbnail_key(self.path, self.size.width(), self.size.height()) if disk_cache else None
+            if key:
+                data = disk_cache.get(key)
+                if data:
+                    cached = QImage.fromData(data)
+                    if not cached.isNull():
+                        if not self._cancelled:
+                            self.signals.finished.emit(QPixmap.fromImage(cached), self.path)
+                        return
+            scaled = decode_scaled(self.path, self.size)
             if self._cancelled:
                 return
-            if not image.isNull():
-                # Scale smoothly
-                scaled = image.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            if not scaled.isNull():
+                if key:
+                    disk_cache.put(key, _encode_thumbnail(scaled))
                 pixmap = QPixmap.fromImage(scaled)
                 if not self._cancelled:
                     self.signals.finished.emit(pixmap, self.path)
@@ -45,9 +112,8 @@ class ImageLoadWorker(QRunnable):
                 self.signals.finished.emit(QPixmap(), self.path)
 
 class ImageLoader(QObject):
-    # Class-level memory cache (LRU-style using OrderedDict)
-    _cache = OrderedDict()
-    _cache_max_size = 300  # Keep up to 300 images in memory
+    # Class-level memory cache: LRU per tier ('card' / 'preview'), bounded by pixmap bytes
+    _cache = PixmapMemoryCache()
     
     # Phase 33: Batch counter for staggering cache hit callbacks
     _batch_delay_counter = 0
@@ -57,9 +123,39 @@ class ImageLoader(QObject):
         super().__init__()
         self.thread_pool = QThreadPool()
         self.thread_pool.setMaxThreadCount(8)  # Increased from 4 to 8 for faster loading
-        self._pending_workers = {}  # {path: worker} for cancellation
+        # Requests wait in a priority queue; only max_in_flight run on the pool at once
+        self.max_in_flight = self.thread_pool.maxThreadCount()
+        self._queue = ImageRequestQueue()
+        self._in_flight = {}  # (path, w, h) -> (worker, [(owner, (callback, validator))])
+        self._priority_provider = None  # owner -> priority (lower loads first)
+        self._reprioritize_timer = QTimer(self)
+        self._reprioritize_timer.setSingleShot(True)
+        self._reprioritize_timer.setInterval(30)
+        self._reprioritize_timer.timeout.connect(self.reprioritize)
 
-    def load_image(self, path: str, target_size: QSize, callback, request_validator=None):
+    def set_priority_provider(self, provider):
+        """provider(owner) -> number; lower values load first (e.g. distance from the viewport)."""
+        self._priority_provider = provider
+
+    def _priority_of(self, owner):
+        if owner is None or self._priority_provider is None:
+            return 0
+        try:
+            return self._priority_provider(owner)
+        except Exception:
+            return 0
+
+    def schedule_reprioritize(self):
+        """Re-ranks pending requests shortly (coalesces bursts of scroll events)."""
+        if not self._reprioritize_timer.isActive():
+            self._reprioritize_timer.start()
+
+    def reprioritize(self):
+        """Recomputes the priority of every pending request from its owner."""
+        if self._priority_provider is not None and len(self._queue):
+            self._queue.reprioritize(self._priority_of)
+
+    def load_image(self, path: str, target_size: QSize, callback, request_validator=None, owner=None):
         """
         Asynchronously loads an image and calls callback(QPixmap) when done.
         
@@ -69,20 +165,21 @@ class ImageLoader(QObject):
             callback: Function to call with the loaded QPixmap
             request_validator: Optional function that returns True if the request is still valid.
                               Used to prevent image mismatch when cards are reused from pool.
+            owner: Optional requester (e.g. ItemCard) used for prioritization and drop_owners().
+                   A new request replaces the owner's previous pending one.
         """
         if not path or not os.path.exists(path):
             return
 
+        tier = tier_for(target_size.width(), target_size.height())
+        cached_pixmap = ImageLoader._cache.get(path, tier)
+
         # Cache hit - use cached image, but defer callback to allow UI updates
-        if path in ImageLoader._cache:
-            # Move to end (most recently used)
-            ImageLoader._cache.move_to_end(path)
+        if cached_pixmap is not None:
             logging.getLogger("ImageLoader").info(f"[CacheHit] {os.path.basename(path)}")
             
             # Phase 33: Stagger callbacks across multiple event loop cycles
             # Every BATCH_SIZE images, add 1ms delay to allow UI breathing room
-            from PyQt6.QtCore import QTimer
-            cached_pixmap = ImageLoader._cache[path]
             basename = os.path.basename(path)
             
             # Calculate delay: 0ms for first batch, 1ms for second, etc.
@@ -104,43 +201,93 @@ class ImageLoader(QObject):
             return
 
         logging.getLogger("ImageLoader").debug(f"[CacheMiss] Loading: {os.path.basename(path)}")
-        # Cache miss - load asynchronously
-        worker = ImageLoadWorker(path, target_size)
+        # Cache miss - queue (or join) an asynchronous load
+        key = (path, target_size.width(), target_size.height())
+        waiter = (owner, (callback, request_validator))
+        if key in self._in_flight:
+            if owner is not None:
+                self.drop_owners((owner,))
+            self._in_flight[key][1].append(waiter)
+            return
+        self._queue.add(key, owner, waiter[1], self._priority_of(owner))
+        if owner is not None and self._priority_provider is not None:
+            # Cards are often requested before layout places them: re-rank once it has
+            self.schedule_reprioritize()
+        self._start_next()
+
+    def _start_next(self):
+        while len(self._in_flight) < self.max_in_flight:
+            item = self._queue.pop()
+            if item is None:
+                return
+            key, waiters = item
+            path, w, h = key
+            worker = ImageLoadWorker(path, QSize(w, h))
+            worker.signals.finished.connect(lambda pixmap, _path, key=key, worker=worker: self._on_loaded(key, worker, pixmap))
+            self._in_flight[key] = (worker, list(waiters))
+            self.thread_pool.start(worker)
+
+    def _on_loaded(self, key, worker, pixmap):
+        running = self._in_flight.get(key)
+        if running is None or running[0] is not worker:
+            return  # Cancelled by cancel_pending
+        del self._in_flight[key]
+        path, w, h = key
+        basename = os.path.basename(path)
         
-        def on_finished(pixmap, loaded_path):
+        # Add to cache
+        if not pixmap.isNull():
+            tier = tier_for(w, h)
+            # Requests above the tier limit (e.g. full-size previews) are stored and shown downscaled
+            max_dim = PixmapMemoryCache.max_dim_for(tier)
+            if max(pixmap.width(), pixmap.height()) > max_dim:
+                pixmap = pixmap.scaled(QSize(max_dim, max_dim), Qt.AspectRatioMode.KeepAspectRatio,
+                                       Qt.TransformationMode.SmoothTransformation)
+            ImageLoader._cache.put(path, pixmap, tier)
+        
+        for _owner, (callback, request_validator) in running[1]:
             t_cb_start = time.perf_counter()
-            # Remove from pending
-            self._pending_workers.pop(loaded_path, None)
-            
             # Validate request is still valid (card hasn't been reused for different item)
             if request_validator and not request_validator():
-                logging.getLogger("ImageLoader").debug(f"[Stale] Ignoring: {os.path.basename(loaded_path)}")
-                return  # Request is stale, don't set image
-            
-            # Add to cache
-            if not pixmap.isNull():
-                # Evict oldest if cache is full
-                while len(ImageLoader._cache) >= ImageLoader._cache_max_size:
-                    ImageLoader._cache.popitem(last=False)
-                ImageLoader._cache[loaded_path] = pixmap
-            
+                logging.getLogger("ImageLoader").debug(f"[Stale] Ignoring: {basename}")
+                continue  # Request is stale, don't set image
             callback(pixmap)
             t_cb_end = time.perf_counter()
             if (t_cb_end - t_cb_start) > 0.01:  # Log if callback takes > 10ms
-                logging.getLogger("ImageLoader").warning(f"[SlowCallback] {os.path.basename(loaded_path)}: {(t_cb_end-t_cb_start)*1000:.1f}ms")
-        
-        worker.signals.finished.connect(on_finished)
-        self._pending_workers[path] = worker
-        self.thread_pool.start(worker)
+                logging.getLogger("ImageLoader").warning(f"[SlowCallback] {basename}: {(t_cb_end-t_cb_start)*1000:.1f}ms")
+        self._start_next()
+
+    def drop_owners(self, owners):
+        """Forgets the requests of owners (e.g. cards released to the pool). Running loads still fill the cache."""
+        owners = set(owners)
+        if not owners:
+            return
+        self._queue.drop_owners(owners)
+        for key, (worker, waiters) in self._in_flight.items():
+            waiters[:] = [w for w in waiters if w[0] not in owners]
 
     def cancel_pending(self):
         """Cancel all pending image load requests (call when navigating to new folder)."""
-        for path, worker in list(self._pending_workers.items()):
+        self._queue.clear()
+        for worker, _ in self._in_flight.values():
             worker.cancel()
-        self._pending_workers.clear()
+        self._in_flight.clear()
+
+    @classmethod
+    def set_memory_budget(cls, tier: str, budget_bytes: int):
+        """Sets the byte budget of a memory cache tier ('card' or 'preview')."""
+        cls._cache.set_budget(tier, budget_bytes)
+
+    @classmethod
+    def cache_stats(cls) -> dict:
+        """Per-tier memory cache counters (entries, bytes, budget, hits, misses, evictions)."""
+        return cls._cache.stats()
 
     @classmethod
     def clear_cache(cls):
-        """Clear the image cache (e.g., when app switches)."""
+        """Clear the image cache (e.g., when app switches). The disk cache is kept."""
         cls._cache.clear()
+        disk_cache = get_thumbnail_disk_cache()
+        if disk_cache:
+            disk_cache.flush()
 
@@ -0,0 +1,93 @@
+"""
+Priority queue of pending image loads (backend of ImageLoader scheduling).
+
+ImageLoader used to hand every request straight to its QThreadPool, which runs
+them first-in first-out: after a fast scroll through a large view, off-screen
+cards were decoded before the visible ones. Requests now wait here and
+ImageLoader starts only as many as it has threads, always the lowest priority
+value first (ItemCards use their pixel distance from the viewport, 0 = visible).
+
+- Identical requests (same path and size) share one entry; each requester
+  ("waiter") is called back when the shared load finishes.
+- An owner (typically an ItemCard) has at most one pending request: a new
+  request from it replaces the old one, and drop_owners() removes all of its
+  waiters when the card is released.
+- reprioritize() recomputes every entry from its owners (e.g. after a scroll).
+
+Not thread-safe: used from the UI thread only.
+"""
+import heapq
+import itertools
+
+
+class ImageRequestQueue:
+    def __init__(self):
+        self._entries = {}      # key -> {'waiters': [(owner, payload)], 'priority': float, 'token': int}
+        self._heap = []         # (priority, token, key); stale tokens are skipped on pop
+        self._by_owner = {}     # owner -> key
+        self._tokens = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def add(self, key, owner, payload, priority: float):
+        """Queues payload for key; returns True if the key was not pending yet."""
+        if owner is not None:
+            self.drop_owners((owner,))
+            self._by_owner[owner] = key
+        entry = self._entries.get(key)
+        is_new = entry is None
+        if is_new:
+            entry = self._entries[key] = {'waiters': [], 'priority': priority, 'token': None}
+        entry['waiters'].append((owner, payload))
+        if is_new or priority < entry['priority']:
+            self._push(key, entry, priority)
+        return is_new
+
+    def _push(self, key, entry, priority):
+        entry['priority'] = priority
+        entry['token'] = next(self._tokens)
+        heapq.heappush(self._heap, (priority, entry['token'], key))
+
+    def pop(self):
+        """(key, [(owner, payload)]) with the lowest priority value, or None if empty."""
+        while self._heap:
+            _, token, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry['token'] != token:
+                continue
+            del self._entries[key]
+            for owner, _ in entry['waiters']:
+                if owner is not None and self._by_owner.get(owner) == key:
+                    del self._by_owner[owner]
+            return key, entry['waiters']
+        return None
+
+    def drop_owners(self, owners):
+        """Removes the pending waiters of owners; entries left without waiters are dropped."""
+        owners = set(owners)
+        for owner in owners:
+            key = self._by_owner.pop(owner, None)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                continue
+            entry['waiters'] = [w for w in entry['waiters'] if w[0] not in owners]
+            if not entry['waiters']:
+                del self._entries[key]
+
+    def reprioritize(self, priority_of):
+        """Recomputes each entry as the best priority_of(owner) among its waiters, then rebuilds the heap."""
+        self._heap = []
+        for key, entry in self._entries.items():
+            entry['priority'] = min(priority_of(owner) for owner, _ in entry['waiters'])
+            entry['token'] = next(self._tokens)
+            self._heap.append((entry['priority'], entry['token'], key))
+        heapq.heapify(self._heap)
+
+    def clear(self):
+        self._entries.clear()
+        self._heap = []
+        self._by_owner.clear()
@@ -0,0 +1,146 @@
+"""
+Link Master: Batch Deploy Scheduler
+Plans a multi-package deploy/unlink as a whole and runs it on a worker pool.
+
+A batch is split into:
+  1. waves by dependency depth: a package runs only after every library it
+     needs (inside the batch) has finished;
+  2. lanes inside each wave: packages whose target paths are equal or nested
+     (e.g. every 'files' package shares the target root) are serialized in one
+     lane, in input order, so they never race on the same files;
+  3. lanes of a wave run concurrently, each on its own forked Deployer.
+
+Tasks must not touch Qt: the caller does dialogs and DB status writes on the
+UI thread from the returned results.
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger("LinkMasterBatchScheduler")
+
+# Packages deployed at once. Each deploy may fan out to its own file-level pool
+# (Deployer._run_plan_chunks), so the outer pool stays small.
+BATCH_MAX_WORKERS = min(8, os.cpu_count() or 4)
+
+
+def _target_key(path: str) -> str:
+    norm = os.path.normcase(os.path.abspath(path)) if path else ""
+    return norm.rstrip('\\/')
+
+
+class BatchTask:
+    """One package of a batch: rel_path, target path, the per-package work and its deps."""
+
+    def __init__(self, rel_path: str, target_path: str, run, deps=()):
+        self.rel_path = rel_path
+        self.target_path = target_path
+        self.run = run             # callable(deployer) -> result dict (worker thread)
+        self.deps = set(deps)      # rel_paths that must finish first (ignored if not in the batch)
+
+
+class BatchDeployScheduler:
+    def __init__(self, deployer, max_workers: int = None):
+        self.deployer = deployer
+        self.max_workers = max_workers or BATCH_MAX_WORKERS
+        self._local = threading.local()
+
+    # --- Planning ---
+    def plan(self, tasks: list) -> list:
+        """[[lane, ...] per wave], lane = [BatchTask] in input order."""
+        by_rel = {t.rel_path: t for t in tasks}
+        levels = {}
+
+        def level(rel, visiting=()):
+            if rel in levels:
+                return levels[rel]
+            deps = [d for d in by_rel[rel].deps if d in by_rel and d != rel and d not in visiting]
+            lvl = 1 + max((level(d, visiting + (rel,)) for d in deps), default=-1)
+            levels[rel] = lvl
+            return lvl
+
+        waves = {}
+        for task in tasks:
+            waves.setdefault(level(task.rel_path), []).append(task)
+        return [self._lanes(waves[lvl]) for lvl in sorted(waves)]
+
+    @staticmethod
+    def _lanes(tasks: list) -> list:
+        """Groups tasks whose targets are equal or nested (union-find over target ancestors)."""
+        parent = list(range(len(tasks)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        owner = {}  # target key -> first task index
+        keys = [_target_key(t.target_path) for t in tasks]
+        for i, key in enumerate(keys):
+            if key in owner:
+                parent[find(i)] = find(owner[key])
+            else:
+                owner[key] = i
+        for i, key in enumerate(keys):
+            # An ancestor target claimed by another task collides with this one
+            cur = os.path.dirname(key)
+            while cur and cur != key:
+                j = owner.get(cur)
+                if j is not None:
+                    parent[find(i)] = find(j)
+                nxt = os.path.dirname(cur)
+                if nxt == cur: break
+                cur = nxt
+
+        lanes = {}
+        for i, task in enumerate(tasks):
+            lanes.setdefault(find(i), []).append(task)
+        return list(lanes.values())
+
+    # --- Execution ---
+    def _worker_deployer(self):
+        d = getattr(self._local, 'deployer', None)
+        if d is None:
+            d = self.deployer.fork()
+            self._local.deployer = d
+            self._all_deployers.append(d)
+        return d
+
+    def _run_lane(self, lane: list) -> dict:
+        deployer = self._worker_deployer()
+        results = {}
+        for task in lane:
+            try:
+                results[task.rel_path] = task.run(deployer)
+            except Exception as e:
+                logger.error(f"[Batch] {task.rel_path} failed: {e}")
+                results[task.rel_path] = {'status': 'error', 'error': str(e)}
+        return results
+
+    def run(self, waves: list, poll=None, poll_interval: float = 0.05) -> dict:
+        """
+        Runs the planned waves. poll() is called on the caller thread while
+        waiting (e.g. to keep the UI responsive). Returns {rel_path: result}.
+        Worker action logs are merged into self.deployer.last_actions.
+        """
+        t0 = time.perf_counter()
+        results = {}
+        self._all_deployers = []
+        count = sum(len(lane) for wave in waves for lane in wave)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for wave in waves:
+                pending = {executor.submit(self._run_lane, lane) for lane in wave}
+                while pending:
+                    done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results.update(future.result())
+                    if poll:
+                        poll()
+        for d in self._all_deployers:
+            self.deployer.last_actions.extend(d.last_actions)
+        logger.debug(f"[Batch] {count} package(s) in {len(waves)} wave(s), "
+                     f"{max((len(w) for w in waves), default=0)} max lane(s): {time.perf_counter() - t0:.3f}s")
+        return results
@@ -0,0 +1,198 @@
+"""
+Link Master: Tag Conflict Index
+In-memory conflict_tag -> package map mirrored from lm_conflict_tags.
+
+Replaces the linear scans over every folder config in _check_tag_conflict and
+TagConflictWorker. Per tag the index keeps the linked packages overall, per
+category and with 'global' scope, so both conflict questions are answered with
+a few dict lookups per tag:
+
+- find_conflict(): the deploy-time check (_check_tag_conflict semantics). Any
+  other linked package sharing a tag, restricted to the same category when the
+  checked item's scope is 'category'.
+- is_conflicted(): the persistent has_logical_conflict tag rule
+  (TagConflictWorker semantics). Only packages whose own scope is not
+  'disabled' take part, and a 'global' scope on either side wins.
+
+sync() applies the rows that changed since the last call (lm_conflict_log,
+written by triggers on every write path including deploy/undeploy status
+updates) and returns only the packages whose is_conflicted() result flipped.
+Not thread-safe: build a separate instance per thread.
+"""
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger("LinkMasterConflictIndex")
+
+
+def _category_of(rel_path: str) -> str:
+    return rel_path.rpartition('/')[0]
+
+
+def conflict_rows_from_configs(configs: dict) -> list:
+    """lm_conflict_tags-shaped rows built from {rel_path: config} (fallback without JSON1)."""
+    rows = []
+    for rel_path, cfg in configs.items():
+        tag_str = cfg.get('conflict_tag')
+        if not rel_path or not tag_str:
+            continue
+        norm = rel_path.replace('\\', '/')
+        scope = cfg.get('conflict_scope') or 'disabled'
+        linked = 1 if cfg.get('last_known_status') == 'linked' else 0
+        for tag in {t.strip().lower() for t in tag_str.split(',') if t.strip()}:
+            rows.append((tag, norm, scope, linked))
+    return rows
+
+
+class TagConflictIndex:
+    def __init__(self, db, track_changes: bool = True, keep=None, rows=None):
+        self.db = db
+        self.track_changes = track_changes
+        self._seq = 0
+        self._flipped = set()                     # sync() deltas not yet taken by the UI
+        self._items = {}                          # rel_path -> (tags, category, scope, linked)
+        self._by_tag = defaultdict(set)           # tag -> rel_paths (any status)
+        self._linked = defaultdict(set)           # tag -> linked rel_paths
+        self._linked_cat = defaultdict(set)       # (tag, category) -> linked rel_paths
+        self._active = defaultdict(set)           # tag -> linked rel_paths with scope != 'disabled'
+        self._active_cat = defaultdict(set)       # (tag, category) -> same, per category
+        self._active_global = defaultdict(set)    # tag -> linked rel_paths with scope 'global'
+        self.reload(keep, rows)
+
+    # --- Loading ---
+    def reload(self, keep=None, rows=None):
+        """
+        Rebuilds the index from lm_conflict_tags (or the given rows). keep(rel_path)
+        -> bool can drop entries (e.g. folders missing on disk).
+        """
+        for store in (self._by_tag, self._linked, self._linked_cat,
+                      self._active, self._active_cat, self._active_global):
+            store.clear()
+        self._items = {}
+        if self.track_changes:
+            self._seq = self.db.get_conflict_log_seq()
+        self._load_rows(self.db.get_conflict_tag_rows() if rows is None else rows, keep)
+
+    def _load_rows(self, rows, keep=None):
+        grouped = {}
+        for tag, rel_path, scope, linked in rows:
+            entry = grouped.setdefault(rel_path, [set(), scope or 'disabled', bool(linked)])
+            entry[0].add(tag)
+        for rel_path, (tags, scope, linked) in grouped.items():
+            if keep is not None and not keep(rel_path):
+                continue
+            self._add(rel_path, frozenset(tags), scope, linked)
+
+    def _add(self, rel_path, tags, scope, linked):
+        cat = _category_of(rel_path)
+        self._items[rel_path] = (tags, cat, scope, linked)
+        for tag in tags:
+            self._by_tag[tag].add(rel_path)
+            if not linked:
+                continue
+            self._linked[tag].add(rel_path)
+            self._linked_cat[(tag, cat)].add(rel_path)
+            if scope != 'disabled':
+                self._active[tag].add(rel_path)
+                self._active_cat[(tag, cat)].add(rel_path)
+                if scope == 'global':
+                    self._active_global[tag].add(rel_path)
+
+    def _remove(self, rel_path):
+        item = self._items.pop(rel_path, None)
+        if not item:
+            return
+        tags, cat, _, _ = item
+        for tag in tags:
+            for store, key in ((self._by_tag, tag), (self._linked, tag), (self._linked_cat, (tag, cat)),
+                               (self._active, tag), (self._active_cat, (tag, cat)), (self._active_global, tag)):
+                members = store.get(key)
+                if members is not None:
+                    members.discard(rel_path)
+                    if not members:
+                        del store[key]
+
+    # --- Queries ---
+    def tags_of(self, rel_path) -> frozenset:
+        item = self._items.get(rel_path)
+        return item[0] if item else frozenset()
+
+    def find_conflict(self, rel_path, tags, scope):
+        """
+        First other linked package sharing one of tags (same category if scope is
+        'category'), as the dict _check_tag_conflict returns; None if there is none.
+        """
+        if scope == 'disabled':
+            return None
+        cat = _category_of(rel_path)
+        for tag in tags:
+            others = self._linked_cat.get((tag, cat)) if scope == 'category' else self._linked.get(tag)
+            for other in others or ():
+                if other == rel_path:
+                    continue
+                return {
+                    'conflict': True,
+                    'name': other.rsplit('/', 1)[-1],
+                    'path': other,
+                    'tag': tag,
+                    'scope': scope
+                }
+        return None
+
+    def is_conflicted(self, rel_path) -> bool:
+        """Tag part of has_logical_conflict for rel_path."""
+        item = self._items.get(rel_path)
+        if not item:
+            return False
+        tags, cat, scope, _ = item
+        if scope == 'disabled':
+            return False
+
+        def has_other(members):
+            return bool(members) and (len(members) > 1 or rel_path not in members)
+
+        for tag in tags:
+            if scope == 'global':
+                if has_other(self._active.get(tag)):
+                    return True
+            elif has_other(self._active_global.get(tag)) or has_other(self._active_cat.get((tag, cat))):
+                return True
+        return False
+
+    # --- Incremental maintenance ---
+    def sync(self) -> set:
+        """
+        Applies the changes logged since the last sync and returns the rel_paths
+        whose is_conflicted() result changed (the delta for the UI).
+        """
+        if not self.track_changes:
+            return set()
+        changed_paths, seq = self.db.get_conflict_changes(self._seq)
+        if not changed_paths:
+            return set()
+
+        # Packages sharing a tag with a changed package (before or after) may flip
+        affected = set(changed_paths)
+        for rel_path in changed_paths:
+            for tag in self.tags_of(rel_path):
+                affected |= self._by_tag.get(tag, set())
+        before = {p: self.is_conflicted(p) for p in affected}
+
+        for rel_path in changed_paths:
+            self._remove(rel_path)
+        self._load_rows(self.db.get_conflict_tag_rows(changed_paths))
+        for rel_path in changed_paths:
+            for tag in self.tags_of(rel_path):
+                affected |= self._by_tag.get(tag, set())
+
+        self._seq = seq
+        self.db.prune_conflict_log(seq)
+        delta = {p for p in affected if self.is_conflicted(p) != before.get(p, False)}
+        self._flipped ^= delta
+        logger.debug(f"[ConflictIndex] Applied {len(changed_paths)} changes, {len(delta)} flag(s) flipped")
+        return delta
+
+    def take_flipped(self) -> set:
+        """rel_paths whose is_conflicted() flipped since the last call (across syncs)."""
+        flipped, self._flipped = self._flipped, set()
+        return flipped
@@ -3,6 +3,10 @@ import logging
 import os
 import json
 from src.core import core_handler
+from src.core.link_master.db_pool import get_connection_pool, close_connection_pool
+from src.core.link_master.migrations import (run_migrations, REGISTRY_MIGRATIONS, APP_MIGRATIONS,
+                                             LANE_REGISTRY, LANE_APP, SEARCH_FTS_COLUMNS, search_fts_values_sql,
+                                             link_item_tags_sql, LIB_GRAPH_COLUMNS)
 
 class LinkMasterRegistry:
     """Manages the list of applications in the global plugins.db."""
@@ -10,108 +14,17 @@ class LinkMasterRegistry:
         self.logger = logging.getLogger("LinkMasterRegistry")
         self.db_path = core_handler.db_path
         self._apps_cache = None
+        self._pool = get_connection_pool(self.db_path)
         self._create_tables()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        """Returns this thread's pooled connection (do not close it)."""
+        return self._pool.get()
 
     def _create_tables(self):
-        schema = [
-            '''CREATE TABLE IF NOT EXISTS lm_apps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                storage_root TEXT NOT NULL,
-                target_root TEXT NOT NULL,
-                target_root_2 TEXT,
-                default_subpath TEXT,
-                managed_folder_name TEXT DEFAULT '_LinkMaster_Assets',
-                conflict_policy TEXT DEFAULT 'backup',
-                deployment_type TEXT DEFAULT 'folder',
-                cover_image TEXT,
-                last_target TEXT DEFAULT 'target_root',
-                default_category_style TEXT DEFAULT 'image_text',
-                default_package_style TEXT DEFAULT 'image_text',
-                default_skip_levels INTEGER DEFAULT 0
-
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )''',
-            # Phase 42: Deployed files tracking (User Request) - Safe to have in global DB for fallback
-            '''CREATE TABLE IF NOT EXISTS lm_deployed_files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                target_path TEXT NOT NULL,
-                source_path TEXT NOT NULL,
-                package_rel_path TEXT NOT NULL,
-                deploy_type TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(target_path)
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_backup_registry (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                original_path TEXT NOT NULL,
-                backup_path TEXT NOT NULL,
-                folder_rel_path TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(original_path)
-            )'''
-        ]
-        with self.get_connection() as conn:
-            for sql in schema:
-                conn.execute(sql)
-            # Migration check
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN last_target TEXT DEFAULT 'target_root'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN default_category_style TEXT DEFAULT 'image_text'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN default_package_style TEXT DEFAULT 'image_text'")
-            except: pass
-            
-            # Phase 67: Migrate old hardcoded 'image' default to 'image_text'
-            try:
-                conn.execute("UPDATE lm_apps SET default_category_style = 'image_text' WHERE default_category_style = 'image'")
-                conn.execute("UPDATE lm_apps SET default_package_style = 'image_text' WHERE default_package_style = 'image'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN executables TEXT DEFAULT '[]'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN url_list TEXT DEFAULT '[]'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN password_list TEXT DEFAULT '[]'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN deployment_rule TEXT DEFAULT 'folder'")
-            except: pass
-
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN transfer_mode TEXT DEFAULT 'symlink'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN is_favorite INTEGER DEFAULT 0")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN score INTEGER DEFAULT 0")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN target_root_3 TEXT")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN deployment_rule_b TEXT DEFAULT 'folder'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN deployment_rule_c TEXT DEFAULT 'folder'")
-            except: pass
-            try:
-                conn.execute("ALTER TABLE lm_apps ADD COLUMN default_skip_levels INTEGER DEFAULT 0")
-            except: pass
-
-            conn.commit()
+        """Brings the registry schema up to date (no-op when already current)."""
+        with self.get_connection() as conn:
+            run_migrations(conn, REGISTRY_MIGRATIONS, LANE_REGISTRY, db_label=self.db_path)
 
     def get_setting(self, key: str, default: str = None) -> str:
         with self.get_connection() as conn:
@@ -151,8 +64,8 @@ class LinkMasterRegistry:
         if self._apps_cache is not None:
             return self._apps_cache
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM lm_apps")
             self._apps_cache = [dict(row) for row in cursor.fetchall()]
             return self._apps_cache
@@ -232,308 +145,35 @@ class LinkMasterDB:
             self.logger.debug("LinkMasterDB created without app_name - using global DB fallback.")
             # We no longer skip table creation here to ensure lm_deployed_files exists if called.
             
+        self._pool = get_connection_pool(self.db_path)
+        self._folder_config_columns = None
+        self._search_tokenizer = None  # '' if lm_search_fts is unavailable
+        self._tag_index = None         # False if lm_item_tags is not maintained (no JSON1)
+        self._conflict_index = None    # False if lm_conflict_tags is not maintained (no JSON1)
         self._create_tables()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        """Returns this thread's pooled connection (do not close it)."""
+        return self._pool.get()
 
-    def _create_tables(self):
-        schema = [
-            '''CREATE TABLE IF NOT EXISTS lm_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                version TEXT,
-                description TEXT,
-                author TEXT,
-                storage_rel_path TEXT NOT NULL,
-                preview_rel_path TEXT,
-                is_enabled INTEGER DEFAULT 0,
-                last_updated TEXT
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_folder_config (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                rel_path TEXT NOT NULL,
-                folder_type TEXT DEFAULT 'auto',
-                display_style TEXT,
-                display_name TEXT,
-                image_path TEXT,
-                manual_preview_path TEXT, -- Phase 16.5
-                is_terminal INTEGER DEFAULT 0,
-                tags TEXT,
-                target_override TEXT,     -- Phase 16
-                deployment_rules TEXT,     -- Phase 16 (JSON)
-                deploy_rule TEXT,          -- Phase 5 (A/B/C support)
-                deploy_rule_b TEXT,        -- Target 2 override
-                deploy_rule_c TEXT,        -- Target 3 override
-                deploy_type TEXT,          -- Phase 18.15 (Override)
-                conflict_policy TEXT,      -- Phase 18.15 (Override)
-                conflict_tag TEXT,         -- Phase 28: Tag to check for conflicts
-                conflict_scope TEXT,       -- Phase 28: Scope for conflict check (disabled/category/global)
-                description TEXT,          -- Phase 28: User description
-                inherit_tags INTEGER DEFAULT 1, -- Phase 18 (Allow blocking inheritance)
-                trash_origin TEXT, -- Phase 18.11: Store original path for restore
-                transfer_mode TEXT, -- Phase 34: Copy vs Symlink override
-                UNIQUE(rel_path)
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_tags (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                icon_rel_path TEXT,
-                category TEXT,
-                is_inheritable INTEGER DEFAULT 1 -- Phase 18.9
-            )''',
-
-            '''CREATE TABLE IF NOT EXISTS lm_item_tags (
-                item_id INTEGER NOT NULL,
-                tag_id INTEGER NOT NULL,
-                PRIMARY KEY(item_id, tag_id)
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_presets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_preset_items (
-                preset_id INTEGER NOT NULL,
-                item_id INTEGER NOT NULL,
-                PRIMARY KEY(preset_id, item_id)
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_preset_folders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                sort_order INTEGER DEFAULT 0,
-                is_expanded INTEGER DEFAULT 1
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_lib_folders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                parent_id INTEGER DEFAULT NULL,
-                sort_order INTEGER DEFAULT 0,
-                is_expanded INTEGER DEFAULT 1,
-                FOREIGN KEY(parent_id) REFERENCES lm_lib_folders(id) ON DELETE CASCADE
-            )''',
-            '''CREATE TABLE IF NOT EXISTS lm_backup_registry (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                original_path TEXT NOT NULL,
-                backup_path TEXT NOT NULL,
-                folder_rel_path TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(original_path)
-            )''',
-            # Phase 42: Deployed files tracking (User Request)
-            '''CREATE TABLE IF NOT EXISTS lm_deployed_files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                target_path TEXT NOT NULL,
-                source_path TEXT NOT NULL,
-                package_rel_path TEXT NOT NULL,
-                deploy_type TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(target_path)
-            )'''
-        ]
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            for sql in schema:
-                cursor.execute(sql)
-            
-            # Migrations
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN target_override TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN deployment_rules TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN manual_preview_path TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN inherit_tags INTEGER DEFAULT 1")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_tags ADD COLUMN is_inheritable INTEGER DEFAULT 1")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN trash_origin TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN deploy_type TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN conflict_policy TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN deploy_rule TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN deploy_rule_b TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN deploy_rule_c TEXT")
-            except: pass
-            
-            # Phase 28 Migrations
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN conflict_tag TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN conflict_scope TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN description TEXT")
-            except: pass
-            try:
-                # Phase 28: Cache for link status to avoid expensive recursive scans
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN last_known_status TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN link_status_cache TEXT")
-            except: pass
+    def release_connection(self):
+        """Closes the calling thread's pooled connection; QThread workers call this when done."""
+        self._pool.release()
 
-            # Quick View Manager Support (Fav/Score per item)
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN is_favorite INTEGER DEFAULT 0")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN score INTEGER DEFAULT 0")
-            except: pass
-            
-            # Phase 34: Transfer Mode
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN transfer_mode TEXT")
-            except: pass
-            
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN is_visible INTEGER DEFAULT 1")
-            except: pass
-            
-            try:
-                # Phase 51: Differentiate accidental vs intentional partial deployment
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN is_intentional INTEGER DEFAULT 0")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN display_style_package TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_presets ADD COLUMN folder TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN sort_order INTEGER DEFAULT 0")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_presets ADD COLUMN sort_order INTEGER DEFAULT 0")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_presets ADD COLUMN folder_id INTEGER DEFAULT NULL")
-            except: pass
-            
-            # Phase 4 New Features: Library Management
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN is_library INTEGER DEFAULT 0")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN lib_name TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN lib_version TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN lib_deps TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN lib_priority INTEGER DEFAULT 0")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN lib_priority_mode TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN lib_memo TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN lib_hidden INTEGER DEFAULT 0")
-            except: pass
-            
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN lib_folder_id INTEGER DEFAULT NULL")
-            except: pass
-            
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN author TEXT")
-            except: pass
-            
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN size_bytes INTEGER DEFAULT 0")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN scanned_at TEXT")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN url TEXT")
-            except: pass
-            
-            # Favorite & URL List Enhancement
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN url_list TEXT")
-            except: pass
+    def close(self):
+        """Close all pooled connections to this DB (required before deleting the file on Windows)."""
+        close_connection_pool(self.db_path)
 
-            # Phase X: Persistent Visual Flags
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN has_logical_conflict INTEGER DEFAULT 0")
-            except: pass
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN is_library_alt_version INTEGER DEFAULT 0")
-            except: pass
-            
-            # Phase 42: Separate Target Selection from Physical Path (User Request)
-            try:
-                cursor.execute("ALTER TABLE lm_folder_config ADD COLUMN target_selection TEXT")
-            except: pass
-
-            # Create indexes for performance
-            try:
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_lib_name ON lm_folder_config (lib_name)")
-            except: pass
-            try:
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_is_library ON lm_folder_config (is_library)")
-            except: pass
-            try:
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_status ON lm_folder_config (last_known_status)")
-            except: pass
-            
-            # Phase 42: Ensure tracking tables exist for existing databases
-            try:
-                cursor.execute('''CREATE TABLE IF NOT EXISTS lm_backup_registry (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    original_path TEXT NOT NULL,
-                    backup_path TEXT NOT NULL,
-                    folder_rel_path TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(original_path)
-                )''')
-            except: pass
-            
-            try:
-                cursor.execute('''CREATE TABLE IF NOT EXISTS lm_deployed_files (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    target_path TEXT NOT NULL,
-                    source_path TEXT NOT NULL,
-                    package_rel_path TEXT NOT NULL,
-                    deploy_type TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(target_path)
-                )''')
-            except: pass
-            
-            conn.commit()
+    def _create_tables(self):
+        """Brings the app schema up to date (no-op when already current)."""
+        with self.get_connection() as conn:
+            run_migrations(conn, APP_MIGRATIONS, LANE_APP, db_label=self.db_path)
 
     # --- Item Methods ---
     def get_items(self):
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM lm_items")
             return [dict(row) for row in cursor.fetchall()]
 
@@ -566,16 +206,16 @@ class LinkMasterDB:
 
     def get_presets(self):
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM lm_presets")
             return [dict(row) for row in cursor.fetchall()]
 
     def get_preset_items(self, preset_id: int):
         sql = "SELECT i.* FROM lm_items i JOIN lm_preset_items pi ON pi.item_id = i.id WHERE pi.preset_id = ?"
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute(sql, (preset_id,))
             return [dict(row) for row in cursor.fetchall()]
 
@@ -623,8 +263,8 @@ class LinkMasterDB:
     def get_preset_folders(self) -> list:
         """Get all preset folders."""
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM lm_preset_folders ORDER BY sort_order, name")
             return [dict(row) for row in cursor.fetchall()]
 
@@ -672,20 +312,403 @@ class LinkMasterDB:
         # Normalize path to forward slashes for consistent DB lookup
         rel_path = rel_path.replace('\\', '/') if rel_path else rel_path
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM lm_folder_config WHERE rel_path = ?", (rel_path,))
             row = cursor.fetchone()
+            if row is None and os.name == 'nt' and rel_path:
+                # Case-insensitive fallback via the indexed rel_path_norm column (not unique: oldest row wins)
+                cursor.execute("SELECT * FROM lm_folder_config WHERE rel_path_norm = lower(?) ORDER BY id LIMIT 1", (rel_path,))
+                row = cursor.fetchone()
             return dict(row) if row else None
 
     def get_all_folder_configs(self):
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM lm_folder_config")
             rows = cursor.fetchall()
             return {r['rel_path']: dict(r) for r in rows}
 
+    # --- Hierarchy Queries (index seeks on parent_rel / rel_path_norm) ---
+    def _get_folder_config_columns(self) -> set:
+        if self._folder_config_columns is None:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("PRAGMA table_info(lm_folder_config)")
+                self._folder_config_columns = {row[1] for row in cursor.fetchall()}
+        return self._folder_config_columns
+
+    def _select_columns_sql(self, columns) -> str:
+        """Validated column projection ('*' if columns is None). rel_path is always included."""
+        if not columns:
+            return "*"
+        valid = self._get_folder_config_columns()
+        cols = ['rel_path'] + [c for c in columns if c in valid and c != 'rel_path']
+        return ", ".join(cols)
+
+    def get_direct_children_configs(self, parent_rel: str, columns: list = None) -> list:
+        """Returns [(rel_path, config)] for configs whose direct parent is parent_rel (case-insensitive)."""
+        parent_rel = (parent_rel or "").replace('\\', '/').strip('/')
+        sql = f"SELECT {self._select_columns_sql(columns)} FROM lm_folder_config WHERE parent_rel = lower(?)"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(sql, (parent_rel,))
+            return [(r['rel_path'], dict(r)) for r in cursor.fetchall()]
+
+    def get_subtree_configs(self, prefix: str, columns: list = None, include_self: bool = False) -> dict:
+        """
+        Returns {rel_path: config} for every config below prefix (case-insensitive).
+        prefix '' means the whole table. columns limits the fetched columns.
+        """
+        prefix = (prefix or "").replace('\\', '/').strip('/')
+        select = self._select_columns_sql(columns)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            if not prefix:
+                cursor.execute(f"SELECT {select} FROM lm_folder_config")
+            else:
+                # Range seek: every 'prefix/...' key sorts in ['prefix/', 'prefix0') since '0' follows '/'
+                sql = f"SELECT {select} FROM lm_folder_config WHERE rel_path_norm >= lower(?) || '/' AND rel_path_norm < lower(?) || '0'"
+                params = [prefix, prefix]
+                if include_self:
+                    sql += " OR rel_path_norm = lower(?)"
+                    params.append(prefix)
+                cursor.execute(sql, params)
+            return {r['rel_path']: dict(r) for r in cursor.fetchall()}
+
+    def count_subtree_by_status(self, prefix: str) -> dict:
+        """Returns {last_known_status: count} for configs below prefix ('none' for NULL)."""
+        prefix = (prefix or "").replace('\\', '/').strip('/')
+        sql = "SELECT COALESCE(last_known_status, 'none'), COUNT(*) FROM lm_folder_config"
+        params = []
+        if prefix:
+            sql += " WHERE rel_path_norm >= lower(?) || '/' AND rel_path_norm < lower(?) || '0'"
+            params = [prefix, prefix]
+        sql += " GROUP BY 1"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return {status: count for status, count in cursor.fetchall()}
+
+    def get_folder_configs(self, rel_paths) -> dict:
+        """Bulk variant of get_folder_config (exact rel_path match): {rel_path: config}."""
+        keys = list({p.replace('\\', '/') for p in rel_paths if p})
+        found = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            for i in range(0, len(keys), _SQL_IN_CHUNK):
+                chunk = keys[i:i + _SQL_IN_CHUNK]
+                cursor.execute(f"SELECT * FROM lm_folder_config WHERE rel_path IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((r['rel_path'], dict(r)) for r in cursor.fetchall())
+        return found
+
+    def ensure_folder_configs(self, rel_paths) -> int:
+        """
+        Inserts default rows (folder_type 'auto') for folders that have no config yet,
+        so they are covered by the search index. Returns the number of rows added.
+        """
+        paths = {p.replace('\\', '/') for p in rel_paths if p}
+        if not paths: return 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            existing = set()
+            keys = list({p.lower() for p in paths})
+            for i in range(0, len(keys), _SQL_IN_CHUNK):
+                chunk = keys[i:i + _SQL_IN_CHUNK]
+                cursor.execute(f"SELECT rel_path, rel_path_norm FROM lm_folder_config WHERE rel_path_norm IN ({','.join('?' * len(chunk))})", chunk)
+                for rel, norm in cursor.fetchall():
+                    # Same rule as update_folder_display_config: case-insensitive match on Windows only
+                    existing.add(norm if os.name == 'nt' else rel)
+            missing = [p for p in paths if (p.lower() if os.name == 'nt' else p) not in existing]
+            if missing:
+                cursor.executemany("INSERT OR IGNORE INTO lm_folder_config (rel_path, folder_type) VALUES (?, 'auto')", [(p,) for p in missing])
+                conn.commit()
+            return len(missing)
+
+    # --- Search Index (lm_search_fts, maintained by triggers on lm_folder_config) ---
+    def _get_search_tokenizer(self) -> str:
+        if self._search_tokenizer is None:
+            with self.get_connection() as conn:
+                row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'lm_search_fts'").fetchone()
+            if not row: self._search_tokenizer = ''
+            elif 'trigram' in row[0]: self._search_tokenizer = 'trigram'
+            else: self._search_tokenizer = 'unicode61'
+        return self._search_tokenizer
+
+    def has_search_index(self) -> bool:
+        return bool(self._get_search_tokenizer())
+
+    def has_substring_search_index(self) -> bool:
+        """True if search_index() finds terms anywhere in a word (trigram), not only as token prefixes."""
+        return self._get_search_tokenizer() == 'trigram'
+
+    def search_index(self, term: str, columns=None) -> set:
+        """
+        rel_paths whose indexed text contains term (case-insensitive).
+        trigram index: substring match; terms under 3 characters use LIKE on the
+        index content instead. unicode61 index: token prefix match.
+        columns limits the match to some of SEARCH_FTS_COLUMNS (e.g. ('tags',)).
+        """
+        term = (term or '').strip()
+        tokenizer = self._get_search_tokenizer()
+        if not term or not tokenizer: return set()
+        cols = [c for c in (columns or SEARCH_FTS_COLUMNS) if c in SEARCH_FTS_COLUMNS]
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if tokenizer == 'trigram' and len(term) < 3:
+                pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                where = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in cols)
+                cursor.execute(f"SELECT rel_path FROM lm_search_fts WHERE {where}", [pattern] * len(cols))
+            else:
+                phrase = '"' + term.replace('"', '""') + '"'
+                if tokenizer != 'trigram': phrase += '*'
+                cursor.execute("SELECT rel_path FROM lm_search_fts WHERE lm_search_fts MATCH ?",
+                               ("{" + " ".join(cols) + "} : " + phrase,))
+            return {r[0] for r in cursor.fetchall()}
+
+    def rebuild_search_index(self):
+        """Repopulates lm_search_fts from lm_folder_config (repair; triggers keep it current)."""
+        if not self.has_search_index(): return
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM lm_search_fts")
+            conn.execute(f"INSERT INTO lm_search_fts (rowid, rel_path, {', '.join(SEARCH_FTS_COLUMNS)}) "
+                         f"SELECT {search_fts_values_sql('lm_folder_config')} FROM lm_folder_config")
+            conn.commit()
+
+    # --- Tag Index (lm_item_tags, maintained by triggers on lm_folder_config.tags) ---
+    def has_tag_index(self) -> bool:
+        if self._tag_index is None:
+            with self.get_connection() as conn:
+                row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_item_tags_upd'").fetchone()
+            self._tag_index = bool(row)
+        return self._tag_index
+
+    def find_items_by_tags(self, all_tags=(), any_tags=(), exclude_tags=(), groups=()) -> set:
+        """
+        rel_paths of items whose own tags (case-insensitive) include every tag in
+        all_tags, at least one of any_tags, at least one tag of each group in groups
+        (tag-bar segments) and none of exclude_tags. Resolved as INTERSECT/EXCEPT of
+        index seeks on lm_item_tags (tag_id, item_id).
+        """
+        groups = [list(g) for g in groups if g] + [[t] for t in all_tags]
+        if any_tags:
+            groups.append(list(any_tags))
+        exclude_tags = list(exclude_tags)
+        if not groups and not exclude_tags:
+            return set()
+
+        def having(tags):
+            return (f"SELECT it.item_id FROM lm_item_tags it JOIN lm_tags t ON t.id = it.tag_id "
+                    f"WHERE t.name COLLATE NOCASE IN ({','.join('?' * len(tags))})")
+
+        parts = [having(g) for g in groups] or ["SELECT id FROM lm_folder_config"]
+        params = [t for g in groups for t in g]
+        sql = " INTERSECT ".join(parts)
+        if exclude_tags:
+            sql += " EXCEPT " + having(exclude_tags)
+            params += exclude_tags
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT rel_path FROM lm_folder_config WHERE id IN ({sql})", params)
+            return {r[0] for r in cursor.fetchall()}
+
+    def get_item_tags(self, rel_paths=None) -> dict:
+        """{rel_path: set of lowercase tags} from the tag index (all tagged items if rel_paths is None)."""
+        sql = ("SELECT c.rel_path, t.name FROM lm_item_tags it "
+               "JOIN lm_folder_config c ON c.id = it.item_id JOIN lm_tags t ON t.id = it.tag_id")
+        result = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if rel_paths is None:
+                batches = [None]
+            else:
+                keys = list({p.replace('\\', '/') for p in rel_paths if p})
+                batches = [keys[i:i + _SQL_IN_CHUNK] for i in range(0, len(keys), _SQL_IN_CHUNK)]
+            for chunk in batches:
+                if chunk is None:
+                    cursor.execute(sql)
+                else:
+                    cursor.execute(f"{sql} WHERE c.rel_path IN ({','.join('?' * len(chunk))})", chunk)
+                for rel, name in cursor.fetchall():
+                    result.setdefault(rel, set()).add(name.lower())
+        return result
+
+    def rebuild_tag_index(self):
+        """Re-derives lm_item_tags from lm_folder_config.tags (repair; triggers keep it current)."""
+        if not self.has_tag_index(): return
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM lm_item_tags")
+            for stmt in link_item_tags_sql("c.id", "c.tags", where="lm_folder_config c"):
+                conn.execute(stmt)
+            conn.commit()
+
+    # --- Conflict Tags (lm_conflict_tags + lm_conflict_log, maintained by triggers) ---
+    def has_conflict_index(self) -> bool:
+        if self._conflict_index is None:
+            with self.get_connection() as conn:
+                row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lm_conflict_tags'").fetchone()
+            self._conflict_index = bool(row)
+        return self._conflict_index
+
+    def get_conflict_tag_rows(self, rel_paths=None) -> list:
+        """[(tag, rel_path, scope, linked)] for items with a conflict_tag (all, or only rel_paths)."""
+        sql = "SELECT tag, rel_path, scope, linked FROM lm_conflict_tags"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if rel_paths is None:
+                cursor.execute(sql)
+                return cursor.fetchall()
+            rows = []
+            keys = list({p.replace('\\', '/') for p in rel_paths if p})
+            for i in range(0, len(keys), _SQL_IN_CHUNK):
+                chunk = keys[i:i + _SQL_IN_CHUNK]
+                cursor.execute(f"{sql} WHERE rel_path IN ({','.join('?' * len(chunk))})", chunk)
+                rows.extend(cursor.fetchall())
+            return rows
+
+    def get_conflict_log_seq(self) -> int:
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT max(seq) FROM lm_conflict_log").fetchone()
+            return row[0] or 0
+
+    def get_conflict_changes(self, after_seq: int):
+        """(set of rel_paths whose conflict state changed after after_seq, newest seq)."""
+        with self.get_connection() as conn:
+            rows = conn.execute("SELECT seq, rel_path FROM lm_conflict_log WHERE seq > ?", (after_seq,)).fetchall()
+        if not rows:
+            return set(), after_seq
+        return {r[1] for r in rows}, max(r[0] for r in rows)
+
+    def prune_conflict_log(self, up_to_seq: int):
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM lm_conflict_log WHERE seq <= ?", (up_to_seq,))
+            conn.commit()
+
+    # --- Library Dependency Graph (lm_lib_graph_version, bumped by triggers) ---
+    def get_lib_graph_version(self):
+        """Current library graph version, or None if the counter is unavailable."""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute("SELECT version FROM lm_lib_graph_version WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def get_lib_graph_rows(self) -> list:
+        """{column: value} rows for libraries and packages with lib_deps, in table order."""
+        sql = (f"SELECT {', '.join(LIB_GRAPH_COLUMNS)} FROM lm_folder_config "
+               "WHERE coalesce(is_library, 0) != 0 OR coalesce(lib_deps, '') NOT IN ('', '[]')")
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            return [dict(r) for r in cursor.execute(sql).fetchall()]
+
+    # --- Effective Tags (materialized closure; stale rows have effective_tags NULL) ---
+    def _mark_subtrees_stale(self, cursor, rel_paths):
+        for rel in rel_paths:
+            if not rel:  # Storage root row: everything inherits from it
+                cursor.execute("UPDATE lm_folder_config SET effective_tags = NULL")
+                return
+            cursor.execute("UPDATE lm_folder_config SET effective_tags = NULL WHERE rel_path_norm = lower(?) "
+                           "OR (rel_path_norm >= lower(?) || '/' AND rel_path_norm < lower(?) || '0')",
+                           (rel, rel, rel))
+
+    def refresh_effective_tags(self) -> int:
+        """
+        Recomputes effective_tags for stale rows (marked by triggers) and for items
+        whose tags changed inheritability since the last refresh. Cheap when nothing
+        is stale: one partial-index probe. Returns the number of rows recomputed.
+        """
+        non_inheritable = self.get_non_inheritable_tag_names()
+        ni_key = ",".join(sorted(non_inheritable))
+        previous = self.get_setting('effective_tags_ni')
+        if previous != ni_key:
+            changed = non_inheritable ^ set(filter(None, (previous or "").split(',')))
+            roots = None
+            if previous is not None and self.has_tag_index():
+                roots = self.find_items_by_tags(any_tags=changed)
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                if roots is None:
+                    cursor.execute("UPDATE lm_folder_config SET effective_tags = NULL")
+                else:
+                    self._mark_subtrees_stale(cursor, roots)
+                cursor.execute("INSERT OR REPLACE INTO lm_settings (key, value) VALUES ('effective_tags_ni', ?)", (ni_key,))
+                conn.commit()
+
+        # Ancestors are matched by exact rel_path; only Windows folds case like the filesystem
+        key_col = 'rel_path_norm' if os.name == 'nt' else 'rel_path'
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT id, {key_col}, tags, inherit_tags FROM lm_folder_config WHERE effective_tags IS NULL")
+            stale = cursor.fetchall()
+            if not stale:
+                return 0
+
+            def parent_of(key):
+                return key.rpartition('/')[0]
+
+            # Every ancestor up to and including the storage root row ('')
+            stale_keys = {r[1] for r in stale}
+            ancestors = set()
+            for _, key, _, _ in stale:
+                p = key
+                while p:
+                    p = parent_of(p)
+                    if p in ancestors or p in stale_keys:
+                        break
+                    ancestors.add(p)
+            known = {}  # clean ancestor key -> effective tag set
+            keys = list(ancestors)
+            for i in range(0, len(keys), _SQL_IN_CHUNK):
+                chunk = keys[i:i + _SQL_IN_CHUNK]
+                cursor.execute(f"SELECT {key_col}, effective_tags FROM lm_folder_config "
+                               f"WHERE {key_col} IN ({','.join('?' * len(chunk))})", chunk)
+                for key, eff in cursor.fetchall():
+                    known[key] = set(filter(None, (eff or "").split(',')))
+
+            # Parents before children, so each row inherits from an up-to-date parent
+            stale.sort(key=lambda r: (r[1] != '', r[1].count('/')))
+            updates = []
+            for row_id, key, tags, inherit_tags in stale:
+                effective = {t.strip().lower() for t in (tags or '').split(',') if t.strip()}
+                if key and inherit_tags != 0:
+                    # Nearest ancestor with a config row; folders without one pass everything through
+                    p = parent_of(key)
+                    while p and p not in known:
+                        p = parent_of(p)
+                    effective |= known.get(p, set()) - non_inheritable
+                known[key] = effective
+                updates.append((",".join(sorted(effective)), row_id))
+            cursor.executemany("UPDATE lm_folder_config SET effective_tags = ? WHERE id = ?", updates)
+            conn.commit()
+            return len(updates)
+
+    def get_effective_tags(self, rel_paths=None) -> dict:
+        """{rel_path: set of lowercase effective tags} (refreshes stale rows first)."""
+        self.refresh_effective_tags()
+        result = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if rel_paths is None:
+                cursor.execute("SELECT rel_path, effective_tags FROM lm_folder_config")
+                rows = cursor.fetchall()
+            else:
+                keys = list({p.replace('\\', '/') for p in rel_paths if p})
+                rows = []
+                for i in range(0, len(keys), _SQL_IN_CHUNK):
+                    chunk = keys[i:i + _SQL_IN_CHUNK]
+                    cursor.execute(f"SELECT rel_path, effective_tags FROM lm_folder_config "
+                                   f"WHERE rel_path IN ({','.join('?' * len(chunk))})", chunk)
+                    rows.extend(cursor.fetchall())
+        for rel, eff in rows:
+            result[rel] = set(filter(None, (eff or "").split(',')))
+        return result
+
     def store_item_origin(self, rel_path, origin_rel_path):
         """Phase 18.11: Store the original relative path of an item before moving it (e.g. to Trash)."""
         with self.get_connection() as conn:
@@ -741,7 +764,7 @@ class LinkMasterDB:
                 # If we have 'Path' and try to update 'path', we should update 'Path'.
                 target_id = None
                 if os.name == 'nt':
-                    cursor.execute("SELECT id FROM lm_folder_config WHERE LOWER(rel_path) = ?", (rel_path.lower(),))
+                    cursor.execute("SELECT id FROM lm_folder_config WHERE rel_path_norm = lower(?) ORDER BY id LIMIT 1", (rel_path,))
                 else:
                     cursor.execute("SELECT id FROM lm_folder_config WHERE rel_path = ?", (rel_path,))
                 
@@ -805,7 +828,7 @@ class LinkMasterDB:
                              'conflict_tag', 'conflict_scope', 'description', 'author', 'url',
                              'is_favorite', 'score', 'url_list',
                              'is_library', 'lib_name', 'lib_version', 'lib_deps', 'lib_priority', 'lib_priority_mode', 'lib_memo', 'lib_hidden',
-                             'lib_folder_id', 'has_logical_conflict', 'is_library_alt_version', 'size_bytes', 'scanned_at'}
+                             'lib_folder_id', 'has_logical_conflict', 'is_library_alt_version', 'is_intentional', 'size_bytes', 'scanned_at'}
                 
                 for item_data in update_list:
                     rel_path = item_data.get('rel_path')
@@ -821,7 +844,7 @@ class LinkMasterDB:
                     # Similar lookup as update_folder_display_config
                     target_id = None
                     if os.name == 'nt':
-                        cursor.execute("SELECT id FROM lm_folder_config WHERE LOWER(rel_path) = ?", (rel_path.lower(),))
+                        cursor.execute("SELECT id FROM lm_folder_config WHERE rel_path_norm = lower(?) ORDER BY id LIMIT 1", (rel_path,))
                     else:
                         cursor.execute("SELECT id FROM lm_folder_config WHERE rel_path = ?", (rel_path,))
                     
@@ -893,10 +916,16 @@ class LinkMasterDB:
     def get_all_tags(self):
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            # Fetch from both tags and conflict_tag columns
-            cursor.execute("SELECT tags, conflict_tag FROM lm_folder_config")
-            rows = cursor.fetchall()
             unique = set()
+            if self.has_tag_index():
+                # tags column via the item-tag relation; conflict_tag is not part of it
+                cursor.execute("SELECT t.name FROM lm_tags t WHERE EXISTS (SELECT 1 FROM lm_item_tags it WHERE it.tag_id = t.id)")
+                unique.update(r[0] for r in cursor.fetchall())
+                cursor.execute("SELECT NULL, conflict_tag FROM lm_folder_config WHERE conflict_tag IS NOT NULL AND conflict_tag != ''")
+            else:
+                # Fetch from both tags and conflict_tag columns
+                cursor.execute("SELECT tags, conflict_tag FROM lm_folder_config")
+            rows = cursor.fetchall()
             for r in rows:
                 # tags column (comma separated)
                 if r[0]:
@@ -909,8 +938,8 @@ class LinkMasterDB:
     # --- Frequent Tag Management (lm_tags) ---
     def get_tag_definitions(self):
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             cursor.execute("SELECT * FROM lm_tags")
             return [dict(row) for row in cursor.fetchall()]
 
@@ -928,6 +957,9 @@ class LinkMasterDB:
         with self.get_connection() as conn:
             conn.execute(sql, params)
             conn.commit()
+        if 'name' in tags_data:
+            # Items still carry the old name in their tags string
+            self.rebuild_tag_index()
 
     def add_tag_definition(self, tags_data: dict):
         sql = "INSERT INTO lm_tags (name, icon_rel_path, category, is_inheritable) VALUES (:name, :icon_rel_path, :category, :is_inheritable)"
@@ -935,6 +967,14 @@ class LinkMasterDB:
             cursor = conn.cursor()
             # Ensure defaults for insert
             if 'is_inheritable' not in tags_data: tags_data['is_inheritable'] = 1
+            # Tags already in use have a plain row from the tag index: define that one
+            cursor.execute("SELECT id FROM lm_tags WHERE name = ? COLLATE NOCASE ORDER BY id LIMIT 1", (tags_data.get('name'),))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute("UPDATE lm_tags SET icon_rel_path = :icon_rel_path, category = :category, "
+                               "is_inheritable = :is_inheritable WHERE id = :id", {**tags_data, 'id': row[0]})
+                conn.commit()
+                return row[0]
             cursor.execute(sql, tags_data)
             conn.commit()
             return cursor.lastrowid
@@ -942,13 +982,27 @@ class LinkMasterDB:
     def delete_tag_definition(self, tag_id: int):
         with self.get_connection() as conn:
             conn.execute("DELETE FROM lm_tags WHERE id = ?", (tag_id,))
+            in_use = conn.execute("SELECT 1 FROM lm_item_tags WHERE tag_id = ? LIMIT 1", (tag_id,)).fetchone()
             conn.commit()
+        if in_use:
+            # Items still tagged with it get a plain (undefined) tag row again
+            self.rebuild_tag_index()
 
     def get_non_inheritable_tag_names(self):
+        """Lowercase names of tags that are not passed to children (tag definitions and quick tags)."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM lm_tags WHERE is_inheritable = 0")
-            return {row[0].lower() for row in cursor.fetchall()}
+            names = {row[0].lower() for row in cursor.fetchall()}
+            cursor.execute("SELECT value FROM lm_settings WHERE key = 'frequent_tags_config'")
+            row = cursor.fetchone()
+        try:
+            quick_tags = json.loads(row[0]) if row and row[0] else []
+            names.update(t['name'].lower() for t in quick_tags
+                         if isinstance(t, dict) and t.get('name') and not t.get('is_inheritable', True))
+        except (ValueError, TypeError, AttributeError):
+            pass
+        return names
 
     # --- Settings ---
     def get_setting(self, key: str, default: str = None) -> str:
@@ -1121,6 +1175,210 @@ class LinkMasterDB:
             cursor.execute(query, params)
             return cursor.fetchone() is not None
 
+    # --- Bulk Ledger Operations (one transaction per call) ---
+    def register_deployed_files_bulk(self, entries):
+        """
+        Register many deployments in one transaction.
+        entries: iterable of (target_path, source_path, package_rel_path, deploy_type).
+        """
+        rows = [(_ledger_key(t), _ledger_key(s), (p or '').replace('\\', '/'), d)
+                for t, s, p, d in entries if t]
+        if not rows: return
+        with self.get_connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO lm_deployed_files (target_path, source_path, package_rel_path, deploy_type)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+
+    def remove_deployed_file_entries(self, target_paths):
+        """Remove ledger entries for many target paths in one transaction."""
+        keys = [(_ledger_key(t),) for t in target_paths if t]
+        if not keys: return
+        with self.get_connection() as conn:
+            conn.executemany("DELETE FROM lm_deployed_files WHERE target_path = ?", keys)
+            conn.commit()
+
+    def get_deployed_file_sources(self, target_paths) -> dict:
+        """Bulk variant of get_deployed_file_source: {normalized_target: source} for registered paths."""
+        keys = list({_ledger_key(t) for t in target_paths if t})
+        found = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(keys), _SQL_IN_CHUNK):
+                chunk = keys[i:i + _SQL_IN_CHUNK]
+                cursor.execute(f"SELECT target_path, source_path FROM lm_deployed_files WHERE target_path IN ({','.join('?' * len(chunk))})", chunk)
+                found.update(cursor.fetchall())
+        return found
+
+    def get_owned_paths(self, target_paths) -> set:
+        """Bulk variant of is_file_ours: returns the normalized keys of registered paths."""
+        return set(self.get_deployed_file_sources(target_paths))
+
+    def get_deployed_targets_under(self, source_roots) -> dict:
+        """
+        Reverse ownership lookup: {source_root: [(target_path, source_path, deploy_type)]}
+        for ledger entries deployed from source_root or anything inside it.
+        One range scan of idx_lm_deployed_files_source per root (no LIKE, no walk).
+        """
+        found = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for root in source_roots:
+                key = (_ledger_key(root) or '').rstrip('/')
+                if not key: continue
+                # [key, key + '0') holds key, key + '/...' and siblings like key + '-x' ('/' + 1 == '0')
+                cursor.execute("""
+                    SELECT target_path, source_path, deploy_type FROM lm_deployed_files
+                    WHERE source_path >= ? AND source_path < ?
+                """, (key, key + '0'))
+                prefix = key + '/'
+                found[root] = [row for row in cursor.fetchall() if row[1] == key or row[1].startswith(prefix)]
+        return found
+
+    # --- Link Status Index (persistent Deployer.get_link_status results) ---
+    def get_link_status_entry(self, source_path: str, target_path: str, rule_hash: str):
+        """Returns the stored index row as a dict, or None. Paths must be pre-normalized."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute("""
+                SELECT fp_count, fp_mtime, fp_hash, watch_paths, result FROM lm_link_status_index
+                WHERE source_path = ? AND target_path = ? AND rule_hash = ?
+            """, (source_path, target_path, rule_hash))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def put_link_status_entry(self, source_path: str, target_path: str, rule_hash: str,
+                              fingerprint: tuple, watch_paths: list, result: dict):
+        """Stores a status result with the (count, mtime, hash) fingerprint it was computed under."""
+        import time
+        fp_count, fp_mtime, fp_hash = fingerprint
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO lm_link_status_index
+                (source_path, target_path, rule_hash, fp_count, fp_mtime, fp_hash, watch_paths, result, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (source_path, target_path, rule_hash, fp_count, fp_mtime, fp_hash,
+                  json.dumps(watch_paths), json.dumps(result), time.time()))
+            conn.commit()
+
+    def invalidate_link_status(self, source_paths=(), target_paths=()):
+        """Drops index rows deployed from any of source_paths or into any of target_paths."""
+        sources = [(p,) for p in source_paths if p]
+        targets = [(p,) for p in target_paths if p]
+        if not sources and not targets: return
+        with self.get_connection() as conn:
+            if sources:
+                conn.executemany("DELETE FROM lm_link_status_index WHERE source_path = ?", sources)
+            if targets:
+                conn.executemany("DELETE FROM lm_link_status_index WHERE target_path = ?", targets)
+            conn.commit()
+
+
+    # --- Directory Size Cache (SizeScanner) ---
+    def get_dir_size_cache(self) -> dict:
+        """{rel_dir: (mtime_ns, file_bytes, subdir names)} for every cached directory."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT rel_path, mtime_ns, file_bytes, subdirs FROM lm_dir_size_cache")
+            # Names cannot contain '/', so it separates them
+            return {rel: (mtime, size, tuple(subdirs.split('/')) if subdirs else ())
+                    for rel, mtime, size, subdirs in cursor.fetchall()}
+
+    def put_dir_size_cache(self, rows):
+        """Stores (rel_dir, mtime_ns, file_bytes, subdirs) rows in one transaction."""
+        params = [(rel, mtime, size, '/'.join(subdirs)) for rel, mtime, size, subdirs in rows]
+        if not params: return
+        with self.get_connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO lm_dir_size_cache (rel_path, mtime_ns, file_bytes, subdirs)
+                VALUES (?, ?, ?, ?)
+            """, params)
+            conn.commit()
+
+    def delete_dir_size_cache(self, rel_dirs):
+        """Drops cached directories in one transaction."""
+        keys = [(rel,) for rel in rel_dirs]
+        if not keys: return
+        with self.get_connection() as conn:
+            conn.executemany("DELETE FROM lm_dir_size_cache WHERE rel_path = ?", keys)
+            conn.commit()
+
+    # --- Thumbnail Index (ThumbnailIndex) ---
+    def get_thumbnail_index(self, parent_rel: str) -> dict:
+        """{name: (mtime_ns, thumb)} for the items indexed under parent_rel."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name, mtime_ns, thumb FROM lm_thumbnail_index WHERE parent_rel = ?", (parent_rel,))
+            return {name: (mtime, thumb) for name, mtime, thumb in cursor.fetchall()}
+
+    def put_thumbnail_index(self, parent_rel: str, rows):
+        """Stores (name, mtime_ns, thumb) rows under parent_rel in one transaction."""
+        params = [(parent_rel, name, mtime, thumb) for name, mtime, thumb in rows]
+        if not params: return
+        with self.get_connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO lm_thumbnail_index (parent_rel, name, mtime_ns, thumb)
+                VALUES (?, ?, ?, ?)
+            """, params)
+            conn.commit()
+
+    def delete_thumbnail_index(self, parent_rel: str, names):
+        """Drops indexed items under parent_rel in one transaction."""
+        keys = [(parent_rel, name) for name in names]
+        if not keys: return
+        with self.get_connection() as conn:
+            conn.executemany("DELETE FROM lm_thumbnail_index WHERE parent_rel = ? AND name = ?", keys)
+            conn.commit()
+
+    # --- Scan Snapshots (ScanSnapshotCache) ---
+    def get_config_revision(self):
+        """Current lm_config_revision, or None if the counter is unavailable."""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute("SELECT revision FROM lm_config_revision WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def get_scan_snapshot(self, path: str, target_root: str):
+        """Stored snapshot row as a dict (payload still JSON), or None."""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute("""
+                    SELECT dir_mtime_ns, db_revision, signature, payload FROM lm_scan_snapshots
+                    WHERE path = ? AND target_root = ?
+                """, (path, target_root)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        if not row: return None
+        return {'dir_mtime_ns': row[0], 'db_revision': row[1], 'signature': row[2], 'payload': row[3]}
+
+    def put_scan_snapshot(self, path: str, target_root: str, dir_mtime_ns: int, db_revision: int,
+                          signature: str, payload: str, keep: int = 64):
+        """Stores a snapshot and keeps only the `keep` most recent ones."""
+        import time
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO lm_scan_snapshots
+                (path, target_root, dir_mtime_ns, db_revision, signature, payload, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (path, target_root, dir_mtime_ns, db_revision, signature, payload, time.time()))
+            conn.execute("""
+                DELETE FROM lm_scan_snapshots WHERE updated_at < (
+                    SELECT min(updated_at) FROM (SELECT updated_at FROM lm_scan_snapshots
+                                                 ORDER BY updated_at DESC LIMIT ?))
+            """, (keep,))
+            conn.commit()
+
+# Max bound parameters per IN (...) query (SQLite < 3.32 limit is 999)
+_SQL_IN_CHUNK = 500
+
+def _ledger_key(path: str) -> str:
+    """lm_deployed_files key normalization (same as register_deployed_file)."""
+    return path.replace('\\', '/').lower() if path else path
+
 # Singletons / Helpers
 _registry_instance = None
 def get_lm_registry():
@@ -1137,3 +1395,9 @@ def get_lm_db(app_name: str = None):
     if app_name not in _db_instances:
         _db_instances[app_name] = LinkMasterDB(app_name=app_name)
     return _db_instances[app_name]
+
+def release_lm_db(app_name: str):
+    """Closes and forgets the cached DB instance for app_name (e.g. when the app is deleted)."""
+    db = _db_instances.pop(app_name, None)
+    if db:
+        db.close()
@@ -0,0 +1,161 @@
+"""
+Link Master: Pooled SQLite Connections
+Provides one long-lived connection per (database file, thread) pair.
+
+Opening a fresh sqlite3 connection costs a file open, a schema parse and a
+cold page cache. The card/scan paths call get_connection() thousands of times
+per refresh, so connections are cached per thread and tuned once on creation.
+WAL journaling lets scanner threads keep reading while the deploy path writes.
+"""
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger("LinkMasterDBPool")
+
+# Applied once per new connection. journal_mode is persistent in the DB file,
+# the others are per-connection settings.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16384",      # 16 MiB page cache (negative = KiB)
+    "PRAGMA mmap_size=268435456",    # 256 MiB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+)
+
+# sqlite3 keeps an LRU of compiled statements per connection. Most queries in
+# database.py are constant strings, so a larger cache means they are prepared
+# once per thread and reused afterwards.
+_STATEMENT_CACHE_SIZE = 512
+_BUSY_TIMEOUT_SEC = 30.0
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A thread's shared connection: every LinkMasterDB method on that thread gets
+    the same one, so `with conn:` blocks nest when one method calls another.
+    Only the outermost block commits or rolls back; an inner block runs in a
+    SAVEPOINT that is undone on its own if the block raises, and commit()
+    inside it is left to the outermost block.
+    """
+    _depth = 0
+
+    def __enter__(self):
+        if self._depth:
+            self.execute(f"SAVEPOINT pool_nested_{self._depth}")
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if not self._depth:
+            return super().__exit__(exc_type, exc, tb)
+        name = f"pool_nested_{self._depth}"
+        try:
+            if exc_type is not None:
+                self.execute(f"ROLLBACK TO {name}")
+            self.execute(f"RELEASE {name}")
+        except sqlite3.Error as e:
+            # The whole transaction was already rolled back (e.g. SQLITE_FULL)
+            logger.debug(f"[DBPool] savepoint {name}: {e}")
+        return False
+
+    def commit(self):
+        if self._depth <= 1:
+            super().commit()
+
+
+class ConnectionPool:
+    """Per-thread connection cache for a single SQLite database file."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # thread ident -> (thread, connection). Used to close connections of
+        # finished Python threads (ThreadPoolExecutor workers come and go).
+        # Threads started outside `threading` (QThread) show up as dummy
+        # threads that never report dead: they must call release() when done.
+        self._connections = {}
+
+    def get(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            thread = threading.current_thread()
+            with self._lock:
+                self._prune_dead_threads()
+                # A foreign thread may reuse the ident of one that ended without release()
+                previous = self._connections.get(thread.ident)
+                if previous is not None:
+                    try: previous[1].close()
+                    except Exception: pass
+                self._connections[thread.ident] = (thread, conn)
+        return conn
+
+    def release(self):
+        """Close the calling thread's connection (call at the end of QThread/QRunnable work)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        ident = threading.get_ident()
+        with self._lock:
+            entry = self._connections.get(ident)
+            if entry is not None and entry[1] is conn:
+                del self._connections[ident]
+        try: conn.close()
+        except Exception: pass
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread=False only so close_all() can run from the UI
+        # thread; each connection is still used by its owning thread only.
+        conn = sqlite3.connect(self.db_path, timeout=_BUSY_TIMEOUT_SEC,
+                               cached_statements=_STATEMENT_CACHE_SIZE,
+                               check_same_thread=False, factory=PooledConnection)
+        for pragma in _PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sqlite3.DatabaseError as e:
+                logger.warning(f"[DBPool] {pragma} failed for {self.db_path}: {e}")
+        return conn
+
+    def _prune_dead_threads(self):
+        # is_alive() stays True for dummy (non-Python) threads, so only real ones are pruned
+        dead = [ident for ident, (t, _) in self._connections.items()
+                if not isinstance(t, threading._DummyThread) and not t.is_alive()]
+        for ident in dead:
+            _, conn = self._connections.pop(ident)
+            try: conn.close()
+            except Exception: pass
+
+    def close_all(self):
+        """Close every pooled connection (e.g. before deleting the DB file)."""
+        with self._lock:
+            for _, conn in self._connections.values():
+                try: conn.close()
+                except Exception: pass
+            self._connections.clear()
+            self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_connection_pool(db_path: str) -> ConnectionPool:
+    """Returns the shared pool for db_path (one pool per database file)."""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[db_path] = pool
+        return pool
+
+def close_connection_pool(db_path: str):
+    """Closes and forgets the pool for db_path, if any."""
+    with _pools_lock:
+        pool = _pools.pop(db_path, None)
+    if pool:
+        pool.close_all()
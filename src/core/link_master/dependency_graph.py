@@ -0,0 +1,214 @@
+"""
+Link Master: Library Dependency Graph
+Cached package -> library -> version graph used for dependency resolution.
+
+Before, every deploy re-read all folder configs and re-parsed lib_deps JSON
+recursively. The graph is built once from the library/lib_deps rows and stays
+valid until lm_lib_graph_version moves (triggers bump it on writes to the
+library columns, lib_deps and lm_lib_folders). On top of it:
+
+- version selection (specific / latest / priority) is memoized per
+  (name, mode, version);
+- resolve() results are memoized per set of roots;
+- library -> library edges are checked once per build for cycles, and the
+  libraries are kept in topological order (dependencies first);
+- dependents per library name replace full-table scans in the library panel.
+
+Use get_dependency_graph(db) to share one instance per DB on the main thread.
+Worker threads should build their own.
+"""
+import json
+import logging
+import weakref
+from collections import defaultdict
+
+logger = logging.getLogger("LinkMasterDependencyGraph")
+
+_graphs = weakref.WeakKeyDictionary()
+
+
+def get_dependency_graph(db) -> 'LibraryDependencyGraph':
+    """Shared graph for db (built lazily, refreshed on demand)."""
+    graph = _graphs.get(db)
+    if graph is None:
+        graph = LibraryDependencyGraph(db)
+        _graphs[db] = graph
+    return graph
+
+
+def parse_lib_deps(deps_str) -> list:
+    """lib_deps JSON -> [(name, version_mode, version)]; legacy string entries use 'priority'."""
+    try:
+        deps = json.loads(deps_str) if isinstance(deps_str, str) else (deps_str or [])
+    except (ValueError, TypeError):
+        return []
+    if not isinstance(deps, list):
+        return []
+    parsed = []
+    for dep in deps:
+        if isinstance(dep, str):
+            parsed.append((dep, 'priority', None))
+        elif isinstance(dep, dict) and dep.get('name'):
+            parsed.append((dep['name'], dep.get('version_mode', 'priority'), dep.get('version')))
+    return parsed
+
+
+class LibraryDependencyGraph:
+    def __init__(self, db):
+        self.db = db
+        self._version = None
+        self._built = False
+        self.cycles = []         # [[lib rel_path, ...]] found at the last build
+        self.topo_order = []     # library rel_paths, dependencies first
+
+    # --- Build / invalidation ---
+    def refresh(self) -> bool:
+        """Rebuilds the graph if the DB changed since the last build. Returns True if rebuilt."""
+        version = self.db.get_lib_graph_version()
+        if self._built and version is not None and version == self._version:
+            return False
+        # Read the version before the rows so a concurrent write triggers the next rebuild
+        self._build(self.db.get_lib_graph_rows())
+        self._version = version
+        return True
+
+    def invalidate(self):
+        self._built = False
+
+    def _build(self, rows):
+        self._deps = {}                              # rel_path -> [(name, mode, version)]
+        self._libs = {}                              # rel_path -> library row
+        self._libs_by_name = defaultdict(list)       # lib_name -> [row] (table order)
+        self._libs_by_norm = defaultdict(list)       # lib_name.strip().lower() -> [row]
+        self._dependents = defaultdict(list)         # lib_name -> [package rel_path] (one per dep entry)
+        self._dependents_norm = defaultdict(list)    # normalized lib_name -> [package rel_path]
+        self._select_memo = {}
+        self._resolve_memo = {}
+
+        for row in rows:
+            rel_path = row['rel_path']
+            deps = parse_lib_deps(row.get('lib_deps'))
+            if deps:
+                self._deps[rel_path] = deps
+            if row.get('is_library'):
+                self._libs[rel_path] = row
+                if row.get('lib_name'):
+                    self._libs_by_name[row['lib_name']].append(row)
+                    self._libs_by_norm[row['lib_name'].strip().lower()].append(row)
+            else:
+                for name, _, _ in deps:
+                    self._dependents[name].append(rel_path)
+                    if isinstance(name, str):
+                        self._dependents_norm[name.strip().lower()].append(rel_path)
+
+        self._order_libraries()
+        self._built = True
+        logger.debug(f"[DepGraph] Built: {len(self._libs)} libraries, {len(self._deps)} items with deps, "
+                     f"{len(self.cycles)} cycle(s)")
+
+    def _order_libraries(self):
+        """Topological order of libraries over their selected dependencies; records cycles."""
+        edges = {rel: [d for d in (self.select(*dep) for dep in self._deps.get(rel, ())) if d]
+                 for rel in self._libs}
+        self.topo_order, self.cycles = [], []
+        state = {}  # rel -> 1 visiting, 2 done
+        for root in self._libs:
+            if state.get(root):
+                continue
+            stack = [(root, iter(edges[root]))]
+            path = [root]
+            state[root] = 1
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    path.pop()
+                    state[node] = 2
+                    self.topo_order.append(node)
+                elif state.get(child) == 1:
+                    cycle = path[path.index(child):] + [child]
+                    self.cycles.append(cycle)
+                    logger.warning(f"[DepGraph] Dependency cycle: {' -> '.join(cycle)}")
+                elif not state.get(child):
+                    state[child] = 1
+                    path.append(child)
+                    stack.append((child, iter(edges.get(child, ()))))
+
+    # --- Queries ---
+    def select(self, name, mode='priority', version=None):
+        """rel_path of the library version a dependency resolves to (None if no candidate)."""
+        key = (name, mode, version)
+        if key in self._select_memo:
+            return self._select_memo[key]
+        candidates = self._libs_by_name.get(name, [])
+        selected = None
+        if candidates:
+            if mode == 'specific' and version:
+                selected = next((c for c in candidates if c.get('lib_version') == version), None)
+                if not selected:
+                    logger.warning(f"Specific version {version} for {name} not found. Falling back to priority.")
+            if not selected:
+                if mode == 'latest':
+                    ordered = sorted(candidates, key=lambda c: c.get('lib_version') or '', reverse=True)
+                else:
+                    ordered = sorted(candidates, key=lambda c: (c.get('lib_priority') or 0, c.get('lib_version') or ''),
+                                     reverse=True)
+                selected = ordered[0]
+        rel_path = selected['rel_path'] if selected else None
+        self._select_memo[key] = rel_path
+        return rel_path
+
+    def resolve(self, rel_paths) -> list:
+        """
+        Libraries required by rel_paths in deployment order (dependencies first).
+        Each library name is resolved once; the first requirement met wins.
+        """
+        self.refresh()
+        key = tuple(rel_paths)
+        cached = self._resolve_memo.get(key)
+        if cached is not None:
+            return list(cached)
+
+        resolved, seen_names = [], set()
+        for root in key:
+            # Iterative DFS, post-order per dependency (same order as the recursive resolver)
+            stack = [iter(self._deps.get(root, ()))]
+            pending = []
+            while stack:
+                dep = next(stack[-1], None)
+                if dep is None:
+                    stack.pop()
+                    if pending:
+                        lib_rel = pending.pop()
+                        if lib_rel not in resolved:
+                            resolved.append(lib_rel)
+                    continue
+                name = dep[0]
+                if name in seen_names:
+                    continue
+                lib_rel = self.select(*dep)
+                if not lib_rel:
+                    logger.warning(f"Dependency not found: {name}")
+                    continue
+                seen_names.add(name)
+                pending.append(lib_rel)
+                stack.append(iter(self._deps.get(lib_rel, ())))
+
+        self._resolve_memo[key] = tuple(resolved)
+        return resolved
+
+    def library_versions(self, lib_name) -> list:
+        """rel_paths of all versions of lib_name (trimmed, case-insensitive)."""
+        self.refresh()
+        return [r['rel_path'] for r in self._libs_by_norm.get((lib_name or '').strip().lower(), [])]
+
+    def dependents(self, lib_name) -> list:
+        """Non-library rel_paths depending on lib_name (trimmed, case-insensitive)."""
+        self.refresh()
+        return list(dict.fromkeys(self._dependents_norm.get((lib_name or '').strip().lower(), [])))
+
+    def dependent_counts(self, lib_names) -> dict:
+        """{lib_name: number of dependency entries naming it (exact name)} for non-library items."""
+        self.refresh()
+        return {name: len(self._dependents.get(name, ())) for name in lib_names}
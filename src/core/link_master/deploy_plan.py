@@ -0,0 +1,181 @@
+"""
+Link Master: Deploy Plan
+Complete operation list for one package deployment, computed before the
+target is touched.
+
+Deployer.deploy_with_rules resolves every rule (custom / files / tree /
+filtered folder) into a DeployPlan, then Deployer._execute_plan runs it:
+  1. target directories are created once each (deduplicated, on the caller thread)
+  2. links/copies run in chunks on a bounded worker pool
+  3. targets that already existed are resolved by conflict policy in plan
+     order on the caller thread, then retried on the pool
+
+Deployer.plan() builds the same plan without executing it and fills in the
+estimate fields (conflict actions, bytes to copy) for previews.
+"""
+import os
+import shutil
+
+# Link/copy operations per worker task. Larger chunks mean fewer futures for
+# 100k+ file packages; plans smaller than one chunk run on the caller thread.
+PLAN_CHUNK_SIZE = 256
+
+MODE_SYMLINK = 'symlink'
+MODE_COPY = 'copy'
+
+
+def target_key(path: str) -> str:
+    """Collision key for a target path (case-insensitive on Windows)."""
+    return path.lower() if os.name == 'nt' else path
+
+
+class DeployPlan:
+    """
+    Ordered (source, target, mode) operations plus the directories they need.
+    Targets are hash-indexed, so collision detection and source lookups are O(1)
+    per file. A target claimed twice keeps the first op and is reported in
+    collisions instead of being deployed twice.
+    """
+
+    def __init__(self):
+        self.ops = []           # [(source, target, mode)] in walk order
+        self.mkdirs = set()     # target parent directories
+        self.collisions = []    # [(source_conflicting, target)] rejected by add()
+        self._by_target = {}    # target_key -> op index
+        # Estimates (dry-run only, see Deployer.plan)
+        self.bytes_to_copy = 0
+        self.conflicts = {}     # op index -> 'backup' | 'overwrite' | 'skip' | 'error'
+        self.dirs_to_create = 0
+
+    def add(self, source: str, target: str, mode: str, size: int = None) -> bool:
+        """Appends an op. Returns False (and records a collision) if target is already planned.
+        size: bytes the op will copy, when known (copy mode estimates)."""
+        key = target_key(target)
+        if key in self._by_target:
+            self.collisions.append((source, target))
+            return False
+        self._by_target[key] = len(self.ops)
+        self.ops.append((source, target, mode))
+        if size and mode == MODE_COPY:
+            self.bytes_to_copy += size
+        parent = os.path.dirname(target)
+        if parent:
+            self.mkdirs.add(parent)
+        return True
+
+    def source_for(self, target: str) -> str:
+        """Source planned for target, or None."""
+        idx = self._by_target.get(target_key(target))
+        return self.ops[idx][0] if idx is not None else None
+
+    def collision_report(self) -> list:
+        """Details for DeploymentCollisionError: one dict per rejected op."""
+        return [{
+            'target': tgt,
+            'source_existing': self.source_for(tgt),
+            'source_conflicting': src,
+        } for src, tgt in self.collisions]
+
+    def summary(self) -> dict:
+        """Counts for previews/scheduling. Conflict counts need a Deployer.plan() estimate."""
+        copies = sum(1 for op in self.ops if op[2] == MODE_COPY)
+        actions = list(self.conflicts.values())
+        return {
+            'ops': len(self.ops),
+            'links': len(self.ops) - copies,
+            'copies': copies,
+            'bytes_to_copy': self.bytes_to_copy,
+            'dirs_to_create': self.dirs_to_create,
+            'conflicts': len(actions),
+            'backups': actions.count('backup'),
+            'overwrites': actions.count('overwrite'),
+            'skips': actions.count('skip'),
+            'collisions': len(self.collisions),
+        }
+
+    def chunks(self, indices: list = None) -> list:
+        """Splits ops (or the given op indices) into [(index, source, target, mode)] chunks."""
+        if indices is None:
+            indices = range(len(self.ops))
+        items = [(i,) + self.ops[i] for i in indices]
+        return [items[i:i + PLAN_CHUNK_SIZE] for i in range(0, len(items), PLAN_CHUNK_SIZE)]
+
+    def __len__(self):
+        return len(self.ops)
+
+
+def scan_tree(top: str, with_sizes: bool = False):
+    """
+    os.walk() equivalent (top-down, symlinked dirs listed but not followed) that
+    yields (root, dirs, files, sizes). Prune by assigning to dirs[:].
+    sizes maps file name -> st_size when with_sizes, taken from the same
+    scandir entries (free on Windows, where DirEntry caches stat results).
+    """
+    stack = [top]
+    while stack:
+        root = stack.pop()
+        dirs, files, sizes, links = [], [], {}, set()
+        try:
+            it = os.scandir(root)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry.name)
+                    if entry.is_symlink():
+                        links.add(entry.name)
+                else:
+                    files.append(entry.name)
+                    if with_sizes:
+                        try: sizes[entry.name] = entry.stat().st_size
+                        except OSError: sizes[entry.name] = 0
+        yield root, dirs, files, sizes
+        for name in reversed(dirs):
+            if name not in links:
+                stack.append(os.path.join(root, name))
+
+
+def tree_size(path: str) -> int:
+    """Total file bytes under path (or the file's own size)."""
+    try:
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+    except OSError:
+        return 0
+    return sum(sum(sizes.values()) for _, _, _, sizes in scan_tree(path, with_sizes=True))
+
+
+def execute_op(source: str, target: str, mode: str) -> tuple:
+    """
+    Creates one link or copy. Parent directories must already exist.
+    Returns (status, msg) where status is 'success', 'conflict' or 'error'.
+    Never overwrites: an existing target is reported as 'conflict' so the
+    caller can apply its policy in plan order.
+    """
+    try:
+        if mode == MODE_COPY:
+            if os.path.lexists(target):
+                return 'conflict', None
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+        else:
+            # target_is_directory only matters on Windows; skip the stat elsewhere
+            is_dir = os.path.isdir(source) if os.name == 'nt' else False
+            os.symlink(source, target, target_is_directory=is_dir)
+        return 'success', None
+    except FileExistsError:
+        return 'conflict', None
+    except Exception as e:
+        return 'error', str(e)
+
+
+def execute_chunk(chunk: list) -> list:
+    """Worker task: runs [(index, source, target, mode)] and returns [(index, status, msg)]."""
+    return [(idx,) + execute_op(src, tgt, mode) for idx, src, tgt, mode in chunk]
@@ -4,10 +4,13 @@ import ctypes
 import copy
 import time
 import shutil
+import json
+import hashlib
 from src.core import core_handler
 from concurrent.futures import ThreadPoolExecutor, as_completed
 # FIX: Import safety_block directly as module
 import src.core.link_master.safety_block as safety_verifier
+from src.core.link_master.deploy_plan import DeployPlan, execute_chunk, scan_tree, tree_size, target_key
 
 
 class DeploymentCollisionError(Exception):
@@ -129,6 +132,34 @@ def _parallel_copy_worker(source_path: str, target_path: str, conflict_policy: s
     except Exception as e:
         return {"status": "error", "path": target_path, "msg": str(e)}
 
+# Stat value used for watched paths that do not exist (creating them changes the fingerprint)
+_STAT_MISSING = (0, -1)
+
+def _stat_fingerprint(paths: list) -> tuple:
+    """
+    Cheap change detector for a link status result.
+    Returns (count, newest mtime_ns, hash of path/inode/mtime) over paths.
+    Adding, removing or retargeting an entry updates its parent directory's mtime,
+    so stat'ing the directories a status walk visited revalidates it without re-walking.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    max_mtime = 0
+    for p in paths:
+        try:
+            st = os.stat(p)
+            ino, mtime = st.st_ino, st.st_mtime_ns
+        except OSError:
+            ino, mtime = _STAT_MISSING
+        max_mtime = max(max_mtime, mtime)
+        h.update(f"{p}|{ino}|{mtime}\n".encode('utf-8', 'surrogatepass'))
+    return len(paths), max_mtime, h.hexdigest()
+
+def _rule_hash(deploy_rule: str, transfer_mode: str, rules) -> str:
+    """Stable hash of everything besides the paths that affects a status result."""
+    payload = json.dumps([deploy_rule, transfer_mode, rules or {}], sort_keys=True, default=str)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
 class Deployer:
     def __init__(self, app_name: str = None):
         self.logger = logging.getLogger("LinkMasterDeployer")
@@ -139,10 +170,12 @@ class Deployer:
         self.max_workers = min(count, 60)
         self.allow_symlinks = True  # Phase 1: Set by LinkMasterWindow based on capability test
         self._db_instance = None
-        
-        # Phase 58: Performance Optimization - Link Status Cache
-        # Stores {cache_key: (timestamp, src_mtime, tgt_mtime, result)}
-        self._status_cache = {}
+
+        # Link status for walk-based rules is persisted in lm_link_status_index
+        # (see get_link_status / _lookup_status_index).
+
+        # Phase 42: Package being deployed (for lm_deployed_files registration)
+        self._pkg_rel = None
     
     @property
     def _db(self):
@@ -155,6 +188,67 @@ class Deployer:
     def clear_actions(self):
         self.last_actions = []
 
+    def fork(self) -> 'Deployer':
+        """
+        Independent Deployer for a worker thread: own action log and package
+        context, same settings and DB instance.
+        """
+        other = Deployer(self._app_name)
+        other.max_workers = self.max_workers
+        other.allow_symlinks = self.allow_symlinks
+        other._db_instance = self._db_instance
+        return other
+
+    def _register_deployed(self, target_path: str, source_path: str, deploy_type: str):
+        """Phase 42: Register a single deployment under the current package."""
+        if not self._pkg_rel: return
+        self._db.register_deployed_file(target_path, source_path, self._pkg_rel, deploy_type=deploy_type)
+
+    # --- Persistent Link Status Index ---
+    def _index_path(self, path: str) -> str:
+        return self._normalize_path(path).replace('\\', '/').rstrip('/')
+
+    def _lookup_status_index(self, index_key: tuple):
+        """Returns the stored status for index_key if its stat fingerprint still matches."""
+        try:
+            entry = self._db.get_link_status_entry(*index_key)
+            if not entry: return None
+            watch_paths = json.loads(entry['watch_paths'] or '[]')
+            if _stat_fingerprint(watch_paths) != (entry['fp_count'], entry['fp_mtime'], entry['fp_hash']):
+                return None
+            return json.loads(entry['result'])
+        except Exception as e:
+            self.logger.debug(f"Link status index lookup failed: {e}")
+            return None
+
+    def _store_status_index(self, index_key: tuple, watch_paths: set, res: dict):
+        try:
+            watch_list = sorted(watch_paths)
+            self._db.put_link_status_entry(*index_key, _stat_fingerprint(watch_list), watch_list, res)
+        except Exception as e:
+            self.logger.debug(f"Link status index store failed: {e}")
+
+    def invalidate_link_status(self, source_paths=(), target_paths=()):
+        """
+        Drops persisted link status for packages deployed from source_paths or into
+        target_paths. Target paths also invalidate their ancestors, since a removed
+        file may belong to a tree/custom deployment rooted higher up.
+        """
+        sources = {self._index_path(p) for p in source_paths if p}
+        targets = set()
+        for p in target_paths:
+            if not p: continue
+            cur = self._index_path(p)
+            while cur and cur not in targets:
+                targets.add(cur)
+                parent = os.path.dirname(cur)
+                if parent == cur: break
+                cur = parent
+        try:
+            self._db.invalidate_link_status(sources, targets)
+        except Exception as e:
+            self.logger.debug(f"Link status index invalidation failed: {e}")
+
     def _is_admin(self):
         try:
             return ctypes.windll.shell32.IsUserAnAdmin()
@@ -194,8 +288,7 @@ class Deployer:
             self.logger.info(f"Symlink created ({'Dir' if is_dir else 'File'}): {target_link_path} -> {source_path}")
             
             # Phase 42: Register deployment
-            if hasattr(self, '_pkg_rel'):
-                self._db.register_deployed_file(target_link_path, source_path, self._pkg_rel, deploy_type='symlink')
+            self._register_deployed(target_link_path, source_path, 'symlink')
                 
             return True
         except OSError as e:
@@ -240,8 +333,7 @@ class Deployer:
                 self.logger.info(f"File copied: {source_path} -> {target_path}")
             
             # Phase 42: Register in DB (New standard)
-            if hasattr(self, '_pkg_rel'):
-                self._db.register_deployed_file(target_path, source_path, self._pkg_rel, deploy_type='copy')
+            self._register_deployed(target_path, source_path, 'copy')
             
             return True
         except Exception as e:
@@ -249,8 +341,9 @@ class Deployer:
             return False
     
 
-    def _handle_conflict(self, path: str, policy: str) -> str:
-        """Handles existing path according to policy. Returns action taken: 'backup', 'overwrite', 'skip', 'error', 'none'."""
+    def _handle_conflict(self, path: str, policy: str, is_ours: bool = None) -> str:
+        """Handles existing path according to policy. Returns action taken: 'backup', 'overwrite', 'skip', 'error', 'none'.
+        is_ours: pre-fetched ledger ownership (batch callers); queried from the DB when None."""
         if policy == 'skip':
             self.logger.info(f"Policy: SKIP - preserving {path}")
             self.last_actions.append({'type': 'skip', 'path': path})
@@ -270,7 +363,9 @@ class Deployer:
             # Phase 42: Prevent infinite backups
             # If the file is already registered as 'ours', overwrite it instead of backing up.
             try:
-                if self._db.is_file_ours(path):
+                if is_ours is None:
+                    is_ours = self._db.is_file_ours(path)
+                if is_ours:
                     self.logger.info(f"Policy: BACKUP - Path '{path}' is already registered as our deployment. Overwriting instead of creating redundant backup.")
                     core_handler.remove_path(path)
                     return 'overwrite'
@@ -313,6 +408,8 @@ class Deployer:
              self.logger.debug(f"Link/Target not found to remove: {target_link_path}")
              return True
         
+        self.invalidate_link_status([source_path_hint], [target_link_path])
+        
         if os.path.islink(target_link_path):
             try:
                 os.unlink(target_link_path)
@@ -458,26 +555,23 @@ class Deployer:
         Returns {'status': 'linked'|'conflict'|'none', 'type': 'symlink'|'junction'|'file'|'dir'}
         """
         # -------------------------------------------------------------------------
-        # 🚨 Phase 58: MTIME-BASED CACHING (Optimization for recurring scans)
+        # Persistent Link Status Index (walk-based rules only)
         # -------------------------------------------------------------------------
-        cache_key = (target_link_path, expected_source, deploy_rule)
-        now = time.time()
-        
-        def get_mtime(p):
-            try: return os.path.getmtime(p) if os.path.exists(p) else 0
-            except: return 0
-
-        if cache_key in self._status_cache:
-            c_time, c_src_m, c_tgt_m, c_res = self._status_cache[cache_key]
-            if now - c_time < 0.8: 
-                return c_res
-            
-            src_m = get_mtime(expected_source) if expected_source else 0
-            tgt_m = get_mtime(target_link_path)
-            
-            if src_m == c_src_m and tgt_m == c_tgt_m:
-                self._status_cache[cache_key] = (now, src_m, tgt_m, c_res)
-                return c_res
+        # Symlink checks cost a few syscalls. tree/custom/files rules and folder copies
+        # walk the whole package, so those results are stored in lm_link_status_index
+        # together with the directories the walk visited (watch_paths), and reused while
+        # re-stat'ing those directories yields the same fingerprint.
+        index_key = None
+        watch_paths = set()
+        if expected_source and os.path.isdir(expected_source) and os.path.exists(target_link_path):
+            target_is_link = os.path.islink(target_link_path)
+            if (deploy_rule in ('files', 'custom') or (deploy_rule == 'tree' and not target_is_link)) or \
+               (deploy_rule == 'folder' and expected_transfer_mode == 'copy' and not target_is_link and os.path.isdir(target_link_path)):
+                index_key = (self._index_path(expected_source), self._index_path(target_link_path),
+                             _rule_hash(deploy_rule, expected_transfer_mode, rules))
+                cached = self._lookup_status_index(index_key)
+                if cached is not None:
+                    return cached
 
         # -------------------------------------------------------------------------
         # Core Detection Logic
@@ -508,6 +602,7 @@ class Deployer:
                  if deploy_rule == 'custom':
                      if not rules and os.path.isdir(expected_source):
                          json_path = os.path.join(expected_source, 'deployment.json')
+                         watch_paths.add(json_path)  # Editing the auto-loaded rules invalidates the index
                          if os.path.exists(json_path):
                              try:
                                  import json
@@ -523,6 +618,7 @@ class Deployer:
                      import fnmatch
                      if deploy_rule in ('tree', 'custom'):
                          for root, dirs, files in os.walk(expected_source):
+                             watch_paths.add(root)
                              rel_dir = os.path.relpath(root, expected_source).replace('\\', '/')
                              if rel_dir == ".": rel_dir = ""
                              for name in files:
@@ -546,6 +642,7 @@ class Deployer:
                                  if item_tgt is None:
                                      item_tgt = os.path.join(target_link_path, rel_path.replace('/', os.sep))
                                  item_tgt = os.path.normpath(item_tgt)
+                                 watch_paths.add(os.path.dirname(item_tgt))
                                  is_valid = False
                                  if os.path.islink(item_tgt):
                                      real = os.readlink(item_tgt)
@@ -559,6 +656,7 @@ class Deployer:
                                  if not is_valid and len(missing_samples) < 3:
                                      missing_samples.append(rel_path)
                      else: # files mode
+                         watch_paths.update((expected_source, target_link_path))
                          for f in os.listdir(expected_source):
                              item_src = os.path.join(expected_source, f)
                              if not os.path.isfile(item_src): continue
@@ -578,7 +676,7 @@ class Deployer:
                                  is_valid = True
                              if not is_valid and len(missing_samples) < 3:
                                  missing_samples.append(f)
-                 except: pass
+                 except: index_key = None  # Incomplete walk, don't persist
                  
                  res = {
                      "status": "none", 
@@ -615,6 +713,8 @@ class Deployer:
                     missing_samples = []
                     for root, dirs, files in os.walk(expected_source):
                         rel_dir = os.path.relpath(root, expected_source).replace('\\', '/')
+                        watch_paths.add(root)
+                        watch_paths.add(os.path.normpath(os.path.join(target_link_path, rel_dir)))
                         for name in files + dirs:
                             rel_path = name if rel_dir == "." else f"{rel_dir}/{name}"
                             files_total += 1
@@ -628,7 +728,9 @@ class Deployer:
                              res = {"status": "partial", "type": "copy", "missing_samples": missing_samples, "files_found": files_found, "files_total": files_total, "is_intentional": False}
                         else: res = {"status": "none", "type": "copy", "files_found": 0, "files_total": files_total, "is_intentional": False}
                     else: res = {"status": "none", "type": "copy", "files_found": 0, "files_total": files_total, "is_intentional": False}
-                except: res = {"status": "none", "type": "dir", "is_intentional": False}
+                except:
+                    res = {"status": "none", "type": "dir", "is_intentional": False}
+                    index_key = None
         else:
             # Fallback symlink/copy check
             if os.path.islink(target_link_path):
@@ -644,10 +746,9 @@ class Deployer:
                 else:
                     res = {"status": "none", "type": "exists_no_meta"}
 
-        # Final Cache Update
-        src_m = get_mtime(expected_source) if expected_source else 0
-        tgt_m = get_mtime(target_link_path)
-        self._status_cache[cache_key] = (now, src_m, tgt_m, res)
+        # Persist walk-based results
+        if index_key is not None:
+            self._store_status_index(index_key, watch_paths, res)
         return res
 
     
@@ -666,6 +767,8 @@ class Deployer:
              self.logger.debug(f"Target does not exist, nothing to undeploy: {target_path}")
              return False
         
+        self.invalidate_link_status(target_paths=[target_path])
+        
         # If it's a symlink, this is wrong - should use _cleanup_link
         if os.path.islink(target_path):
              self.logger.warning(f"Target is a symlink, use _cleanup_link instead: {target_path}")
@@ -750,25 +853,11 @@ class Deployer:
         Deploys source to target using specified rules.
         Supports 'custom' mode which allows mixed symlink/copy based on JSON rules.
         """
-        import json
+        # Phase 42: Store package info for ledger registration (all modes)
+        self._pkg_rel = package_rel_path
+        self.invalidate_link_status([source_path], [target_link_path])
         
-        # Ensure rules is a dict (handle potential string input for robustness)
-        if isinstance(rules, str):
-            try: rules = json.loads(rules)
-            except: 
-                self.logger.error(f"Invalid rules JSON: {rules}")
-                rules = {}
-        
-        # Phase 51: Auto-load rules if missing in Custom Mode
-        if deploy_rule == 'custom' and not rules:
-            json_path = os.path.join(source_path, 'deployment.json')
-            if os.path.exists(json_path):
-                try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        rules = json.load(f)
-                    self.logger.info(f"Auto-loaded deployment.json for {source_path}")
-                except Exception as e:
-                    self.logger.warning(f"Failed to auto-load deployment.json: {e}")
+        rules = self._load_rules(source_path, rules, deploy_rule)
         
         # 1. Custom Mode Logic
         if deploy_rule == 'custom':
@@ -786,107 +875,12 @@ class Deployer:
                     os.makedirs(target_link_path, exist_ok=True)
             except: pass
 
-            success_all = True
-            
-            # Use 'exclude' list from rules
-            import fnmatch
-            excludes = rules.get('exclude', []) if (rules and isinstance(rules, dict)) else []
-            t_overrides = rules.get('transfer_overrides', {}) if (rules and isinstance(rules, dict)) else {}
-            # 🚨 PATH OVERRIDES: For redirecting files/folders to different target paths
-            path_overrides = rules.get('overrides', rules.get('rename', {})) if (rules and isinstance(rules, dict)) else {}
+            # Planning phase: resolve every file's target and mode before touching the target
+            plan = self._plan_custom(source_path, target_link_path, rules, transfer_mode)
             
-            self.logger.info(f"[Custom Deploy] Starting: source={source_path}, target={target_link_path}")
-            self.logger.info(f"[Custom Deploy] Rules: excludes={excludes}, path_overrides={list(path_overrides.keys())}, transfer_overrides={list(t_overrides.keys())}")
-
-            # 🚨 FIX: Use os.walk() to recursively traverse, maintaining relative path structure
-            for root, dirs, files in os.walk(source_path):
-                # Calculate relative path from source root
-                rel_dir = os.path.relpath(root, source_path).replace('\\', '/')
-                if rel_dir == ".":
-                    rel_dir = ""
-                
-                # Filter dirs for walk optimization (exclude patterns)
-                dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, pat) for pat in excludes)]
-                
-                for item_name in files:
-                    # Build relative path for this file
-                    rel_path = f"{rel_dir}/{item_name}" if rel_dir else item_name
-                    
-                    # Exclude Check
-                    if excludes and any(fnmatch.fnmatch(rel_path, pat) or fnmatch.fnmatch(item_name, pat) for pat in excludes):
-                        self.logger.debug(f"[Custom Deploy] EXCLUDED: {rel_path}")
-                        continue
-
-                    src_item = os.path.join(root, item_name)
-                    
-                    # 🚨 PATH OVERRIDE CHECK: Check if this file or its parent folder has a path override
-                    dst_item = None
-                    override_applied = None
-                    
-                    # Priority 1: Exact file path match
-                    if rel_path in path_overrides:
-                        override_target = path_overrides[rel_path]
-                        dst_item = override_target
-                        override_applied = f"file exact match: {rel_path}"
-                    
-                    # Priority 2: Parent folder match (e.g., "Shaders" matches "Shaders/file.txt")
-                    if dst_item is None and rel_dir:
-                        # Check each level of the directory hierarchy
-                        path_parts = rel_dir.split('/')
-                        for i in range(len(path_parts), 0, -1):
-                            check_dir = '/'.join(path_parts[:i])
-                            if check_dir in path_overrides:
-                                override_target = path_overrides[check_dir]
-                                # Calculate remaining path after the matched folder
-                                remaining = '/'.join(path_parts[i:])
-                                if remaining:
-                                    dst_item = os.path.join(override_target, remaining, item_name)
-                                else:
-                                    dst_item = os.path.join(override_target, item_name)
-                                override_applied = f"folder match: {check_dir} -> {override_target}"
-                                break
-                    
-                    # Priority 3: Default - maintain relative path structure
-                    if dst_item is None:
-                        dst_item = os.path.join(target_link_path, rel_path.replace('/', os.sep))
-                        override_applied = "default (no override)"
-                    
-                    # Normalize the destination path
-                    dst_item = os.path.normpath(dst_item)
-                    
-                    item_mode = transfer_mode  # Default to App Default
-                    
-                    # Check transfer mode overrides (symlink/copy switch)
-                    if rel_path in t_overrides:
-                        val = t_overrides[rel_path]
-                        if val in ['copy', 'symlink']:
-                            item_mode = val
-                    elif item_name in t_overrides:
-                        val = t_overrides[item_name]
-                        if val in ['copy', 'symlink']:
-                            item_mode = val
-                    
-                    # 🚨 DETAILED PATH DECISION LOG
-                    self.logger.info(f"[Custom Deploy] PATH DECISION: rel_path={rel_path}, override={override_applied}, mode={item_mode}")
-                    self.logger.info(f"[Custom Deploy]   src: {src_item}")
-                    self.logger.info(f"[Custom Deploy]   dst: {dst_item}")
-                    
-                    # Ensure parent directory exists
-                    dst_parent = os.path.dirname(dst_item)
-                    if dst_parent and not os.path.exists(dst_parent):
-                        os.makedirs(dst_parent, exist_ok=True)
-                                
-                    # Execute Deployment
-                    res = False
-                    if item_mode == 'copy':
-                        res = self.deploy_copy(src_item, dst_item, conflict_policy)
-                    else:
-                        res = self.deploy_link(src_item, dst_item, conflict_policy)
-                    
-                    if not res:
-                        success_all = False
-                
-            return success_all
+            # Execution phase
+            results = self._execute_plan(plan, conflict_policy)
+            return all(r['status'] == 'success' for r in results)
 
         # 2. Flat (Files) Mode
         if deploy_rule == 'files':
@@ -895,49 +889,13 @@ class Deployer:
                  if not os.path.exists(target_link_path): os.makedirs(target_link_path, exist_ok=True)
              except: pass
              
-             success_all = True
-             for item_name in os.listdir(source_path):
-                 src_item = os.path.join(source_path, item_name)
-                 dst_item = os.path.join(target_link_path, item_name)
-                 
-                 res = False
-                 if transfer_mode == 'copy':
-                     res = self.deploy_copy(src_item, dst_item, conflict_policy)
-                 else:
-                     res = self.deploy_link(src_item, dst_item, conflict_policy)
-                 if not res: success_all = False
-             return success_all
+             plan = self._plan_files(source_path, target_link_path, transfer_mode)
+             results = self._execute_plan(plan, conflict_policy)
+             return all(r['status'] == 'success' for r in results)
         
         # 3. Default Folder/Tree Mode logic (Standard single link/copy)
-        # Phase 42: Store package info for workers
-        self._pkg_rel = package_rel_path
-        
-        # 1.1. Resolve Rule (Phase 5 Logic)
-        resolved_rule = deploy_rule
-        if not resolved_rule or resolved_rule == 'inherit':
-            # This is expected to be handled by the caller (batch_ops) 
-            # by looking up the app-specific default for target A/B/C.
-            # If we reach here with 'inherit', default to 'folder'.
-            resolved_rule = 'folder'
-
-        # 2. Determine Real Transfer Mode
-        real_mode = transfer_mode
-        if real_mode == 'symlink' and not self.allow_symlinks:
-            self.logger.info("Symlinks not available on this system. Falling back to COPY mode.")
-            real_mode = 'copy'
-            
-        # 3. Quick Path for Folder-level operations
-        # JSON-based excludes/overrides/skip_levels are strictly Custom/Tree Mode features
-        is_custom = resolved_rule == 'custom'
-        is_tree = resolved_rule == 'tree'
-        
-        excludes = rules.get('exclude', []) if is_custom else []
-        overrides = rules.get('overrides', rules.get('rename', {})) if is_custom else {}
-        skip_levels = int(rules.get('skip_levels', 0)) if is_custom else 0
-        
-        has_complex_filters = (isinstance(excludes, list) and len(excludes) > 0) or \
-                              (isinstance(overrides, dict) and len(overrides) > 0) or \
-                              (skip_levels > 0)
+        resolved_rule, real_mode, excludes, overrides, skip_levels, has_complex_filters = \
+            self._resolve_rule_params(deploy_rule, transfer_mode, rules)
         
         # Phase 57 OPTIMIZATION: 'tree' mode can also use folder-level linking if no complex filters
         # This is MUCH faster than iterating through every file for large folders
@@ -963,84 +921,20 @@ class Deployer:
         # Ensure target dir exists
         os.makedirs(target_link_path, exist_ok=True)
 
-        files_to_deploy = []
         try:
-            for root, dirs, files in os.walk(source_path):
-                # Calculate base relative path from source root
-                rel_root = os.path.relpath(root, source_path).replace('\\', '/')
-                if rel_root == ".": rel_root = ""
-                
-                # Filter dirs for walk optimization
-                dirs[:] = [d for d in dirs if not self._is_excluded((f"{rel_root}/{d}" if rel_root else d), excludes)]
-                
-                start_lvl = 0
-                if rel_root:
-                    start_lvl = len(rel_root.split('/'))
-                
-                # Skip levels check
-                if start_lvl < skip_levels:
-                    # If we are below skip levels, we don't deploy files here, 
-                    # but we continue walking into subdirs
-                    # Note: dirs are already filtered above
-                    continue
-
-                for name in files:
-                    rel_path = f"{rel_root}/{name}" if rel_root else name
-                    
-                    if self._is_excluded(rel_path, excludes):
-                        continue
-                        
-                    # Check overrides/renames
-                    deploy_path = rel_path
-                    if resolved_rule == 'custom' and rel_path in overrides:
-                         deploy_path = overrides[rel_path]
-                    
-                    # 🚨 NEW: Handle 'files' (Flatten) mode - strip directory structure
-                    if resolved_rule == 'files':
-                        deploy_path = name
-
-                    # Determine target path
-                    # Adjust for skip levels: remove first N components
-                    if skip_levels > 0 and resolved_rule != 'files':
-                        parts = deploy_path.split('/')
-                        if len(parts) > skip_levels:
-                            deploy_path = '/'.join(parts[skip_levels:])
-                        else:
-                            continue # Should be covered by dir continue, but safety
-                    
-                    full_target = os.path.join(target_link_path, deploy_path.replace('/', os.sep))
-                    src_full = os.path.join(root, name)
-                    files_to_deploy.append((src_full, full_target))
+            plan = self._plan_partial(source_path, target_link_path, resolved_rule, real_mode,
+                                      excludes, overrides, skip_levels)
 
             # Phase 45 Checks for Collisions and Safety
-            # Check collisions
-            unique_targets = {}
-            collisions = []
-            for src, tgt in files_to_deploy:
-                tgt_norm = tgt.lower() if os.name == 'nt' else tgt
-                
-                if tgt_norm in unique_targets:
-                    collisions.append((src, tgt)) 
-                else:
-                    unique_targets[tgt_norm] = src
-
-            if collisions:
-                self.logger.warning(f"Aborting deployment due to {len(collisions)} collisions.")
-                detailed_collisions = []
-                for src_new, tgt_new in collisions:
-                    tgt_norm = tgt_new.lower() if os.name == 'nt' else tgt_new
-                    src_existing = unique_targets[tgt_norm]
-                    detailed_collisions.append({
-                        'target': tgt_new,
-                        'source_existing': src_existing,
-                        'source_conflicting': src_new
-                    })
-                raise DeploymentCollisionError(detailed_collisions)
+            # Check collisions (detected by the plan's target index while planning)
+            if plan.collisions:
+                self.logger.warning(f"Aborting deployment due to {len(plan.collisions)} collisions.")
+                raise DeploymentCollisionError(plan.collision_report())
 
             # Phase 45 CRITICAL: Atomic Safety Check
             # Use safety_verifier (imported at module level)
             safety_issues = []
-            for src, tgt in files_to_deploy:
+            for src, tgt, _ in plan.ops:
                 # Check target path safety
                 if not safety_verifier.verify_safety(tgt, operation='deploy', silent=True, logger=self.logger):
                    safety_issues.append(tgt)
@@ -1050,28 +944,11 @@ class Deployer:
                 self.logger.error(f"First violation: {safety_issues[0]}")
                 return False
 
-            if not files_to_deploy:
+            if not plan.ops:
                 return True # Nothing to do after filtering
 
-            if real_mode == 'copy':
-                self.logger.info(f"Parallel bulk copy: {len(files_to_deploy)} files")
-                results = self.deploy_copies_batch(files_to_deploy, conflict_policy)
-                # Phase X: Save metadata to facilitate unlinking and status check
-                # Check for overall success in results
-                any_success = any(r['status'] == 'success' for r in results)
-                # Phase 42: Register all successful files in DB
-                for res in results:
-                    if res.get('status') == 'success' and package_rel_path:
-                        self._db.register_deployed_file(res['path'], res.get('source', ''), package_rel_path, deploy_type='copy')
-            else:
-                self.logger.info(f"Parallel bulk symlink: {len(files_to_deploy)} files")
-                results = self.deploy_links_batch(files_to_deploy, conflict_policy)
-                
-                # Phase 42: Register all successful symlinks in DB
-                for res in results:
-                    if res.get('status') == 'success' and package_rel_path:
-                        source_map = {tgt: src for src, tgt in files_to_deploy}
-                        self._db.register_deployed_file(res['path'], source_map.get(res['path'], ''), package_rel_path, deploy_type='symlink')
+            self.logger.info(f"Parallel bulk {real_mode}: {len(plan)} files")
+            results = self._execute_plan(plan, conflict_policy)
             
             # Check for generic failure
             success = True
@@ -1087,6 +964,368 @@ class Deployer:
             
         return success
 
+    def plan(self, source_path: str, target_link_path: str, rules: dict = None,
+             deploy_rule: str = 'inherit', transfer_mode: str = 'symlink',
+             conflict_policy: str = 'backup') -> DeployPlan:
+        """
+        Dry-run of deploy_with_rules: returns the DeployPlan it would execute,
+        with conflict actions and cost estimates filled in (see DeployPlan.summary()).
+        Only reads the filesystem and the deployment ledger.
+        """
+        rules = self._load_rules(source_path, rules, deploy_rule)
+        
+        if not os.path.exists(source_path):
+            return DeployPlan()
+        
+        if deploy_rule == 'custom' and os.path.isdir(source_path):
+            plan = self._plan_custom(source_path, target_link_path, rules, transfer_mode, with_sizes=True)
+        elif deploy_rule == 'files':
+            plan = self._plan_files(source_path, target_link_path, transfer_mode, with_sizes=True) \
+                if os.path.isdir(source_path) else DeployPlan()
+        else:
+            if deploy_rule == 'custom':  # Single file source
+                resolved_rule, real_mode, has_complex_filters = 'folder', transfer_mode, False
+            else:
+                resolved_rule, real_mode, excludes, overrides, skip_levels, has_complex_filters = \
+                    self._resolve_rule_params(deploy_rule, transfer_mode, rules)
+            if resolved_rule in ('folder', 'tree') and not has_complex_filters:
+                # Folder-level link/copy: a single op
+                plan = DeployPlan()
+                size = tree_size(source_path) if real_mode == 'copy' else None
+                plan.add(source_path, target_link_path, real_mode, size=size)
+            else:
+                plan = self._plan_partial(source_path, target_link_path, resolved_rule, real_mode,
+                                          excludes, overrides, skip_levels, with_sizes=True)
+        
+        self._estimate_plan(plan, conflict_policy)
+        return plan
+
+    def _load_rules(self, source_path: str, rules, deploy_rule: str) -> dict:
+        """Parses rules JSON strings and auto-loads deployment.json for custom mode."""
+        # Ensure rules is a dict (handle potential string input for robustness)
+        if isinstance(rules, str):
+            try: rules = json.loads(rules)
+            except: 
+                self.logger.error(f"Invalid rules JSON: {rules}")
+                rules = {}
+        
+        # Phase 51: Auto-load rules if missing in Custom Mode
+        if deploy_rule == 'custom' and not rules:
+            json_path = os.path.join(source_path, 'deployment.json')
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, 'r', encoding='utf-8') as f:
+                        rules = json.load(f)
+                    self.logger.info(f"Auto-loaded deployment.json for {source_path}")
+                except Exception as e:
+                    self.logger.warning(f"Failed to auto-load deployment.json: {e}")
+        return rules
+
+    def _resolve_rule_params(self, deploy_rule: str, transfer_mode: str, rules) -> tuple:
+        """Returns (resolved_rule, real_mode, excludes, overrides, skip_levels, has_complex_filters)."""
+        # 1.1. Resolve Rule (Phase 5 Logic)
+        resolved_rule = deploy_rule
+        if not resolved_rule or resolved_rule == 'inherit':
+            # This is expected to be handled by the caller (batch_ops) 
+            # by looking up the app-specific default for target A/B/C.
+            # If we reach here with 'inherit', default to 'folder'.
+            resolved_rule = 'folder'
+
+        # 2. Determine Real Transfer Mode
+        real_mode = transfer_mode
+        if real_mode == 'symlink' and not self.allow_symlinks:
+            self.logger.info("Symlinks not available on this system. Falling back to COPY mode.")
+            real_mode = 'copy'
+            
+        # 3. Quick Path for Folder-level operations
+        # JSON-based excludes/overrides/skip_levels are strictly Custom/Tree Mode features
+        is_custom = resolved_rule == 'custom'
+        
+        excludes = rules.get('exclude', []) if is_custom else []
+        overrides = rules.get('overrides', rules.get('rename', {})) if is_custom else {}
+        skip_levels = int(rules.get('skip_levels', 0)) if is_custom else 0
+        
+        has_complex_filters = (isinstance(excludes, list) and len(excludes) > 0) or \
+                              (isinstance(overrides, dict) and len(overrides) > 0) or \
+                              (skip_levels > 0)
+        return resolved_rule, real_mode, excludes, overrides, skip_levels, has_complex_filters
+
+    def _plan_custom(self, source_path: str, target_link_path: str, rules, transfer_mode: str,
+                     with_sizes: bool = False) -> DeployPlan:
+        """Planning phase for 'custom' rules (excludes, path overrides, per-item transfer mode)."""
+        # Use 'exclude' list from rules
+        import fnmatch
+        excludes = rules.get('exclude', []) if (rules and isinstance(rules, dict)) else []
+        t_overrides = rules.get('transfer_overrides', {}) if (rules and isinstance(rules, dict)) else {}
+        # 🚨 PATH OVERRIDES: For redirecting files/folders to different target paths
+        path_overrides = rules.get('overrides', rules.get('rename', {})) if (rules and isinstance(rules, dict)) else {}
+        
+        self.logger.info(f"[Custom Deploy] Planning: source={source_path}, target={target_link_path}")
+        self.logger.info(f"[Custom Deploy] Rules: excludes={excludes}, path_overrides={list(path_overrides.keys())}, transfer_overrides={list(t_overrides.keys())}")
+
+        plan = DeployPlan()
+        
+        # 🚨 FIX: Walk recursively (single scandir pass per directory), maintaining relative path structure
+        for root, dirs, files, sizes in scan_tree(source_path, with_sizes):
+            # Calculate relative path from source root
+            rel_dir = os.path.relpath(root, source_path).replace('\\', '/')
+            if rel_dir == ".":
+                rel_dir = ""
+            
+            # Filter dirs for walk optimization (exclude patterns)
+            dirs[:] = [d for d in dirs if not any(fnmatch.fnmatch(d, pat) for pat in excludes)]
+            
+            for item_name in files:
+                # Build relative path for this file
+                rel_path = f"{rel_dir}/{item_name}" if rel_dir else item_name
+                
+                # Exclude Check
+                if excludes and any(fnmatch.fnmatch(rel_path, pat) or fnmatch.fnmatch(item_name, pat) for pat in excludes):
+                    self.logger.debug(f"[Custom Deploy] EXCLUDED: {rel_path}")
+                    continue
+
+                src_item = os.path.join(root, item_name)
+                
+                # 🚨 PATH OVERRIDE CHECK: Check if this file or its parent folder has a path override
+                dst_item = None
+                override_applied = None
+                
+                # Priority 1: Exact file path match
+                if rel_path in path_overrides:
+                    override_target = path_overrides[rel_path]
+                    dst_item = override_target
+                    override_applied = f"file exact match: {rel_path}"
+                
+                # Priority 2: Parent folder match (e.g., "Shaders" matches "Shaders/file.txt")
+                if dst_item is None and rel_dir:
+                    # Check each level of the directory hierarchy
+                    path_parts = rel_dir.split('/')
+                    for i in range(len(path_parts), 0, -1):
+                        check_dir = '/'.join(path_parts[:i])
+                        if check_dir in path_overrides:
+                            override_target = path_overrides[check_dir]
+                            # Calculate remaining path after the matched folder
+                            remaining = '/'.join(path_parts[i:])
+                            if remaining:
+                                dst_item = os.path.join(override_target, remaining, item_name)
+                            else:
+                                dst_item = os.path.join(override_target, item_name)
+                            override_applied = f"folder match: {check_dir} -> {override_target}"
+                            break
+                
+                # Priority 3: Default - maintain relative path structure
+                if dst_item is None:
+                    dst_item = os.path.join(target_link_path, rel_path.replace('/', os.sep))
+                    override_applied = "default (no override)"
+                
+                # Normalize the destination path
+                dst_item = os.path.normpath(dst_item)
+                
+                item_mode = transfer_mode  # Default to App Default
+                
+                # Check transfer mode overrides (symlink/copy switch)
+                if rel_path in t_overrides:
+                    val = t_overrides[rel_path]
+                    if val in ['copy', 'symlink']:
+                        item_mode = val
+                elif item_name in t_overrides:
+                    val = t_overrides[item_name]
+                    if val in ['copy', 'symlink']:
+                        item_mode = val
+                
+                # 🚨 DETAILED PATH DECISION LOG (debug: one line per file adds up on large packages)
+                self.logger.debug(f"[Custom Deploy] PATH DECISION: rel_path={rel_path}, override={override_applied}, mode={item_mode}")
+                self.logger.debug(f"[Custom Deploy]   src: {src_item}")
+                self.logger.debug(f"[Custom Deploy]   dst: {dst_item}")
+                
+                if not plan.add(src_item, dst_item, item_mode, size=sizes.get(item_name)):
+                    self.logger.warning(f"[Custom Deploy] Target already claimed by {plan.source_for(dst_item)}, skipping: {src_item}")
+        return plan
+
+    def _plan_files(self, source_path: str, target_link_path: str, transfer_mode: str,
+                    with_sizes: bool = False) -> DeployPlan:
+        """Planning phase for 'files' rules: every top-level entry of source, by name."""
+        plan = DeployPlan()
+        item_mode = 'copy' if transfer_mode == 'copy' else 'symlink'
+        for item_name in os.listdir(source_path):
+            src_item = os.path.join(source_path, item_name)
+            size = tree_size(src_item) if (with_sizes and item_mode == 'copy') else None
+            plan.add(src_item, os.path.join(target_link_path, item_name), item_mode, size=size)
+        return plan
+
+    def _plan_partial(self, source_path: str, target_link_path: str, resolved_rule: str, real_mode: str,
+                      excludes: list, overrides: dict, skip_levels: int, with_sizes: bool = False) -> DeployPlan:
+        """Planning phase for file-level 'tree'/'folder' deployments with filters."""
+        plan = DeployPlan()
+        for root, dirs, files, sizes in scan_tree(source_path, with_sizes):
+            # Calculate base relative path from source root
+            rel_root = os.path.relpath(root, source_path).replace('\\', '/')
+            if rel_root == ".": rel_root = ""
+            
+            # Filter dirs for walk optimization
+            dirs[:] = [d for d in dirs if not self._is_excluded((f"{rel_root}/{d}" if rel_root else d), excludes)]
+            
+            start_lvl = 0
+            if rel_root:
+                start_lvl = len(rel_root.split('/'))
+            
+            # Skip levels check
+            if start_lvl < skip_levels:
+                # If we are below skip levels, we don't deploy files here, 
+                # but we continue walking into subdirs
+                # Note: dirs are already filtered above
+                continue
+
+            for name in files:
+                rel_path = f"{rel_root}/{name}" if rel_root else name
+                
+                if self._is_excluded(rel_path, excludes):
+                    continue
+                    
+                # Check overrides/renames
+                deploy_path = rel_path
+                if resolved_rule == 'custom' and rel_path in overrides:
+                     deploy_path = overrides[rel_path]
+                
+                # 🚨 NEW: Handle 'files' (Flatten) mode - strip directory structure
+                if resolved_rule == 'files':
+                    deploy_path = name
+
+                # Determine target path
+                # Adjust for skip levels: remove first N components
+                if skip_levels > 0 and resolved_rule != 'files':
+                    parts = deploy_path.split('/')
+                    if len(parts) > skip_levels:
+                        deploy_path = '/'.join(parts[skip_levels:])
+                    else:
+                        continue # Should be covered by dir continue, but safety
+                
+                full_target = os.path.join(target_link_path, deploy_path.replace('/', os.sep))
+                src_full = os.path.join(root, name)
+                plan.add(src_full, full_target, real_mode, size=sizes.get(name))
+        return plan
+
+    def _estimate_plan(self, plan: DeployPlan, conflict_policy: str):
+        """
+        Fills plan.conflicts and plan.dirs_to_create without modifying anything.
+        Existing targets are found with one scandir per target directory rather
+        than one lexists() per op.
+        """
+        existing = {}  # target dir -> set of target_key(name), or None if the dir is missing
+        for d in plan.mkdirs:
+            try:
+                with os.scandir(d) as it:
+                    existing[d] = {target_key(e.name) for e in it}
+            except OSError:
+                existing[d] = None
+        plan.dirs_to_create = sum(1 for names in existing.values() if names is None)
+
+        conflict_idx = []
+        for i, (src, tgt, mode) in enumerate(plan.ops):
+            names = existing.get(os.path.dirname(tgt))
+            if names and target_key(os.path.basename(tgt)) in names:
+                conflict_idx.append(i)
+
+        owned = set()
+        if conflict_idx and conflict_policy == 'backup':
+            try: owned = self._db.get_owned_paths([plan.ops[i][1] for i in conflict_idx])
+            except Exception: pass
+        
+        plan.conflicts = {}
+        for i in conflict_idx:
+            if conflict_policy in ('skip', 'overwrite'):
+                action = conflict_policy
+            elif conflict_policy == 'backup':
+                # Mirrors _handle_conflict: our own deployments are overwritten, not backed up
+                is_ours = plan.ops[i][1].replace('\\', '/').lower() in owned
+                action = 'overwrite' if is_ours else 'backup'
+            else:
+                action = 'error'
+            plan.conflicts[i] = action
+
+    def _execute_plan(self, plan: DeployPlan, conflict_policy: str) -> list:
+        """
+        Execution phase for a DeployPlan (see deploy_plan.py).
+        Returns one result dict per op: {'status': 'success'|'skip'|'error', 'path', 'source', 'mode'}.
+        Successful ops are registered in lm_deployed_files in one transaction.
+        """
+        t0 = time.perf_counter()
+        ops = plan.ops
+        statuses = [None] * len(ops)   # index -> (status, msg)
+
+        # 1. Directories: each distinct parent created once, on this thread
+        failed_dirs = set()
+        for d in sorted(plan.mkdirs):
+            try:
+                os.makedirs(d, exist_ok=True)
+            except OSError as e:
+                self.logger.error(f"Failed to create target dir: {e}")
+                failed_dirs.add(d)
+        pending = []
+        for i, (src, tgt, mode) in enumerate(ops):
+            if failed_dirs and os.path.dirname(tgt) in failed_dirs:
+                statuses[i] = ('error', 'Failed to create directory')
+            else:
+                pending.append(i)
+
+        # 2. Links/copies on the bounded pool
+        self._run_plan_chunks(plan, pending, statuses)
+
+        # 3. Existing targets: apply conflict policy in plan order, then retry
+        conflicts = [i for i in pending if statuses[i][0] == 'conflict']
+        if conflicts:
+            owned = set()
+            if conflict_policy == 'backup':
+                try: owned = self._db.get_owned_paths([ops[i][1] for i in conflicts])
+                except Exception: pass
+            retry = []
+            for i in conflicts:
+                tgt = ops[i][1]
+                is_ours = tgt.replace('\\', '/').lower() in owned
+                action = self._handle_conflict(tgt, conflict_policy, is_ours=is_ours)
+                if action == 'skip':
+                    statuses[i] = ('skip', None)
+                elif action == 'error':
+                    statuses[i] = ('error', 'Conflict handle failed')
+                else:
+                    retry.append(i)
+            self._run_plan_chunks(plan, retry, statuses)
+
+        results = []
+        for (src, tgt, mode), (status, msg) in zip(ops, statuses):
+            if status == 'conflict':  # Reappeared between conflict handling and retry
+                status, msg = 'error', 'Target exists'
+            res = {"status": status, "path": tgt, "source": src, "mode": mode}
+            if msg:
+                res["msg"] = msg
+                self.logger.error(f"Plan {mode} failed: {tgt} -> {msg}")
+            results.append(res)
+
+        # Phase 42: Register all successful operations (single transaction)
+        if self._pkg_rel:
+            try:
+                self._db.register_deployed_files_bulk(
+                    (r['path'], r['source'], self._pkg_rel, r['mode']) for r in results if r['status'] == 'success')
+            except Exception as e:
+                self.logger.warning(f"Failed to register deployed files: {e}")
+
+        self.logger.info(f"Plan executed ({len(ops)} ops, {len(plan.mkdirs)} dirs, "
+                         f"{len(conflicts)} conflicts) in {time.perf_counter()-t0:.3f}s")
+        return results
+
+    def _run_plan_chunks(self, plan: DeployPlan, indices: list, statuses: list):
+        """Runs the given op indices, in chunks on the worker pool (inline for small plans)."""
+        if not indices: return
+        chunks = plan.chunks(indices)
+        if len(chunks) == 1:
+            outcomes = [execute_chunk(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                outcomes = list(executor.map(execute_chunk, chunks))
+        for chunk_result in outcomes:
+            for idx, status, msg in chunk_result:
+                statuses[idx] = (status, msg)
+
     def deploy_links_batch(self, link_pairs: list, conflict_policy: str = 'backup') -> list:
         """
         Processes multiple link creations in parallel using ProcessPoolExecutor.
@@ -1258,14 +1497,16 @@ class Deployer:
                             except: pass
             except Exception as e:
                 self.logger.error(f"Cleanup scan failed: {e}")
-    def remove_links_pointing_to(self, search_roots: list, source_root: str, package_rel_path: str = None, preserve_paths: list = None):
+    def remove_links_pointing_to(self, search_roots: list, source_root: str, package_rel_path: str = None,
+                                 preserve_paths: list = None, verify: bool = False):
         """
         Sweeps through a list of search roots and removes ANY symlink/copy found
         that points specifically into the source_root.
         
         Optimization Checkpoint (Phase 28/53):
-        - Uses DB to find known files (Fast).
-        - Uses 'package_rel_path' to perform targeted recursive scans (Fast).
+        - Uses the ledger's reverse ownership index to find known files (Fast, no walk).
+        - verify=True adds targeted recursive scans based on 'package_rel_path' and a
+          root-level scan, for links the ledger does not know about.
         - Avoids full recursive scan of search roots unless absolutely necessary.
         
         Args:
@@ -1275,123 +1516,151 @@ class Deployer:
                               Used to predict legacy locations.
             preserve_paths: (Optional) List of paths to explicitely PROTECT from deletion.
                             (e.g. the new target link we are about to create).
+            verify: (Optional) Also walk the likely locations and re-check indexed links
+                    on disk (legacy / unregistered deployments).
+        """
+        removed, failed_paths = self.remove_links_pointing_to_many(
+            search_roots, [(source_root, package_rel_path, preserve_paths)], verify=verify)
+        return bool(removed), failed_paths
+
+    @staticmethod
+    def _resolve_ledger_target(path: str, listings: dict, source: str = None):
+        """
+        On-disk spelling of a ledger target (keys are lowercased), as (status, path):
+        'found', 'missing', or 'ambiguous' (names differing only in case; left alone).
+        When the file name itself has several case variants, the one symlinked to
+        the ledger source (also a lowercased key) is ours; copies stay ambiguous.
+        Windows paths are case-insensitive, so only POSIX walks the components.
+        listings caches {parent dir: {lowercased name: [names]}} across calls.
+        """
+        if os.name == 'nt' or not os.path.isabs(path):
+            return ('found' if os.path.lexists(path) else 'missing'), path
+        parts = [p for p in path.split('/') if p]
+        current = os.sep
+        for i, part in enumerate(parts):
+            names = listings.get(current)
+            if names is None:
+                names = {}
+                try:
+                    for name in os.listdir(current):
+                        names.setdefault(name.lower(), []).append(name)
+                except OSError:
+                    pass
+                listings[current] = names
+            matches = names.get(part.lower())
+            if not matches:
+                return 'missing', path
+            if len(matches) > 1 and source and i == len(parts) - 1:
+                matches = [n for n in matches if Deployer._links_to(os.path.join(current, n), source)]
+            if len(matches) != 1:
+                return 'ambiguous', path
+            current = os.path.join(current, matches[0])
+        return 'found', current
+
+    @staticmethod
+    def _links_to(path: str, source_key: str) -> bool:
+        """True if path is a symlink whose target has ledger key source_key."""
+        try:
+            real = os.readlink(path)
+        except OSError:
+            return False
+        if not os.path.isabs(real):
+            real = os.path.join(os.path.dirname(path), real)
+        return os.path.normpath(real).replace('\\', '/').lower() == source_key
+
+    def remove_links_pointing_to_many(self, search_roots: list, packages: list, verify: bool = False):
+        """
+        Batch form of remove_links_pointing_to: one sweep for many packages.
+        packages: [(source_root, package_rel_path, preserve_paths)].
+        
+        Owned targets come from one indexed prefix lookup per source in
+        lm_deployed_files (get_deployed_targets_under); the search roots are not
+        walked. Ledger entries whose target is gone are dropped.
+        With verify=True, registered symlinks must still point into their source,
+        and each search root's top level plus the likely package locations are
+        scanned once for all packages to catch unregistered links.
+        Every orphan is deleted by one worker pool. A found link belongs to every
+        package whose source contains its target.
+        
+        Returns (set of source_roots that had something removed, failed_paths).
         """
         import time
         t0 = time.perf_counter()
-        source_root_norm = self._normalize_path(source_root).rstrip('\\/')
-        self.logger.debug(f"Sweeping for orphaned links pointing to: {source_root_norm}")
         
-        preserve_paths_norm = {self._normalize_path(p) for p in (preserve_paths or []) if p}
+        # norm source -> (source_root, package_rel_path, preserved norm paths)
+        sources = {}
+        for source_root, package_rel_path, preserve_paths in packages:
+            if not source_root: continue
+            norm = self._normalize_path(source_root).rstrip('\\/')
+            preserve = {self._normalize_path(p) for p in (preserve_paths or []) if p}
+            if norm in sources:
+                preserve |= sources[norm][2]
+            sources[norm] = (source_root, package_rel_path, preserve)
+        if not sources:
+            return set(), []
+        self.logger.debug(f"Sweeping for orphaned links pointing to {len(sources)} source(s)")
+        self.invalidate_link_status([entry[0] for entry in sources.values()])
         
-        # Phase 1: Collect targets
-        orphan_links = set()
+        # Phase 1: Collect targets (path -> owning source norms)
+        orphan_links = {}
         empty_dirs = set() # Use set to avoid duplicates
         
         # Normalize search roots for safety check
         search_roots_norm = [self._normalize_path(r).rstrip('\\/') for r in search_roots]
 
-        # 1.1 DB-backed Discovery (Declarative & Fast)
+        def inside_search_roots(path_norm):
+            return any(path_norm.startswith(r + os.sep) or path_norm.startswith(r + "/") or path_norm == r for r in search_roots_norm)
+
+        # 1.1 DB-backed Discovery (Declarative & Fast): reverse ownership index
+        stale_entries = []
+        listings = {}
         try:
             if hasattr(self, '_db'):
-                # Ensure we match full directory prefix to avoid partial name matches (e.g. MyMod vs MyMod2)
-                # We use a trailing slash for the LIKE pattern
-                source_root_db = source_root_norm.replace('\\', '/')
-                source_prefix = source_root_db if source_root_db.endswith('/') else source_root_db + '/'
-                
-                with self._db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    # Find all files registered as deployed from this source tree (Exact match OR sub-item match)
-                    cursor.execute("""
-                        SELECT target_path FROM lm_deployed_files 
-                        WHERE source_path = ? OR source_path LIKE ?
-                    """, (source_root_db, f"{source_prefix}%"))
-                    
-                    db_items = [row[0] for row in cursor.fetchall()]
-                    for item_path in db_items:
+                registered = self._db.get_deployed_targets_under(list(sources))
+                for norm, rows in registered.items():
+                    for ledger_path, source_path, deploy_type in rows:
+                        # Ledger keys are lowercased: find the real name on case-sensitive filesystems
+                        status, item_path = self._resolve_ledger_target(ledger_path, listings, source_path)
+                        if status == 'missing':
+                            stale_entries.append(ledger_path)
+                            continue
+                        if status == 'ambiguous':
+                            self.logger.warning(f"[Sweep-DB] Ambiguous case for registered item, skipped: {ledger_path}")
+                            continue
                         # 🚨 CRITICAL SAFETY: Only sweep items that are actually INSIDE the intended search roots.
                         # This prevents deleting source files if they were accidentally registered as targets.
-                        item_path_norm = self._normalize_path(item_path)
-                        is_inside_target = any(item_path_norm.startswith(r + os.sep) or item_path_norm.startswith(r + "/") or item_path_norm == r for r in search_roots_norm)
-                        
-                        if not is_inside_target:
+                        if not inside_search_roots(self._normalize_path(item_path)):
                             self.logger.warning(f"[Sweep-Safety] Skipping registered item OUTSIDE search roots: {item_path}")
                             continue
 
-                        if os.path.exists(item_path) or os.path.islink(item_path):
-                            orphan_links.add(item_path)
-                            self.logger.debug(f"[Sweep-DB] Found registered item: {item_path}")
+                        # Verify pass: a registered link replaced by something pointing elsewhere is not ours
+                        if verify and os.path.islink(item_path) and norm not in self._link_owners(item_path, sources):
+                            stale_entries.append(ledger_path)
+                            continue
+                        orphan_links.setdefault(item_path, set()).add(norm)
+                        self.logger.debug(f"[Sweep-DB] Found registered item: {item_path}")
+                if stale_entries:
+                    self._db.remove_deployed_file_entries(stale_entries)
         except Exception as e:
             self.logger.warning(f"DB-backed sweep query failed: {e}")
 
-        # 1.2 Targeted Legacy Scan (Heuristic)
-        # Instead of scanning the whole world, scan only likely locations based on previous rules (Tree/Folder).
-        scan_targets = []
-        for root_dir in search_roots:
-            if not os.path.isdir(root_dir): continue
-            
-            # A: Root check (for Flattened files) - Non-recursive
-            # We check the root itself later
-            
-            # B: Likely Subdirectories (for Tree/Folder modes)
-            if package_rel_path:
-                # 1. Full Relative Path (Tree mode expectation)
-                # e.g. TargetRoot/Category/Package
-                p1 = os.path.join(root_dir, package_rel_path)
-                scan_targets.append(p1)
-                
-                # 2. Basename only (Folder/Flatten-to-Folder expectation)
-                # e.g. TargetRoot/Package
-                p2 = os.path.join(root_dir, os.path.basename(package_rel_path))
-                if p2 != p1: scan_targets.append(p2)
-        
-        # Perform Targeted Recursive Scans
-        # We assume that legacy files are either in the DB OR in these likely locations.
-        # We DO NOT recursively scan the entire target_root anymore (performance killer).
-        
-        for target_dir in scan_targets:
-            if os.path.isdir(target_dir):
-                self.logger.debug(f"[Sweep-Targeted] Scanning likely legacy path: {target_dir}")
-                for root, dirs, files in os.walk(target_dir, topdown=False):
-                    for name in files + dirs:
-                        path = os.path.join(root, name)
-                        if path in orphan_links: continue
-                        
-                        # Use _check_and_add logic
-                        if self._is_link_to_source(path, source_root_norm):
-                            orphan_links.add(path)
-                    
-                    if root != target_dir: # Don't mark the search root itself yet
-                        empty_dirs.add(root)
-
-        # 1.3 Flattened File Safecheck (Root Level Only)
-        # Scan immediate files in search roots to catch any loose flattened files (rare but possible)
-        for root_dir in search_roots:
-            if not os.path.isdir(root_dir): continue
-            try:
-                with os.scandir(root_dir) as it:
-                    for entry in it:
-                        # Only check files or symlinks, don't recurse into dirs
-                        if entry.is_file() or entry.is_symlink():
-                            path = entry.path
-                            if path not in orphan_links:
-                                if self._is_link_to_source(path, source_root_norm):
-                                    orphan_links.add(path)
-            except: pass
+        if verify:
+            self._scan_unregistered_links(search_roots, sources, orphan_links, empty_dirs)
 
         # Phase 2: Parallel Deletion
-        removed_count = 0
+        removed_sources = set()
         failed_paths = []
         if orphan_links:
             def _unlink_safe(path):
                 path_norm = self._normalize_path(path)
-                if path_norm in preserve_paths_norm:
+                # Kept only if every package that owns it preserves it
+                if all(path_norm in sources[n][2] for n in orphan_links[path]):
                      self.logger.info(f"[Sweep-Preserve] Skipping preserved path: {path}")
-                     return True
+                     return None
                      
                 try:
                     # 🚨 Re-verify inside search roots (Defense in depth)
-                    is_inside_target = any(path_norm.startswith(r + os.sep) or path_norm.startswith(r + "/") or path_norm == r for r in search_roots_norm)
-                    if not is_inside_target:
+                    if not inside_search_roots(path_norm):
                         self.logger.error(f"[Sweep-CRITICAL] Blocked attempt to delete path OUTSIDE search roots: {path}")
                         return False
 
@@ -1404,23 +1673,28 @@ class Deployer:
                     else:
                         os.remove(path)
                     
-                    # Clear DB
-                    if hasattr(self, '_db'):
-                        key = path.replace('\\', '/').lower() if os.name == 'nt' else path
-                        self._db.remove_deployed_file_entry(key)
+                    # Ledger entries are cleared in one transaction after the pool finishes
+                    removed_paths.append(path)
                     return True
-                except FileNotFoundError: return True
+                except FileNotFoundError: return None
                 except Exception as e:
                     self.logger.warning(f"Sweep deletion failed {path}: {e}")
                     return False
 
+            removed_paths = []
             with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 futures = {executor.submit(_unlink_safe, p): p for p in orphan_links}
                 for future in as_completed(futures):
-                    if not future.result():
+                    result = future.result()
+                    if result is False:
                         failed_paths.append(futures[future])
-                    else:
-                        removed_count += 1
+                    elif result:
+                        removed_sources.update(sources[n][0] for n in orphan_links[futures[future]])
+
+            # Clear DB
+            if removed_paths:
+                try: self._db.remove_deployed_file_entries(removed_paths)
+                except Exception as e: self.logger.warning(f"Failed to clear ledger entries after sweep: {e}")
 
         # Phase 3: Cleanup Empty Dirs (Safe)
         # Only cleanup dirs we visited or that were parents of removed links
@@ -1430,24 +1704,100 @@ class Deployer:
         # Add parents of all removed links to empty_dirs candidates
         for link in orphan_links:
             empty_dirs.add(os.path.dirname(link))
-            
+        
+        preserved_all = set().union(*(entry[2] for entry in sources.values()))
+        roots_norm = {self._normalize_path(r) for r in search_roots}
         sorted_dirs = sorted(list(empty_dirs), key=len, reverse=True) # Deepest first
         for d in sorted_dirs:
             if not os.path.exists(d): continue
-            if self._normalize_path(d) in preserve_paths_norm: continue
+            d_norm = self._normalize_path(d)
+            if d_norm in preserved_all: continue
             
             try:
                 # 🚨 Safety: Don't invoke rmdir if it's a search root
-                # (Simple check: is d one of search_roots?)
-                is_root = any(self._normalize_path(d) == self._normalize_path(r) for r in search_roots)
-                if not is_root and not os.listdir(d):
+                if d_norm not in roots_norm and not os.listdir(d):
                     os.rmdir(d)
                     dirs_removed += 1
             except: pass
 
         elapsed = time.perf_counter() - t0
-        self.logger.debug(f"Sweep completed (Optimized): Removed {removed_count} items, {dirs_removed} dirs in {elapsed:.3f}s")
-        return removed_count > 0, failed_paths
+        self.logger.debug(f"Sweep completed (Optimized): Removed {len(removed_paths) if orphan_links else 0} items, "
+                          f"{dirs_removed} dirs for {len(sources)} source(s) in {elapsed:.3f}s")
+        return removed_sources, failed_paths
+
+    def _scan_unregistered_links(self, search_roots: list, sources: dict, orphan_links: dict, empty_dirs: set):
+        """Verify pass of the sweep: filesystem scans for links missing from the ledger."""
+        # 1.2 Targeted Legacy Scan (Heuristic)
+        # Instead of scanning the whole world, scan only likely locations based on previous rules (Tree/Folder).
+        scan_targets = {}
+        for root_dir in search_roots:
+            if not os.path.isdir(root_dir): continue
+            for norm, (_, package_rel_path, _) in sources.items():
+                if not package_rel_path: continue
+                # 1. Full Relative Path (Tree mode expectation), e.g. TargetRoot/Category/Package
+                # 2. Basename only (Folder/Flatten-to-Folder expectation), e.g. TargetRoot/Package
+                for candidate in (os.path.join(root_dir, package_rel_path),
+                                  os.path.join(root_dir, os.path.basename(package_rel_path))):
+                    scan_targets.setdefault(candidate, set()).add(norm)
+        
+        # Perform Targeted Recursive Scans
+        # We assume that legacy files are either in the DB OR in these likely locations.
+        # We DO NOT recursively scan the entire target_root anymore (performance killer).
+        for target_dir, owners in scan_targets.items():
+            if os.path.isdir(target_dir):
+                self.logger.debug(f"[Sweep-Targeted] Scanning likely legacy path: {target_dir}")
+                for root, dirs, files in os.walk(target_dir, topdown=False):
+                    for name in files + dirs:
+                        path = os.path.join(root, name)
+                        matched = {n for n in owners if self._is_link_to_source(path, n)}
+                        if matched:
+                            orphan_links.setdefault(path, set()).update(matched)
+                    
+                    if root != target_dir: # Don't mark the search root itself yet
+                        empty_dirs.add(root)
+
+        # 1.3 Flattened File Safecheck (Root Level Only)
+        # Scan immediate files in search roots to catch any loose flattened files (rare but possible).
+        # One scan per root serves every package: the link target is matched against all sources.
+        for root_dir in search_roots:
+            if not os.path.isdir(root_dir): continue
+            try:
+                with os.scandir(root_dir) as it:
+                    for entry in it:
+                        # Only check files or symlinks, don't recurse into dirs
+                        if entry.is_file() or entry.is_symlink():
+                            matched = self._link_owners(entry.path, sources)
+                            if matched:
+                                orphan_links.setdefault(entry.path, set()).update(matched)
+            except: pass
+
+    def _link_owners(self, path: str, sources: dict) -> set:
+        """Source norms (keys of sources) that path links into or was copied from."""
+        try:
+            if os.path.islink(path):
+                real = os.readlink(path)
+                if not os.path.isabs(real):
+                    real = os.path.join(os.path.dirname(path), real)
+                real_norm = self._normalize_path(real)
+            elif hasattr(self, '_db'):
+                # Check Copy Metadata via DB (Fallback)
+                src = self._db.get_deployed_file_source(path)
+                if not src: return set()
+                real_norm = self._normalize_path(src)
+            else:
+                return set()
+        except Exception:
+            return set()
+        # Walk up the target's ancestors: O(depth) regardless of the number of sources
+        owners = set()
+        cur = real_norm.rstrip('\\/')
+        while cur:
+            if cur in sources:
+                owners.add(cur)
+            parent = os.path.dirname(cur)
+            if parent == cur: break
+            cur = parent
+        return owners
 
     def _is_link_to_source(self, path: str, source_root_norm: str) -> bool:
         """Helper to check if a path points to the source root."""
@@ -0,0 +1,140 @@
+"""
+Link Master: Filesystem Watcher
+Tracks which storage/target directories changed since a consumer last looked.
+
+Every watched directory carries a change version. QFileSystemWatcher
+(inotify on Linux, ReadDirectoryChangesW on Windows) bumps it when entries
+are added, removed or renamed; directories the OS watcher refuses (watch
+limits, network drives) are polled by mtime instead. Consumers such as
+ScannerWorker store the version they computed a result against and reuse the
+result while version(path) is unchanged - a per-consumer dirty set, so the
+category and package workers can share one watcher.
+
+Lives on the UI thread; version() and is_watched() may be called from worker threads.
+"""
+import os
+import logging
+import threading
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+logger = logging.getLogger("LinkMasterFsWatcher")
+
+# Above this many paths, extra paths are polled (inotify's default per-user
+# limit is 8192 and is shared with every other process).
+MAX_NATIVE_WATCHES = 4096
+POLL_INTERVAL_MS = 2000
+
+
+class FsWatcher(QObject):
+    directory_changed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._versions = {}      # normalized path -> change version
+        self._groups = {}        # group name -> set of normalized paths
+        self._native = set()     # paths registered with QFileSystemWatcher
+        self._polled = {}        # path -> last seen mtime_ns (None if missing)
+
+        self._qt_watcher = QFileSystemWatcher(self)
+        self._qt_watcher.directoryChanged.connect(self._on_directory_changed)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._poll)
+
+    @staticmethod
+    def _norm(path: str) -> str:
+        return os.path.normcase(os.path.normpath(path))
+
+    # --- Consumer API (thread-safe) ---
+    def version(self, path: str):
+        """Change version of path, or None if it is not watched (callers must revalidate)."""
+        with self._lock:
+            return self._versions.get(self._norm(path))
+
+    def is_watched(self, path: str) -> bool:
+        return self.version(path) is not None
+
+    def mark_dirty(self, path: str):
+        """Bumps path's version (e.g. after the app itself changed it)."""
+        key = self._norm(path)
+        with self._lock:
+            if key in self._versions:
+                self._seq += 1
+                self._versions[key] = self._seq
+
+    # --- Watch set management (UI thread) ---
+    def set_group(self, group: str, paths):
+        """Replaces the paths watched for group; the watch set is the union of all groups."""
+        self._groups[group] = {self._norm(p) for p in paths if p and os.path.isdir(p)}
+        self._sync()
+
+    def clear(self):
+        self._groups.clear()
+        self._sync()
+
+    def _sync(self):
+        wanted = set().union(*self._groups.values()) if self._groups else set()
+        with self._lock:
+            current = set(self._versions)
+            removed = current - wanted
+            added = wanted - current
+            for key in removed:
+                self._versions.pop(key, None)
+            for key in added:
+                self._seq += 1
+                self._versions[key] = self._seq
+
+        gone_native = [p for p in removed if p in self._native]
+        if gone_native:
+            self._qt_watcher.removePaths(gone_native)
+            self._native.difference_update(gone_native)
+        for key in removed:
+            self._polled.pop(key, None)
+
+        room = MAX_NATIVE_WATCHES - len(self._native)
+        to_native = sorted(added)[:max(room, 0)]
+        failed = set(self._qt_watcher.addPaths(to_native)) if to_native else set()
+        failed = {self._norm(p) for p in failed}
+        self._native.update(p for p in to_native if p not in failed)
+        for key in added:
+            if key not in self._native:
+                self._polled[key] = self._mtime(key)
+
+        if self._polled and not self._poll_timer.isActive():
+            self._poll_timer.start()
+        elif not self._polled and self._poll_timer.isActive():
+            self._poll_timer.stop()
+        if added or removed:
+            logger.debug(f"[FsWatcher] watching {len(wanted)} dirs ({len(self._native)} native, {len(self._polled)} polled)")
+
+    # --- Change sources ---
+    def _bump(self, key: str):
+        with self._lock:
+            if key not in self._versions:
+                return
+            self._seq += 1
+            self._versions[key] = self._seq
+        self.directory_changed.emit(key)
+
+    def _on_directory_changed(self, path: str):
+        key = self._norm(path)
+        self._bump(key)
+        # Some platforms drop the watch when the directory is replaced; re-arm it
+        if key in self._native and path not in self._qt_watcher.directories() and os.path.isdir(path):
+            self._qt_watcher.addPath(path)
+
+    def _poll(self):
+        for key, last in list(self._polled.items()):
+            mtime = self._mtime(key)
+            if mtime != last:
+                self._polled[key] = mtime
+                self._bump(key)
+
+    @staticmethod
+    def _mtime(path: str):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
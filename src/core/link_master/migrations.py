@@ -0,0 +1,703 @@
+"""
+Link Master: Versioned Schema Migrations
+Replaces the try/except ALTER TABLE cascade that used to run on every startup.
+
+Each schema is an ordered list of steps. Applied steps are recorded in
+PRAGMA user_version, so opening an up-to-date database costs one PRAGMA read
+and no DDL at all.
+
+The global plugins.db holds both the registry schema and (for the no-app
+fallback) the app schema, so user_version is split into 16-bit lanes:
+lane 0 = registry schema, lane 1 = app schema.
+"""
+import sqlite3
+import logging
+
+logger = logging.getLogger("LinkMasterMigrations")
+
+LANE_REGISTRY = 0
+LANE_APP = 1
+_LANE_BITS = 16
+_LANE_MASK = (1 << _LANE_BITS) - 1
+
+
+def _get_lane_version(user_version: int, lane: int) -> int:
+    return (user_version >> (lane * _LANE_BITS)) & _LANE_MASK
+
+def _set_lane_version(user_version: int, lane: int, version: int) -> int:
+    shift = lane * _LANE_BITS
+    return (user_version & ~(_LANE_MASK << shift)) | ((version & _LANE_MASK) << shift)
+
+def _read_user_version(cursor) -> int:
+    cursor.execute("PRAGMA user_version")
+    return cursor.fetchone()[0]
+
+
+def add_missing_columns(cursor, table: str, columns: list):
+    """ALTER TABLE ADD COLUMN for each (name, decl) pair not yet present in table."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1].lower() for row in cursor.fetchall()}
+    for name, decl in columns:
+        if name.lower() not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def run_migrations(conn: sqlite3.Connection, steps: list, lane: int, db_label: str = "") -> int:
+    """
+    Applies every step of `steps` newer than the version stored in `lane`.
+    steps: ordered list of (description, callable(cursor)). Step N (1-based)
+           brings the schema to version N.
+    Each step runs in its own transaction together with its version bump, so
+    an interrupted upgrade resumes at the first unapplied step.
+    Returns the resulting schema version.
+    """
+    target = len(steps)
+    cursor = conn.cursor()
+
+    # Fast path: schema is current, no DDL, no write lock.
+    current = _get_lane_version(_read_user_version(cursor), lane)
+    if current >= target:
+        return current
+
+    while current < target:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another thread/process may have migrated meanwhile.
+            user_version = _read_user_version(cursor)
+            current = _get_lane_version(user_version, lane)
+            if current >= target:
+                conn.commit()
+                break
+
+            description, apply = steps[current]
+            apply(cursor)
+            current += 1
+            cursor.execute(f"PRAGMA user_version = {_set_lane_version(user_version, lane, current)}")
+            conn.commit()
+            logger.info(f"[Migration] {db_label} lane {lane} -> v{current}: {description}")
+        except Exception:
+            conn.rollback()
+            logger.exception(f"[Migration] {db_label} lane {lane} failed at v{current + 1}")
+            raise
+
+    return current
+
+
+# =====================================================================
+# Registry schema (global plugins.db)
+# =====================================================================
+def _registry_v1_baseline(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_apps (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        storage_root TEXT NOT NULL,
+        target_root TEXT NOT NULL,
+        target_root_2 TEXT,
+        default_subpath TEXT,
+        managed_folder_name TEXT DEFAULT '_LinkMaster_Assets',
+        conflict_policy TEXT DEFAULT 'backup',
+        deployment_type TEXT DEFAULT 'folder',
+        cover_image TEXT,
+        last_target TEXT DEFAULT 'target_root',
+        default_category_style TEXT DEFAULT 'image_text',
+        default_package_style TEXT DEFAULT 'image_text',
+        default_skip_levels INTEGER DEFAULT 0
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )''')
+    # Phase 42: Deployed files tracking - Safe to have in global DB for fallback
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_deployed_files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        target_path TEXT NOT NULL,
+        source_path TEXT NOT NULL,
+        package_rel_path TEXT NOT NULL,
+        deploy_type TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(target_path)
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_backup_registry (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        original_path TEXT NOT NULL,
+        backup_path TEXT NOT NULL,
+        folder_rel_path TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(original_path)
+    )''')
+    add_missing_columns(cursor, 'lm_apps', [
+        ('last_target', "TEXT DEFAULT 'target_root'"),
+        ('default_category_style', "TEXT DEFAULT 'image_text'"),
+        ('default_package_style', "TEXT DEFAULT 'image_text'"),
+        ('executables', "TEXT DEFAULT '[]'"),
+        ('url_list', "TEXT DEFAULT '[]'"),
+        ('password_list', "TEXT DEFAULT '[]'"),
+        ('deployment_rule', "TEXT DEFAULT 'folder'"),
+        ('transfer_mode', "TEXT DEFAULT 'symlink'"),
+        ('is_favorite', "INTEGER DEFAULT 0"),
+        ('score', "INTEGER DEFAULT 0"),
+        ('target_root_3', "TEXT"),
+        ('deployment_rule_b', "TEXT DEFAULT 'folder'"),
+        ('deployment_rule_c', "TEXT DEFAULT 'folder'"),
+        ('default_skip_levels', "INTEGER DEFAULT 0"),
+    ])
+    # Phase 67: Migrate old hardcoded 'image' default to 'image_text'
+    cursor.execute("UPDATE lm_apps SET default_category_style = 'image_text' WHERE default_category_style = 'image'")
+    cursor.execute("UPDATE lm_apps SET default_package_style = 'image_text' WHERE default_package_style = 'image'")
+
+
+REGISTRY_MIGRATIONS = [
+    ("baseline schema (pre-versioning columns)", _registry_v1_baseline),
+]
+
+
+# =====================================================================
+# App schema (resource/app/<app_name>/dyonis.db)
+# =====================================================================
+def _app_v1_baseline(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        version TEXT,
+        description TEXT,
+        author TEXT,
+        storage_rel_path TEXT NOT NULL,
+        preview_rel_path TEXT,
+        is_enabled INTEGER DEFAULT 0,
+        last_updated TEXT
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_folder_config (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        rel_path TEXT NOT NULL,
+        folder_type TEXT DEFAULT 'auto',
+        display_style TEXT,
+        display_name TEXT,
+        image_path TEXT,
+        manual_preview_path TEXT, -- Phase 16.5
+        is_terminal INTEGER DEFAULT 0,
+        tags TEXT,
+        target_override TEXT,     -- Phase 16
+        deployment_rules TEXT,     -- Phase 16 (JSON)
+        deploy_rule TEXT,          -- Phase 5 (A/B/C support)
+        deploy_rule_b TEXT,        -- Target 2 override
+        deploy_rule_c TEXT,        -- Target 3 override
+        deploy_type TEXT,          -- Phase 18.15 (Override)
+        conflict_policy TEXT,      -- Phase 18.15 (Override)
+        conflict_tag TEXT,         -- Phase 28: Tag to check for conflicts
+        conflict_scope TEXT,       -- Phase 28: Scope for conflict check (disabled/category/global)
+        description TEXT,          -- Phase 28: User description
+        inherit_tags INTEGER DEFAULT 1, -- Phase 18 (Allow blocking inheritance)
+        trash_origin TEXT, -- Phase 18.11: Store original path for restore
+        transfer_mode TEXT, -- Phase 34: Copy vs Symlink override
+        UNIQUE(rel_path)
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_tags (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        icon_rel_path TEXT,
+        category TEXT,
+        is_inheritable INTEGER DEFAULT 1 -- Phase 18.9
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_item_tags (
+        item_id INTEGER NOT NULL,
+        tag_id INTEGER NOT NULL,
+        PRIMARY KEY(item_id, tag_id)
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_presets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_preset_items (
+        preset_id INTEGER NOT NULL,
+        item_id INTEGER NOT NULL,
+        PRIMARY KEY(preset_id, item_id)
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_preset_folders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        sort_order INTEGER DEFAULT 0,
+        is_expanded INTEGER DEFAULT 1
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_lib_folders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        parent_id INTEGER DEFAULT NULL,
+        sort_order INTEGER DEFAULT 0,
+        is_expanded INTEGER DEFAULT 1,
+        FOREIGN KEY(parent_id) REFERENCES lm_lib_folders(id) ON DELETE CASCADE
+    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_backup_registry (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        original_path TEXT NOT NULL,
+        backup_path TEXT NOT NULL,
+        folder_rel_path TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(original_path)
+    )''')
+    # Phase 42: Deployed files tracking
+    cursor.execute('''CREATE TABLE IF NOT EXISTS lm_deployed_files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        target_path TEXT NOT NULL,
+        source_path TEXT NOT NULL,
+        package_rel_path TEXT NOT NULL,
+        deploy_type TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(target_path)
+    )''')
+
+    add_missing_columns(cursor, 'lm_folder_config', [
+        ('target_override', "TEXT"),
+        ('deployment_rules', "TEXT"),
+        ('manual_preview_path', "TEXT"),
+        ('inherit_tags', "INTEGER DEFAULT 1"),
+        ('trash_origin', "TEXT"),
+        ('deploy_type', "TEXT"),
+        ('conflict_policy', "TEXT"),
+        ('deploy_rule', "TEXT"),
+        ('deploy_rule_b', "TEXT"),
+        ('deploy_rule_c', "TEXT"),
+        # Phase 28
+        ('conflict_tag', "TEXT"),
+        ('conflict_scope', "TEXT"),
+        ('description', "TEXT"),
+        ('last_known_status', "TEXT"),  # Cache for link status to avoid expensive recursive scans
+        ('link_status_cache', "TEXT"),
+        # Quick View Manager Support (Fav/Score per item)
+        ('is_favorite', "INTEGER DEFAULT 0"),
+        ('score', "INTEGER DEFAULT 0"),
+        ('transfer_mode', "TEXT"),  # Phase 34
+        ('is_visible', "INTEGER DEFAULT 1"),
+        ('is_intentional', "INTEGER DEFAULT 0"),  # Phase 51: accidental vs intentional partial deployment
+        ('display_style_package', "TEXT"),
+        ('sort_order', "INTEGER DEFAULT 0"),
+        # Phase 4: Library Management
+        ('is_library', "INTEGER DEFAULT 0"),
+        ('lib_name', "TEXT"),
+        ('lib_version', "TEXT"),
+        ('lib_deps', "TEXT"),
+        ('lib_priority', "INTEGER DEFAULT 0"),
+        ('lib_priority_mode', "TEXT"),
+        ('lib_memo', "TEXT"),
+        ('lib_hidden', "INTEGER DEFAULT 0"),
+        ('lib_folder_id', "INTEGER DEFAULT NULL"),
+        ('author', "TEXT"),
+        ('size_bytes', "INTEGER DEFAULT 0"),
+        ('scanned_at', "TEXT"),
+        ('url', "TEXT"),
+        ('url_list', "TEXT"),  # Favorite & URL List Enhancement
+        # Phase X: Persistent Visual Flags
+        ('has_logical_conflict', "INTEGER DEFAULT 0"),
+        ('is_library_alt_version', "INTEGER DEFAULT 0"),
+        ('target_selection', "TEXT"),  # Phase 42: Separate Target Selection from Physical Path
+    ])
+    add_missing_columns(cursor, 'lm_tags', [
+        ('is_inheritable', "INTEGER DEFAULT 1"),
+    ])
+    add_missing_columns(cursor, 'lm_presets', [
+        ('folder', "TEXT"),
+        ('sort_order', "INTEGER DEFAULT 0"),
+        ('folder_id', "INTEGER DEFAULT NULL"),
+    ])
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_lib_name ON lm_folder_config (lib_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_is_library ON lm_folder_config (is_library)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_status ON lm_folder_config (last_known_status)")
+
+
+def norm_path_sql(col: str) -> str:
+    """SQL expression normalizing a rel_path column: forward slashes, lowercase."""
+    return f"lower(replace({col}, '\\', '/'))"
+
+def parent_path_sql(col: str) -> str:
+    """SQL expression for the normalized parent of a rel_path column ('' for top-level).
+    rtrim(p, <p without '/'>) strips everything after the last '/'."""
+    norm = norm_path_sql(col)
+    head = f"rtrim({norm}, replace({norm}, '/', ''))"
+    return f"(CASE WHEN instr({norm}, '/') = 0 THEN '' ELSE substr({head}, 1, length({head}) - 1) END)"
+
+
+def _app_v2_normalized_paths(cursor):
+    # Stored lookup keys so case-insensitive (Windows) and parent/prefix lookups
+    # are index seeks instead of LOWER(rel_path) table scans.
+    add_missing_columns(cursor, 'lm_folder_config', [
+        ('rel_path_norm', "TEXT"),
+        ('parent_rel', "TEXT"),
+    ])
+    cursor.execute(f"UPDATE lm_folder_config SET rel_path_norm = {norm_path_sql('rel_path')}, "
+                   f"parent_rel = {parent_path_sql('rel_path')}")
+    # rel_path itself is already UNIQUE. rel_path_norm is not: Linux storage may hold
+    # 'Mod' and 'mod' side by side, and older Windows DBs may contain case duplicates.
+    # Including id makes the upsert lookup (SELECT id ... WHERE rel_path_norm = ?) index-only.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_norm ON lm_folder_config (rel_path_norm, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_parent ON lm_folder_config (parent_rel, rel_path_norm)")
+    for event in ("INSERT", "UPDATE OF rel_path"):
+        name = "trg_folder_config_norm_ins" if event == "INSERT" else "trg_folder_config_norm_upd"
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON lm_folder_config
+            BEGIN
+                UPDATE lm_folder_config
+                SET rel_path_norm = {norm_path_sql('NEW.rel_path')},
+                    parent_rel = {parent_path_sql('NEW.rel_path')}
+                WHERE id = NEW.id;
+            END""")
+
+
+def _app_v3_subtree_status_index(cursor):
+    # Lets count_subtree_by_status() answer from the index alone (prefix range + status).
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_norm_status ON lm_folder_config (rel_path_norm, last_known_status)")
+
+
+def _app_v4_link_status_index(cursor):
+    # Persistent Deployer.get_link_status results for walk-based rules (tree/custom/files,
+    # folder copies). A row is valid while the stat fingerprint of its watched
+    # directories is unchanged, so status survives restarts without re-walking.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lm_link_status_index (
+            source_path TEXT NOT NULL,
+            target_path TEXT NOT NULL,
+            rule_hash TEXT NOT NULL,
+            fp_count INTEGER,
+            fp_mtime INTEGER,
+            fp_hash TEXT,
+            watch_paths TEXT,
+            result TEXT,
+            updated_at REAL,
+            PRIMARY KEY (source_path, target_path, rule_hash)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_link_status_target ON lm_link_status_index (target_path)")
+
+
+# Columns of lm_search_fts, derived from lm_folder_config (rowid = lm_folder_config.id)
+SEARCH_FTS_COLUMNS = ('name', 'display_name', 'memo', 'author', 'tags', 'urls')
+
+
+def search_fts_values_sql(row: str) -> str:
+    """SELECT list filling lm_search_fts from a lm_folder_config row alias (NEW or a table name)."""
+    path = f"replace({row}.rel_path, '\\', '/')"
+    head = f"rtrim({path}, replace({path}, '/', ''))"
+    return (f"{row}.id, {row}.rel_path, substr({path}, length({head}) + 1), "
+            f"coalesce({row}.display_name, ''), "
+            f"coalesce({row}.description, '') || ' ' || coalesce({row}.lib_memo, ''), "
+            f"coalesce({row}.author, ''), "
+            f"replace(coalesce({row}.tags, ''), ',', ' '), "
+            f"coalesce({row}.url, '') || ' ' || coalesce({row}.url_list, '')")
+
+
+def _app_v5_search_fts(cursor):
+    # Full-text index over name/display_name/memo/author/tags/URLs for search.
+    # trigram keeps the old substring semantics (and works for CJK names, which
+    # unicode61 cannot segment); older SQLite builds fall back to unicode61 with
+    # prefix queries. Builds without FTS5 keep the filesystem search.
+    cols = ", ".join(SEARCH_FTS_COLUMNS)
+    created = False
+    for tokenizer in ("trigram", "unicode61 remove_diacritics 2"):
+        try:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS lm_search_fts USING fts5("
+                           f"rel_path UNINDEXED, {cols}, tokenize='{tokenizer}')")
+            created = True
+            break
+        except sqlite3.OperationalError:
+            continue
+    if not created:
+        logger.warning("[Migration] SQLite has no FTS5; search index disabled")
+        return
+
+    insert = f"INSERT INTO lm_search_fts (rowid, rel_path, {cols}) SELECT {search_fts_values_sql('lm_folder_config')} FROM lm_folder_config"
+    cursor.execute("DELETE FROM lm_search_fts")
+    cursor.execute(insert)
+    # Incremental maintenance: every write path (update_folder_display_config,
+    # bulk_update_items, deletes) goes through these triggers.
+    new_row = f"INSERT INTO lm_search_fts (rowid, rel_path, {cols}) SELECT {search_fts_values_sql('NEW')};"
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_search_fts_ins AFTER INSERT ON lm_folder_config
+        BEGIN {new_row} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_search_fts_upd
+        AFTER UPDATE OF rel_path, display_name, description, lib_memo, author, tags, url, url_list ON lm_folder_config
+        BEGIN DELETE FROM lm_search_fts WHERE rowid = OLD.id; {new_row} END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS trg_search_fts_del AFTER DELETE ON lm_folder_config
+        BEGIN DELETE FROM lm_search_fts WHERE rowid = OLD.id; END""")
+
+
+def tag_items_sql(tags: str) -> str:
+    """
+    json_each() source yielding one row per entry of a comma-separated tags column.
+    Tabs/newlines become spaces; anything still not valid JSON yields no rows
+    rather than failing the triggering write.
+    """
+    text = f"coalesce({tags}, '')"
+    for ch in (9, 10, 13):
+        text = f"replace({text}, char({ch}), ' ')"
+    text = f"replace(replace({text}, '\\', '\\\\'), '\"', '\\\"')"
+    arr = f"('[\"' || replace({text}, ',', '\",\"') || '\"]')"
+    return f"json_each(CASE WHEN json_valid({arr}) THEN {arr} ELSE '[]' END)"
+
+
+def link_item_tags_sql(item_id: str, tags: str, where: str = "") -> list:
+    """
+    Statements linking lm_folder_config rows to lm_tags: missing tag names are added
+    to lm_tags (default definition), then (item_id, tag_id) pairs are inserted.
+    item_id/tags are column expressions (NEW.id/NEW.tags, or c.id/c.tags with a
+    'FROM lm_folder_config c' source in `where`).
+    """
+    source = f"{where}, {tag_items_sql(tags)} j" if where else f"{tag_items_sql(tags)} j"
+    return [
+        f"INSERT INTO lm_tags (name) SELECT trim(j.value) FROM {source} "
+        f"WHERE trim(j.value) != '' AND NOT EXISTS (SELECT 1 FROM lm_tags t WHERE t.name = trim(j.value) COLLATE NOCASE) "
+        f"GROUP BY lower(trim(j.value))",
+        f"INSERT OR IGNORE INTO lm_item_tags (item_id, tag_id) SELECT {item_id}, t.id FROM {source} "
+        f"JOIN lm_tags t ON t.name = trim(j.value) COLLATE NOCASE WHERE trim(j.value) != ''",
+    ]
+
+
+def _app_v6_item_tags(cursor):
+    # lm_item_tags becomes the indexed item->tag relation (item_id = lm_folder_config.id)
+    # derived from lm_folder_config.tags, which stays the user-facing source string.
+    try:
+        cursor.execute("SELECT json_valid('[]')")
+    except sqlite3.OperationalError:
+        logger.warning("[Migration] SQLite has no JSON1; tag index disabled")
+        return
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_name_nocase ON lm_tags (name COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_item_tags_tag ON lm_item_tags (tag_id, item_id)")
+
+    cursor.execute("DELETE FROM lm_item_tags")
+    for stmt in link_item_tags_sql("c.id", "c.tags", where="lm_folder_config c"):
+        cursor.execute(stmt)
+    # Incremental maintenance on every lm_folder_config write path
+    link_new = " ".join(stmt + ";" for stmt in link_item_tags_sql("NEW.id", "NEW.tags"))
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_item_tags_ins AFTER INSERT ON lm_folder_config
+        WHEN coalesce(NEW.tags, '') != ''
+        BEGIN {link_new} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_item_tags_upd AFTER UPDATE OF tags ON lm_folder_config
+        BEGIN DELETE FROM lm_item_tags WHERE item_id = OLD.id; {link_new} END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS trg_item_tags_del AFTER DELETE ON lm_folder_config
+        BEGIN DELETE FROM lm_item_tags WHERE item_id = OLD.id; END""")
+
+
+def _app_v7_effective_tags(cursor):
+    # Materialized tag closure: own tags plus the inheritable tags passed down the
+    # parent chain (stopping at inherit_tags = 0). NULL marks a row as stale; the
+    # triggers below only mark, LinkMasterDB.refresh_effective_tags() recomputes
+    # the stale rows, so every write path is covered and only affected subtrees
+    # are recomputed.
+    add_missing_columns(cursor, 'lm_folder_config', [('effective_tags', "TEXT")])
+    cursor.execute("UPDATE lm_folder_config SET effective_tags = NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_config_eff_stale ON lm_folder_config (rel_path_norm) "
+                   "WHERE effective_tags IS NULL")
+    _create_effective_tags_triggers(cursor)
+
+
+def effective_tags_stale_sql(rel: str) -> str:
+    """UPDATE marking the rows below a rel_path column stale (all rows for the storage root '')."""
+    norm = norm_path_sql(rel)
+    return (f"UPDATE lm_folder_config SET effective_tags = NULL "
+            f"WHERE ({norm} = '' AND rel_path_norm != '') "
+            f"OR (rel_path_norm >= {norm} || '/' AND rel_path_norm < {norm} || '0');")
+
+
+def _create_effective_tags_triggers(cursor):
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_effective_tags_ins AFTER INSERT ON lm_folder_config
+        WHEN coalesce(NEW.tags, '') != '' OR NEW.inherit_tags = 0
+        BEGIN {effective_tags_stale_sql('NEW.rel_path')} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_effective_tags_upd
+        AFTER UPDATE OF rel_path, tags, inherit_tags ON lm_folder_config
+        WHEN OLD.tags IS NOT NEW.tags OR OLD.inherit_tags IS NOT NEW.inherit_tags OR OLD.rel_path IS NOT NEW.rel_path
+        BEGIN
+            UPDATE lm_folder_config SET effective_tags = NULL WHERE id = NEW.id;
+            {effective_tags_stale_sql('OLD.rel_path')}
+            {effective_tags_stale_sql('NEW.rel_path')}
+        END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_effective_tags_del AFTER DELETE ON lm_folder_config
+        BEGIN {effective_tags_stale_sql('OLD.rel_path')} END""")
+
+
+def conflict_tag_rows_sql(row: str) -> str:
+    """INSERT filling lm_conflict_tags from a lm_folder_config row alias (NEW, or c with a FROM source)."""
+    source = f"{tag_items_sql(row + '.conflict_tag')} j"
+    if row != 'NEW':
+        source = f"lm_folder_config {row}, {source}"
+    return (f"INSERT OR IGNORE INTO lm_conflict_tags (tag, rel_path, scope, linked) "
+            f"SELECT lower(trim(j.value)), replace({row}.rel_path, '\\', '/'), coalesce({row}.conflict_scope, 'disabled'), "
+            f"coalesce({row}.last_known_status, '') = 'linked' FROM {source} WHERE trim(j.value) != ''")
+
+
+def _app_v8_conflict_tags(cursor):
+    # conflict_tag -> package relation for the tag-conflict engine (TagConflictIndex).
+    # lm_conflict_log records which rel_paths changed so the in-memory index can
+    # apply deltas instead of reloading; deploy/undeploy reach it through the
+    # last_known_status writes.
+    try:
+        cursor.execute("SELECT json_valid('[]')")
+    except sqlite3.OperationalError:
+        logger.warning("[Migration] SQLite has no JSON1; conflict tag index disabled")
+        return
+    cursor.execute("""CREATE TABLE IF NOT EXISTS lm_conflict_tags (
+        tag TEXT NOT NULL,
+        rel_path TEXT NOT NULL,
+        scope TEXT,
+        linked INTEGER,
+        PRIMARY KEY (tag, rel_path)
+    ) WITHOUT ROWID""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_conflict_tags_path ON lm_conflict_tags (rel_path)")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS lm_conflict_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        rel_path TEXT NOT NULL
+    )""")
+    cursor.execute("DELETE FROM lm_conflict_tags")
+    cursor.execute(conflict_tag_rows_sql('c'))
+
+    def log(row):
+        return f"INSERT INTO lm_conflict_log (rel_path) VALUES (replace({row}.rel_path, '\\', '/'));"
+
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_conflict_tags_ins AFTER INSERT ON lm_folder_config
+        WHEN coalesce(NEW.conflict_tag, '') != ''
+        BEGIN {conflict_tag_rows_sql('NEW')}; {log('NEW')} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_conflict_tags_upd
+        AFTER UPDATE OF rel_path, conflict_tag, conflict_scope, last_known_status ON lm_folder_config
+        WHEN (coalesce(OLD.conflict_tag, '') != '' OR coalesce(NEW.conflict_tag, '') != '')
+         AND (OLD.rel_path IS NOT NEW.rel_path OR OLD.conflict_tag IS NOT NEW.conflict_tag
+              OR OLD.conflict_scope IS NOT NEW.conflict_scope
+              OR (coalesce(OLD.last_known_status, '') = 'linked') != (coalesce(NEW.last_known_status, '') = 'linked'))
+        BEGIN
+            DELETE FROM lm_conflict_tags WHERE rel_path = replace(OLD.rel_path, '\\', '/');
+            {conflict_tag_rows_sql('NEW')};
+            {log('OLD')}
+            {log('NEW')}
+        END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_conflict_tags_del AFTER DELETE ON lm_folder_config
+        WHEN coalesce(OLD.conflict_tag, '') != ''
+        BEGIN DELETE FROM lm_conflict_tags WHERE rel_path = replace(OLD.rel_path, '\\', '/'); {log('OLD')} END""")
+
+
+LIB_GRAPH_COLUMNS = ('rel_path', 'is_library', 'lib_name', 'lib_version', 'lib_priority', 'lib_deps', 'lib_folder_id')
+
+
+def _app_v9_lib_graph_version(cursor):
+    # Single-row counter bumped by every write that can change the library
+    # dependency graph (LibraryDependencyGraph rebuilds when it moves).
+    cursor.execute("""CREATE TABLE IF NOT EXISTS lm_lib_graph_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0
+    )""")
+    cursor.execute("INSERT OR IGNORE INTO lm_lib_graph_version (id, version) VALUES (1, 0)")
+    bump = "UPDATE lm_lib_graph_version SET version = version + 1 WHERE id = 1;"
+
+    def in_graph(row):
+        return f"(coalesce({row}.is_library, 0) != 0 OR coalesce({row}.lib_deps, '') NOT IN ('', '[]'))"
+
+    changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in LIB_GRAPH_COLUMNS)
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_lib_graph_ins AFTER INSERT ON lm_folder_config
+        WHEN {in_graph('NEW')} BEGIN {bump} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_lib_graph_upd
+        AFTER UPDATE OF {', '.join(LIB_GRAPH_COLUMNS)} ON lm_folder_config
+        WHEN ({in_graph('OLD')} OR {in_graph('NEW')}) AND ({changed})
+        BEGIN {bump} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_lib_graph_del AFTER DELETE ON lm_folder_config
+        WHEN {in_graph('OLD')} BEGIN {bump} END""")
+    for event in ("INSERT", "DELETE", "UPDATE OF name, parent_id"):
+        name = event.split()[0].lower()
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_lib_graph_folders_{name}
+            AFTER {event} ON lm_lib_folders BEGIN {bump} END""")
+
+
+def _app_v10_deployed_source_index(cursor):
+    # Reverse ownership index (source prefix -> targets) for the transition sweep.
+    # Ledger keys are already lowercased with '/' separators, so a plain BINARY
+    # range scan on source_path is a prefix lookup.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_lm_deployed_files_source ON lm_deployed_files(source_path)")
+
+
+def _app_v11_dir_size_cache(cursor):
+    # Per-directory (mtime, own file bytes, subdirectory names) for SizeScanner.
+    # A directory whose mtime is unchanged is not listed again on rescans.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lm_dir_size_cache (
+            rel_path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            file_bytes INTEGER NOT NULL,
+            subdirs TEXT NOT NULL DEFAULT ''
+        ) WITHOUT ROWID
+    """)
+
+# lm_folder_config columns that do not change what a scanned view shows
+# (sizes, derived lookup columns), so they do not move lm_config_revision
+CONFIG_REVISION_IGNORED = ('id', 'size_bytes', 'scanned_at', 'effective_tags', 'rel_path_norm', 'parent_rel')
+
+
+def _app_v12_scan_snapshots(cursor):
+    # lm_config_revision: single-row counter bumped by every lm_folder_config write
+    # that changes a displayed value (identical rewrites, e.g. the visual flag
+    # refresh, do not count). Columns added by later steps must re-create the
+    # update trigger to be covered.
+    # lm_scan_snapshots: last ScannerWorker result per (directory, target root),
+    # valid while the directory mtime and the revision it was built at are unchanged.
+    cursor.execute("""CREATE TABLE IF NOT EXISTS lm_config_revision (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        revision INTEGER NOT NULL DEFAULT 0
+    )""")
+    cursor.execute("INSERT OR IGNORE INTO lm_config_revision (id, revision) VALUES (1, 0)")
+    bump = "UPDATE lm_config_revision SET revision = revision + 1 WHERE id = 1;"
+    cursor.execute("PRAGMA table_info(lm_folder_config)")
+    columns = [row[1] for row in cursor.fetchall() if row[1] not in CONFIG_REVISION_IGNORED]
+    changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in columns)
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_config_revision_ins AFTER INSERT ON lm_folder_config
+        BEGIN {bump} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_config_revision_upd AFTER UPDATE ON lm_folder_config
+        WHEN {changed} BEGIN {bump} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_config_revision_del AFTER DELETE ON lm_folder_config
+        BEGIN {bump} END""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS lm_scan_snapshots (
+        path TEXT NOT NULL,
+        target_root TEXT NOT NULL,
+        dir_mtime_ns INTEGER,
+        db_revision INTEGER,
+        signature TEXT,
+        payload TEXT,
+        updated_at REAL,
+        PRIMARY KEY (path, target_root)
+    ) WITHOUT ROWID""")
+
+
+def _app_v13_thumbnail_index(cursor):
+    # Scanner.detect_thumbnail results per (parent folder, item name), valid
+    # while the item folder's mtime is unchanged (see ThumbnailIndex).
+    # thumb is NULL when the folder has no image.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS lm_thumbnail_index (
+            parent_rel TEXT NOT NULL,
+            name TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            thumb TEXT,
+            PRIMARY KEY (parent_rel, name)
+        ) WITHOUT ROWID
+    """)
+
+def _app_v14_effective_tags_exact(cursor):
+    # effective_tags used to follow case-folded ancestors on case-sensitive
+    # filesystems and skipped the storage root row; its triggers did not mark
+    # the tree stale when the root row changed. Recreate them and recompute.
+    for name in ('trg_effective_tags_ins', 'trg_effective_tags_upd', 'trg_effective_tags_del'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    _create_effective_tags_triggers(cursor)
+    cursor.execute("UPDATE lm_folder_config SET effective_tags = NULL")
+
+APP_MIGRATIONS = [
+    ("baseline schema (pre-versioning columns)", _app_v1_baseline),
+    ("normalized rel_path_norm/parent_rel lookup columns", _app_v2_normalized_paths),
+    ("covering index for subtree status counts", _app_v3_subtree_status_index),
+    ("persistent link status index", _app_v4_link_status_index),
+    ("full-text search index", _app_v5_search_fts),
+    ("indexed item-tag relation", _app_v6_item_tags),
+    ("materialized effective tag closure", _app_v7_effective_tags),
+    ("conflict tag index and change log", _app_v8_conflict_tags),
+    ("library dependency graph version counter", _app_v9_lib_graph_version),
+    ("deployed files source index (reverse ownership)", _app_v10_deployed_source_index),
+    ("per-directory size cache", _app_v11_dir_size_cache),
+    ("config revision counter and scan snapshots", _app_v12_scan_snapshots),
+    ("persistent thumbnail detection index", _app_v13_thumbnail_index),
+    ("effective tags by exact path, including the storage root", _app_v14_effective_tags_exact),
+]
@@ -0,0 +1,125 @@
+"""
+Link Master: Scan Snapshot Cache
+Last ScannerWorker result per (directory, target root), for instant view restore.
+
+A snapshot holds the sorted, enriched items of a standard scan: thumbnails,
+link status and the category/package order from _is_package_auto. It is keyed
+by the directory's mtime plus lm_config_revision (bumped by every displayed
+lm_folder_config change), both taken before the scan read anything, so a
+snapshot whose key still matches shows what a rescan would start from.
+
+The view renders a matching snapshot at once and still rescans in the
+background (stale-while-revalidate): target-side link changes do not move
+either key part. If the rescan's signature equals the snapshot's, the redraw
+is skipped.
+
+Snapshots live in memory (LRU) and in lm_scan_snapshots, so they survive
+restarts. Workers put, the UI thread gets; use get_scan_snapshots(db) to share
+one instance per DB.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+
+logger = logging.getLogger("LinkMasterScanSnapshot")
+
+_caches = weakref.WeakKeyDictionary()
+
+
+def get_scan_snapshots(db) -> 'ScanSnapshotCache':
+    """Shared snapshot cache for db."""
+    cache = _caches.get(db)
+    if cache is None:
+        cache = ScanSnapshotCache(db)
+        _caches[db] = cache
+    return cache
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path or '')).replace('\\', '/')
+
+
+def _dump(results: list) -> str:
+    return json.dumps(results, sort_keys=True, default=_json_default)
+
+
+def _hash(payload: str) -> str:
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def results_signature(results: list) -> str:
+    """Content hash of a scan result list (order-sensitive)."""
+    return _hash(_dump(results))
+
+
+class ScanSnapshotCache:
+    def __init__(self, db, max_memory: int = 16):
+        self.db = db
+        self.max_memory = max_memory
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # (path, target_root) -> (key, signature, JSON payload)
+
+    def current_key(self, path: str):
+        """(dir mtime_ns, config revision) for path, or None if either is unavailable."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        revision = self.db.get_config_revision()
+        if revision is None:
+            return None
+        return (mtime, revision)
+
+    def get(self, path: str, target_root: str):
+        """(results, signature) if a snapshot for path matches its current key, else None."""
+        key = self.current_key(path)
+        if key is None:
+            return None
+        slot = (_norm(path), _norm(target_root))
+        with self._lock:
+            entry = self._memory.get(slot)
+            if entry:
+                self._memory.move_to_end(slot)
+        if entry is None:
+            row = self.db.get_scan_snapshot(*slot)
+            if not row:
+                return None
+            entry = ((row['dir_mtime_ns'], row['db_revision']), row['signature'], row['payload'])
+            self._remember(slot, entry)
+        if tuple(entry[0]) != key:
+            return None
+        # Decoded per call: callers sort and annotate the items they get
+        try:
+            return json.loads(entry[2]), entry[1]
+        except (ValueError, TypeError):
+            return None
+
+    def put(self, path: str, target_root: str, key, results: list):
+        """Stores results scanned under key (from current_key() before the scan)."""
+        if key is None:
+            return
+        slot = (_norm(path), _norm(target_root))
+        payload = _dump(results)
+        signature = _hash(payload)
+        self._remember(slot, (key, signature, payload))
+        try:
+            self.db.put_scan_snapshot(slot[0], slot[1], key[0], key[1], signature, payload)
+        except Exception as e:
+            logger.debug(f"[ScanSnapshot] persist failed for {path}: {e}")
+
+    def _remember(self, slot, entry):
+        with self._lock:
+            self._memory[slot] = entry
+            self._memory.move_to_end(slot)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
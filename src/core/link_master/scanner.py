@@ -47,11 +47,12 @@ class Scanner:
         
         return None
 
-    def scan_directory(self, root_path: str):
+    def scan_directory(self, root_path: str, detect_thumbnails: bool = True):
         """
         Scans the given directory for scan-able items.
         Returns a list of dicts suitable for 'items' table insertion.
         Current logic: Treat each subfolder as an item.
+        detect_thumbnails=False leaves image_rel_path None (caller resolves it, e.g. from a cache).
         """
         import time
         t_start = time.perf_counter()
@@ -65,7 +66,7 @@ class Scanner:
                 for entry in it:
                     if entry.is_dir() and not entry.name.startswith(('.', '_Backup')):
                         # Detect preview image
-                        image_path = self.detect_thumbnail(entry.path)
+                        image_path = self.detect_thumbnail(entry.path) if detect_thumbnails else None
                         
                         item = {
                             "name": entry.name,
@@ -0,0 +1,172 @@
+"""
+Link Master: Size Scanner
+Parallel, cached package size scanning (backend of SizeScannerWorker).
+
+get_package_size_fast walked one package at a time with Path.rglob + stat.
+SizeScanner instead:
+
+- walks all requested paths as one tree with an iterative os.scandir walker on
+  a thread pool (nested requests, e.g. a category and its packages, share the
+  walk; sizes are summed bottom-up);
+- keeps a per-directory (mtime, size) cache in lm_dir_size_cache: a directory
+  whose mtime is unchanged reuses its own file bytes and subdirectory names, so
+  a rescan costs one stat per directory instead of a scandir + stat per file;
+- reports each requested path as soon as its subtree is complete.
+
+A directory's mtime moves when entries are added, removed or renamed, not when
+a file is rewritten in place: use_cache=False forces a full walk (and rewrites
+the cache from it). The explicit "full size check" in the UI always does that.
+"""
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger("LinkMasterSizeScanner")
+
+# scandir is I/O bound and releases the GIL
+SIZE_SCAN_WORKERS = min(8, (os.cpu_count() or 4) + 4)
+# Entries a worker visits before handing its remaining stack back for redistribution
+_CHUNK_BUDGET = 4096
+# Directories modified this recently are not cached (mtime granularity race)
+_RACY_NS = 2_000_000_000
+
+
+def _ancestors(rel: str):
+    while rel:
+        rel = rel.rpartition('/')[0]
+        yield rel
+
+
+class SizeScanner:
+    def __init__(self, db, storage_root: str, max_workers: int = None, use_cache: bool = True):
+        self.db = db
+        self.storage_root = storage_root
+        self.max_workers = max_workers or SIZE_SCAN_WORKERS
+        self.use_cache = use_cache  # False: walk everything, then refresh the cache
+        self.stats = {}
+
+    def _walk_chunk(self, stack: list, cache: dict, now_ns: int):
+        """
+        Visits directories from stack until the budget is spent (worker thread).
+        Returns ([(rel_dir, file_bytes, subdirs, cache_row, cache_hit)], remaining stack).
+        """
+        records = []
+        visited = 0
+        while stack and visited < _CHUNK_BUDGET:
+            rel = stack.pop()
+            abs_dir = os.path.join(self.storage_root, rel) if rel else self.storage_root
+            try:
+                mtime = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                records.append((rel, 0, (), None, False))
+                continue
+
+            cached = cache.get(rel)
+            row = None
+            hit = bool(cached) and cached[0] == mtime
+            if hit:
+                file_bytes, subdirs = cached[1], cached[2]
+                visited += 1
+            else:
+                file_bytes, names = 0, []
+                try:
+                    with os.scandir(abs_dir) as it:
+                        for entry in it:
+                            visited += 1
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    names.append(entry.name)
+                                elif entry.is_file():
+                                    file_bytes += entry.stat().st_size
+                            except OSError:
+                                continue
+                except OSError:
+                    pass
+                subdirs = tuple(names)
+                if now_ns - mtime > _RACY_NS:
+                    row = (rel, mtime, file_bytes, subdirs)
+
+            stack.extend(f"{rel}/{name}" if rel else name for name in subdirs)
+            records.append((rel, file_bytes, subdirs, row, hit))
+        return records, stack
+
+    def scan(self, rel_paths, on_result=None, should_stop=None) -> dict:
+        """
+        Sizes of rel_paths (directories under storage_root) as {rel_path: bytes}.
+        on_result(rel_path, size) is called on the caller thread as each one
+        completes; should_stop() -> True aborts the walk (partial results).
+        """
+        t0 = time.perf_counter()
+        requested = {}  # normalized rel -> rel as given
+        for rel in rel_paths:
+            requested.setdefault((rel or '').replace('\\', '/').strip('/'), rel)
+        roots = {r for r in requested if not any(a in requested for a in _ancestors(r))}
+
+        stored = self.db.get_dir_size_cache() if self.db is not None else {}
+        cache = stored if self.use_cache else {}
+        now_ns = time.time_ns()
+        results = {}
+        total, remaining = {}, {}
+        cache_rows, visited = [], set()
+        hits = 0
+
+        def finish(rel):
+            while True:
+                size = total.pop(rel)
+                remaining.pop(rel)
+                if rel in requested:
+                    results[requested[rel]] = size
+                    if on_result:
+                        on_result(requested[rel], size)
+                if rel in roots:
+                    return
+                parent = rel.rpartition('/')[0]
+                total[parent] += size
+                remaining[parent] -= 1
+                if remaining[parent]:
+                    return
+                rel = parent
+
+        stopped = False
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self._walk_chunk, [root], cache, now_ns) for root in roots}
+            while pending:
+                if should_stop and should_stop():
+                    stopped = True
+                    for future in pending:
+                        future.cancel()
+                    break
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    records, rest = future.result()
+                    if rest:
+                        # Split the leftover stack across the idle workers
+                        parts = max(1, min(len(rest), self.max_workers * 2 - len(pending)))
+                        for i in range(parts):
+                            pending.add(executor.submit(self._walk_chunk, rest[i::parts], cache, now_ns))
+                    # A parent's record always arrives before its children's (they are only
+                    # pushed once it is visited), so totals are seeded top-down
+                    for rel, file_bytes, subdirs, row, hit in records:
+                        visited.add(rel)
+                        hits += hit
+                        if row is not None:
+                            cache_rows.append(row)
+                        total[rel] = file_bytes
+                        remaining[rel] = len(subdirs)
+                        if not subdirs:
+                            finish(rel)
+
+        if self.db is not None:
+            self.db.put_dir_size_cache(cache_rows)
+            if not stopped:
+                # Directories gone from the scanned subtrees
+                gone = [rel for rel in stored if rel not in visited and
+                        (rel in roots or any(a in roots for a in _ancestors(rel)))]
+                self.db.delete_dir_size_cache(gone)
+
+        self.stats = {'dirs': len(visited), 'cache_hits': hits, 'rescanned': len(visited) - hits,
+                      'elapsed': time.perf_counter() - t0}
+        logger.debug(f"[SizeScan] {len(results)}/{len(requested)} path(s), {len(visited)} dirs "
+                     f"({hits} cached) in {self.stats['elapsed']:.3f}s{' (stopped)' if stopped else ''}")
+        return results
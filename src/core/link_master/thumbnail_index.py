@@ -0,0 +1,89 @@
+"""
+Link Master: Thumbnail Index
+Persistent Scanner.detect_thumbnail results (lm_thumbnail_index).
+
+detect_thumbnail lists a folder and probes the candidate names. The view
+refresh and ScannerWorker used to do that for every card on every pass, and
+the worker's in-memory probe cache starts empty after each restart.
+
+The index stores, per (parent folder, item name), the thumbnail found and the
+item folder's mtime at detection time. resolve() reads one parent's rows in a
+single query, stats each item and re-detects only the items whose mtime moved
+(adding, removing or renaming an image changes it). Rows for items that are
+gone are dropped.
+"""
+import os
+import time
+import logging
+
+logger = logging.getLogger("LinkMasterThumbnailIndex")
+
+# Folders modified this recently are not stored (mtime granularity race)
+_RACY_NS = 2_000_000_000
+
+
+class ThumbnailIndex:
+    def __init__(self, db, scanner, storage_root: str):
+        self.db = db
+        self.scanner = scanner
+        self.storage_root = storage_root
+
+    def _parent_key(self, parent_abs: str) -> str:
+        rel = os.path.normpath(os.path.relpath(parent_abs, self.storage_root)).replace('\\', '/')
+        return '' if rel == '.' else rel
+
+    def resolve(self, parent_abs: str, names, complete: bool = False) -> dict:
+        """
+        {name: thumbnail file name or None} for the item folders `names` under parent_abs.
+        complete=True means names is the full listing: rows of other names are dropped.
+        """
+        names = list(names)
+        if not names:
+            return {}
+        parent = self._parent_key(parent_abs)
+        try:
+            known = self.db.get_thumbnail_index(parent)
+        except Exception as e:
+            logger.debug(f"[ThumbnailIndex] lookup failed for '{parent}': {e}")
+            known = {}
+
+        now_ns = time.time_ns()
+        result, updates = {}, []
+        for name in names:
+            item_abs = os.path.join(parent_abs, name)
+            try:
+                mtime = os.stat(item_abs).st_mtime_ns
+            except OSError:
+                result[name] = None
+                continue
+            cached = known.get(name)
+            if cached and cached[0] == mtime:
+                result[name] = cached[1]
+                continue
+            thumb = self.scanner.detect_thumbnail(item_abs)
+            result[name] = thumb
+            if now_ns - mtime > _RACY_NS:
+                updates.append((name, mtime, thumb))
+
+        stale = [n for n in known if n not in result] if complete else []
+        try:
+            if updates:
+                self.db.put_thumbnail_index(parent, updates)
+            if stale:
+                self.db.delete_thumbnail_index(parent, stale)
+        except Exception as e:
+            logger.debug(f"[ThumbnailIndex] store failed for '{parent}': {e}")
+        return result
+
+    def resolve_paths(self, item_paths) -> dict:
+        """{item abs path: thumbnail abs path or None}, one lookup per parent folder."""
+        by_parent = {}
+        for path in item_paths:
+            by_parent.setdefault(os.path.dirname(path), []).append(path)
+        resolved = {}
+        for parent_abs, paths in by_parent.items():
+            thumbs = self.resolve(parent_abs, [os.path.basename(p) for p in paths])
+            for path in paths:
+                thumb = thumbs.get(os.path.basename(path))
+                resolved[path] = os.path.join(path, thumb) if thumb else None
+        return resolved
@@ -1,23 +1,30 @@
 import os
 import math
-from pathlib import Path
 
 def get_package_size_fast(package_path):
     """
     フォルダ内の全ファイルを走査して合計サイズを返す。
-    os.scandir を内部で使用する Path.rglob('*') を活用。
+    os.scandir による反復ウォーク (再帰・Path オブジェクト生成なし)。
+    キャッシュ付きの並列走査は size_scanner.SizeScanner を参照。
     """
     total = 0
     try:
         if not os.path.exists(package_path):
             return 0
-        # Use rglob to iterate over all files and directories
-        for entry in Path(package_path).rglob('*'):
+        stack = [package_path]
+        while stack:
             try:
-                if entry.is_file():
-                    # Get size from stat metadata
-                    total += entry.stat().st_size
-            except (PermissionError, FileNotFoundError):
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file():
+                                # Get size from stat metadata (cached by scandir on Windows)
+                                total += entry.stat().st_size
+                        except (PermissionError, FileNotFoundError):
+                            continue
+            except (PermissionError, FileNotFoundError, NotADirectoryError):
                 continue
     except Exception as e:
         print(f"Error scanning {package_path}: {e}")
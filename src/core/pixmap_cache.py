@@ -0,0 +1,114 @@
+"""
+Byte-budgeted in-memory pixmap cache.
+
+ImageLoader used to keep the last 300 pixmaps regardless of size, so one large
+preview cost as much of the limit as one 64 px icon. Entries are now charged
+width * height * depth / 8 bytes against a per-tier budget:
+
+- 'card':    pixmaps requested at up to CARD_MAX_DIM (item cards, icons)
+- 'preview': anything larger (detail / preview views)
+
+A tier evicts least-recently-used entries until it is back under its budget,
+so previews never push card thumbnails out. Entries larger than a tier's
+max_dim should be downscaled before put() (see max_dim_for()).
+
+Not thread-safe: owned by the UI thread, like the pixmaps it holds.
+"""
+from collections import OrderedDict
+
+CARD_MAX_DIM = 256
+PREVIEW_MAX_DIM = 2048
+
+DEFAULT_BUDGETS = {
+    'card': 96 * 1024 * 1024,
+    'preview': 64 * 1024 * 1024,
+}
+_MAX_DIMS = {'card': CARD_MAX_DIM, 'preview': PREVIEW_MAX_DIM}
+
+
+def tier_for(width: int, height: int) -> str:
+    """Tier for a requested target size."""
+    return 'card' if max(width, height) <= CARD_MAX_DIM else 'preview'
+
+
+def pixmap_cost(pixmap) -> int:
+    """Resident bytes of a QPixmap/QImage-like object."""
+    depth = pixmap.depth() or 32
+    return max(1, pixmap.width() * pixmap.height() * depth // 8)
+
+
+class _Tier:
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.entries = OrderedDict()  # key -> (pixmap, cost)
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class PixmapMemoryCache:
+    def __init__(self, budgets: dict = None):
+        budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+        self._tiers = {name: _Tier(budget) for name, budget in budgets.items()}
+
+    @staticmethod
+    def max_dim_for(tier: str) -> int:
+        return _MAX_DIMS.get(tier, PREVIEW_MAX_DIM)
+
+    def set_budget(self, tier: str, budget: int):
+        t = self._tiers[tier]
+        t.budget = budget
+        self._trim(t)
+
+    def get(self, key, tier: str):
+        """Cached pixmap for key in tier (marked most recently used), or None."""
+        t = self._tiers[tier]
+        entry = t.entries.get(key)
+        if entry is None:
+            t.misses += 1
+            return None
+        t.entries.move_to_end(key)
+        t.hits += 1
+        return entry[0]
+
+    def put(self, key, pixmap, tier: str):
+        """Adds pixmap to tier; entries that alone exceed the budget are not kept."""
+        t = self._tiers[tier]
+        cost = pixmap_cost(pixmap)
+        old = t.entries.pop(key, None)
+        if old is not None:
+            t.total -= old[1]
+        if cost > t.budget:
+            return
+        t.entries[key] = (pixmap, cost)
+        t.total += cost
+        self._trim(t)
+
+    def _trim(self, t: _Tier):
+        while t.total > t.budget and t.entries:
+            _, (_, cost) = t.entries.popitem(last=False)
+            t.total -= cost
+            t.evictions += 1
+
+    def __contains__(self, item):
+        key, tier = item
+        return key in self._tiers[tier].entries
+
+    def __len__(self):
+        return sum(len(t.entries) for t in self._tiers.values())
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(t.total for t in self._tiers.values())
+
+    def stats(self) -> dict:
+        """{tier: {entries, bytes, budget, hits, misses, evictions}}"""
+        return {name: {'entries': len(t.entries), 'bytes': t.total, 'budget': t.budget,
+                       'hits': t.hits, 'misses': t.misses, 'evictions': t.evictions}
+                for name, t in self._tiers.items()}
+
+    def clear(self):
+        for t in self._tiers.values():
+            t.entries.clear()
+            t.total = 0
@@ -0,0 +1,159 @@
+""" 🚨 厳守ルール: ファイル操作禁止 🚨
+ファイルI/Oは、必ず src.core.file_handler を介すること。
+"""
+"""
+Persistent thumbnail cache (SQLite blob store).
+
+ImageLoadWorker used to decode every full-resolution source image and scale it
+on each app start (and again whenever a card fell out of the 300-entry memory
+cache). Pre-scaled thumbnails are now stored encoded in one SQLite file under
+resource/app, keyed by (source path, file size, mtime, target size), so each
+image version is decoded once.
+
+- A changed source (size or mtime) gets a new key; the old entry ages out.
+- Entries are evicted least-recently-used first once the byte budget is exceeded.
+- Hits only mark entries as used in memory; the marks are written in batches.
+Thread-safe: one connection per thread (WAL), shared bookkeeping under a lock.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger("ThumbnailCache")
+
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+# Part of every key: bump when the decode pipeline changes its output
+KEY_VERSION = 2
+_TOUCH_FLUSH = 256
+
+
+def thumbnail_key(path: str, target_w: int, target_h: int):
+    """Cache key for path scaled into target_w x target_h, or None if path cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    ident = f"{KEY_VERSION}|{os.path.normcase(os.path.abspath(path))}|{st.st_size}|{st.st_mtime_ns}|{target_w}x{target_h}"
+    return hashlib.sha1(ident.encode('utf-8')).hexdigest()
+
+
+class ThumbnailDiskCache:
+    def __init__(self, db_path: str, budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        self.db_path = db_path
+        self.budget_bytes = budget_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> last_used, not yet written
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS thumbnails (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbnails_lru ON thumbnails (last_used)")
+            conn.commit()
+            self._total = conn.execute("SELECT coalesce(sum(nbytes), 0) FROM thumbnails").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Encoded thumbnail bytes for key, or None."""
+        if not key:
+            return None
+        try:
+            row = self._conn().execute("SELECT data FROM thumbnails WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"get failed: {e}")
+            return None
+        if not row:
+            return None
+        with self._lock:
+            self._touched[key] = time.time()
+            flush = len(self._touched) >= _TOUCH_FLUSH
+        if flush:
+            self.flush()
+        return bytes(row[0])
+
+    def put(self, key: str, data: bytes):
+        """Stores encoded thumbnail bytes, evicting LRU entries beyond the byte budget."""
+        if not key or not data:
+            return
+        conn = self._conn()
+        try:
+            old = conn.execute("SELECT nbytes FROM thumbnails WHERE key = ?", (key,)).fetchone()
+            conn.execute("INSERT OR REPLACE INTO thumbnails (key, data, nbytes, last_used) VALUES (?, ?, ?, ?)",
+                         (key, sqlite3.Binary(data), len(data), time.time()))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.debug(f"put failed: {e}")
+            return
+        with self._lock:
+            self._total += len(data) - (old[0] if old else 0)
+            over = self._total > self.budget_bytes
+        if over:
+            self.evict()
+
+    def flush(self):
+        """Writes pending last_used marks in one transaction."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        conn = self._conn()
+        try:
+            conn.executemany("UPDATE thumbnails SET last_used = ? WHERE key = ?",
+                             [(used, key) for key, used in touched.items()])
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.debug(f"flush failed: {e}")
+
+    def evict(self, target_ratio: float = 0.9):
+        """Drops least recently used entries until the store is under target_ratio of the budget."""
+        self.flush()
+        conn = self._conn()
+        goal = int(self.budget_bytes * target_ratio)
+        freed = removed = 0
+        with self._lock:
+            excess = self._total - goal
+        if excess <= 0:
+            return
+        try:
+            victims = []
+            for key, nbytes in conn.execute("SELECT key, nbytes FROM thumbnails ORDER BY last_used"):
+                if freed >= excess:
+                    break
+                victims.append((key,))
+                freed += nbytes
+            conn.executemany("DELETE FROM thumbnails WHERE key = ?", victims)
+            conn.commit()
+            removed = len(victims)
+        except sqlite3.Error as e:
+            logger.debug(f"evict failed: {e}")
+            return
+        with self._lock:
+            self._total -= freed
+        logger.debug(f"Evicted {removed} thumbnail(s), {freed} bytes")
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+            self._total = 0
+        conn = self._conn()
+        conn.execute("DELETE FROM thumbnails")
+        conn.commit()
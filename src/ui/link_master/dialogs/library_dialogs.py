@@ -7,6 +7,7 @@ from PyQt6.QtCore import pyqtSignal, Qt, QSize, QByteArray
 from src.core.lang_manager import _
 from src.ui.common_widgets import StyledComboBox, ProtectedLineEdit
 from src.ui.frameless_window import FramelessDialog
+from src.core.link_master.dependency_graph import get_dependency_graph
 
 class LibrarySettingsDialog(FramelessDialog):
     """ライブラリの詳細設定ダイアログ"""
@@ -340,7 +341,10 @@ class DependentPackagesDialog(FramelessDialog):
             selected_rel = curr.data(0, Qt.ItemDataRole.UserRole)
 
         self.tree.clear()
-        all_configs = self.db.get_all_folder_configs()
+        # Only packages the dependency graph lists for this library (exact name match below)
+        candidates = get_dependency_graph(self.db).dependents(self.lib_name)
+        found = self.db.get_folder_configs(candidates) if candidates else {}
+        all_configs = {rp: found[rp] for rp in candidates if rp in found}
         ver_options = [_("Latest Version")]
         for v in self.versions:
             ver_options.append(v.get('lib_version', 'Unknown'))
@@ -519,7 +519,7 @@ class ItemCard(QFrame):
                     def validate_request():
                         return getattr(self, '_current_image_path', None) == expected_path
                     
-                    self.loader.load_image(new_image_path, QSize(256, 256), self.set_pixmap, validate_request)
+                    self.loader.load_image(new_image_path, QSize(256, 256), self.set_pixmap, validate_request, owner=self)
                 # If same path, keep existing pixmap (no-op)
             else:
                 # Explicitly No image: Clear any existing pixmap
@@ -1186,7 +1186,7 @@ class ItemCard(QFrame):
             # Refresh card display
             if self.loader:
                 self.thumb_label.setText(str(_("Loading...")))
-                self.loader.load_image(dest_path, QSize(256, 256), self.set_pixmap)
+                self.loader.load_image(dest_path, QSize(256, 256), self.set_pixmap, owner=self)
 
         except Exception as e:
             import traceback
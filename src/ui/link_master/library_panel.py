@@ -24,6 +24,7 @@ import urllib.request
 import urllib.error
 from PyQt6.QtCore import pyqtSignal, Qt, QUrl, QTimer
 from src.ui.link_master.dialogs.library_dialogs import LibrarySettingsDialog, DependentPackagesDialog
+from src.core.link_master.dependency_graph import get_dependency_graph
 from src.ui.common_widgets import StyledComboBox
 
 
@@ -521,25 +522,8 @@ class LibraryPanel(QWidget):
         self._update_buttons()
 
     def _count_dependent_packages(self, lib_names: list, all_configs: dict) -> dict:
-        counts = {name: 0 for name in lib_names}
-        for rel_path, cfg in all_configs.items():
-            if cfg.get('is_library', 0):
-                continue
-            lib_deps_json = cfg.get('lib_deps', '[]')
-            try:
-                lib_deps = json.loads(lib_deps_json) if lib_deps_json else []
-            except:
-                lib_deps = []
-            for dep in lib_deps:
-                if isinstance(dep, dict):
-                    name = dep.get('name')
-                elif isinstance(dep, str):
-                    name = dep
-                else:
-                    continue
-                if name in counts:
-                    counts[name] += 1
-        return counts
+        # Served by the cached dependency graph instead of re-parsing every lib_deps
+        return get_dependency_graph(self.db).dependent_counts(lib_names)
 
     def _get_selected_lib_data(self):
         selected = self.lib_tree.selectedItems()
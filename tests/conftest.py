@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.core.link_master.database import LinkMasterDB  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh, fully migrated app DB in a temporary directory."""
+    lm_db = LinkMasterDB(db_path=str(tmp_path / "app.db"))
+    yield lm_db
+    lm_db.close()
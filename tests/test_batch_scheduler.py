@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+
+from src.core.link_master.batch_scheduler import BatchDeployScheduler, BatchTask
+from src.core.link_master.deployer import Deployer
+
+
+def _rels(waves):
+    return [[[t.rel_path for t in lane] for lane in wave] for wave in waves]
+
+
+def _noop(deployer):
+    return {'status': 'linked'}
+
+
+def test_nested_and_equal_targets_share_a_lane(tmp_path):
+    root = str(tmp_path / "target")
+    tasks = [
+        BatchTask('a', os.path.join(root, 'Mods', 'A'), _noop),
+        BatchTask('files1', root, _noop),
+        BatchTask('b', os.path.join(root, 'Other', 'B'), _noop),
+        BatchTask('c', os.path.join(root + '2', 'C'), _noop),
+        BatchTask('files2', root, _noop),
+    ]
+    waves = BatchDeployScheduler(Deployer()).plan(tasks)
+    assert len(waves) == 1
+    lanes = sorted(_rels(waves)[0])
+    # Everything under root collides with the 'files' packages deployed into root itself
+    assert lanes == [['a', 'files1', 'b', 'files2'], ['c']]
+
+
+def test_sibling_targets_get_separate_lanes(tmp_path):
+    root = str(tmp_path / "target")
+    tasks = [BatchTask(name, os.path.join(root, name), _noop) for name in ('x', 'xy', 'y')]
+    lanes = _rels(BatchDeployScheduler(Deployer()).plan(tasks))[0]
+    assert sorted(lanes) == [['x'], ['xy'], ['y']]
+
+
+def test_dependencies_split_waves(tmp_path):
+    root = str(tmp_path / "target")
+    tasks = [
+        BatchTask('pkg', os.path.join(root, 'pkg'), _noop, deps={'lib'}),
+        BatchTask('lib', os.path.join(root, 'lib'), _noop, deps={'base', 'outside_batch'}),
+        BatchTask('base', os.path.join(root, 'base'), _noop),
+        BatchTask('free', os.path.join(root, 'free'), _noop),
+    ]
+    waves = _rels(BatchDeployScheduler(Deployer()).plan(tasks))
+    assert [sorted(rel for lane in wave for rel in lane) for wave in waves] == [
+        ['base', 'free'], ['lib'], ['pkg']]
+
+
+def test_run_serializes_a_lane_in_input_order(tmp_path):
+    root = str(tmp_path / "target")
+    order, active, overlap = [], set(), []
+    lock = threading.Lock()
+
+    def make(rel):
+        def run(deployer):
+            with lock:
+                if active:
+                    overlap.append(rel)
+                active.add(rel)
+                order.append(rel)
+            time.sleep(0.01)
+            with lock:
+                active.discard(rel)
+            return {'status': 'linked', 'rel': rel}
+        return run
+
+    rels = ['p1', 'p2', 'p3']
+    tasks = [BatchTask(rel, os.path.join(root, 'Mods'), make(rel)) for rel in rels]
+    scheduler = BatchDeployScheduler(Deployer(), max_workers=4)
+    results = scheduler.run(scheduler.plan(tasks))
+    assert order == rels
+    assert not overlap
+    assert {rel: r['rel'] for rel, r in results.items()} == {rel: rel for rel in rels}
+
+
+def test_run_reports_task_errors_per_package(tmp_path):
+    def boom(deployer):
+        raise OSError("disk full")
+
+    tasks = [BatchTask('bad', str(tmp_path / 'a'), boom), BatchTask('good', str(tmp_path / 'b'), _noop)]
+    scheduler = BatchDeployScheduler(Deployer())
+    results = scheduler.run(scheduler.plan(tasks))
+    assert results['bad']['status'] == 'error' and 'disk full' in results['bad']['error']
+    assert results['good']['status'] == 'linked'
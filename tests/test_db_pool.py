@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.core.link_master.db_pool import ConnectionPool, close_connection_pool, get_connection_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"))
+    with pool.get() as conn:
+        conn.execute("CREATE TABLE t (v INTEGER)")
+    yield pool
+    pool.close_all()
+
+
+def _values(pool):
+    return sorted(r[0] for r in pool.get().execute("SELECT v FROM t"))
+
+
+def test_one_connection_per_thread(pool):
+    main = pool.get()
+    assert pool.get() is main
+    other = []
+    worker = threading.Thread(target=lambda: other.append(pool.get()))
+    worker.start(); worker.join()
+    assert other[0] is not main
+
+
+def test_inner_block_does_not_commit_the_outer_one(pool):
+    conn = pool.get()
+    with pytest.raises(RuntimeError):
+        with conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            with conn:
+                conn.execute("INSERT INTO t VALUES (2)")
+                conn.commit()
+            raise RuntimeError
+    assert _values(pool) == []
+
+
+def test_failed_inner_block_is_undone_alone(pool):
+    conn = pool.get()
+    with conn:
+        conn.execute("INSERT INTO t VALUES (1)")
+        try:
+            with conn:
+                conn.execute("INSERT INTO t VALUES (2)")
+                raise ValueError
+        except ValueError:
+            pass
+        conn.execute("INSERT INTO t VALUES (3)")
+    assert _values(pool) == [1, 3]
+
+
+def test_release_and_close_all(pool):
+    conn = pool.get()
+    pool.release()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    conn = pool.get()
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_shared_pool_per_path(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first = get_connection_pool(path)
+    assert get_connection_pool(path) is first
+    close_connection_pool(path)
+    assert get_connection_pool(path) is not first
+    close_connection_pool(path)
@@ -0,0 +1,76 @@
+"""Planning and executing deployments whose files flatten onto the same target."""
+import os
+
+import pytest
+
+from src.core.link_master.deploy_plan import DeployPlan
+from src.core.link_master.deployer import Deployer
+
+
+@pytest.fixture
+def package(tmp_path):
+    """Package with three x.txt files (a/, b/, c/d/) and one unique file."""
+    src = tmp_path / "storage" / "pkg"
+    for rel, text in (('a/x.txt', 'a'), ('b/x.txt', 'b'), ('c/d/x.txt', 'cd'), ('a/only.txt', 'only')):
+        path = src / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return str(src)
+
+
+@pytest.fixture
+def deployer(db):
+    d = Deployer()
+    d._db_instance = db
+    return d
+
+
+def test_plan_keeps_first_claim_and_reports_the_rest(tmp_path):
+    plan = DeployPlan()
+    target = str(tmp_path / "t" / "x.txt")
+    assert plan.add("/src/a/x.txt", target, 'symlink')
+    assert not plan.add("/src/b/x.txt", target, 'symlink')
+    assert plan.add("/src/a/y.txt", str(tmp_path / "t" / "y.txt"), 'copy', size=10)
+    assert len(plan.ops) == 2
+    assert plan.source_for(target) == "/src/a/x.txt"
+    assert plan.collision_report() == [
+        {'target': target, 'source_existing': "/src/a/x.txt", 'source_conflicting': "/src/b/x.txt"}]
+    assert plan.bytes_to_copy == 10
+    assert plan.mkdirs == {str(tmp_path / "t")}
+
+
+def test_flatten_plan_records_collisions(deployer, package, tmp_path):
+    target = str(tmp_path / "target")
+    plan = deployer._plan_partial(package, target, 'files', 'symlink', [], {}, 0)
+    targets = [t for _, t, _ in plan.ops]
+    assert sorted(targets) == [os.path.join(target, 'only.txt'), os.path.join(target, 'x.txt')]
+    assert len(plan.collisions) == 2
+    report = plan.collision_report()
+    assert {r['target'] for r in report} == {os.path.join(target, 'x.txt')}
+    assert all(r['source_existing'] == plan.source_for(os.path.join(target, 'x.txt')) for r in report)
+    assert {r['source_conflicting'] for r in report} | {report[0]['source_existing']} == {
+        os.path.join(package, *rel.split('/')) for rel in ('a/x.txt', 'b/x.txt', 'c/d/x.txt')}
+
+
+def test_dry_run_matches_execution(deployer, package, tmp_path):
+    target = str(tmp_path / "target")
+    rules = {'overrides': {'a': target, 'b': target, 'c': target}}
+    plan = deployer.plan(package, target, rules=rules, deploy_rule='custom', transfer_mode='copy')
+    assert len(plan.ops) == 3 and len(plan.collisions) == 1
+    assert plan.summary()['conflicts'] == 0
+    assert not os.path.exists(target)
+
+    assert deployer.deploy_with_rules(package, target, rules=rules, deploy_rule='custom',
+                                      transfer_mode='copy', package_rel_path='pkg')
+    deployed = sorted(os.path.relpath(os.path.join(r, f), target)
+                      for r, _, files in os.walk(target) for f in files)
+    assert deployed == sorted(os.path.relpath(t, target) for _, t, _ in plan.ops)
+    # The first claim of the flattened x.txt wins, the colliding one is not deployed
+    winner = plan.source_for(os.path.join(target, 'x.txt'))
+    with open(os.path.join(target, 'x.txt')) as f, open(winner) as w:
+        assert f.read() == w.read()
+
+    # Re-planning sees every planned target as existing and owned (overwrite, not backup)
+    again = deployer.plan(package, target, rules=rules, deploy_rule='custom', transfer_mode='copy')
+    assert again.summary()['conflicts'] == 3
+    assert again.summary()['backups'] == 0
@@ -0,0 +1,94 @@
+"""Materialized effective_tags against the parent-chain walk ScannerWorker used before (v7)."""
+import os
+
+import pytest
+
+
+def walk_tags(rel_path, configs, non_inheritable):
+    """Tags a folder matches with, computed like the original scanner walk (own tags, then up the chain)."""
+    config = configs.get(rel_path, {})
+    own = {t.strip().lower() for t in (config.get('tags') or '').split(',') if t.strip()}
+    if not rel_path or config.get('inherit_tags', 1) == 0:
+        return own
+    inherited = set()
+    current = rel_path.rpartition('/')[0]
+    while True:
+        parent = configs.get(current, {})
+        inherited |= {t.strip().lower() for t in (parent.get('tags') or '').split(',')
+                      if t.strip() and t.strip().lower() not in non_inheritable}
+        if not current or parent.get('inherit_tags', 1) == 0:
+            break
+        current = current.rpartition('/')[0]
+    return own | inherited
+
+
+TREE = {
+    '': {'tags': 'rootTag'},
+    'Cat': {'tags': 'upper, Secret'},
+    'Cat/pkg1': {'tags': 'one'},
+    'cat': {'tags': 'lower'},
+    'cat/pkg2': {'tags': 'two'},
+    'cat/deep/pkg3': {},
+    'cat/isolated': {'tags': 'iso', 'inherit_tags': 0},
+    'cat/isolated/child': {'tags': 'kid'},
+    'Other': {'tags': 'other', 'inherit_tags': 0},
+    'Other/pkg4': {},
+}
+
+
+@pytest.fixture
+def tree_db(db):
+    db.add_tag_definition({'name': 'secret', 'icon_rel_path': None, 'category': None, 'is_inheritable': 0})
+    for rel, config in TREE.items():
+        db.update_folder_display_config(rel, **config)
+    return db
+
+
+def expected_tags(db, rel_path):
+    return walk_tags(rel_path, db.get_all_folder_configs(), db.get_non_inheritable_tag_names())
+
+
+def test_effective_tags_match_parent_walk(tree_db):
+    effective = tree_db.get_effective_tags()
+    for rel in TREE:
+        assert effective[rel] == expected_tags(tree_db, rel), rel
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="case-different folders are the same folder on Windows")
+def test_case_different_siblings_stay_separate(tree_db):
+    effective = tree_db.get_effective_tags()
+    assert effective['cat/pkg2'] == {'two', 'lower', 'roottag'}
+    assert effective['Cat/pkg1'] == {'one', 'upper', 'roottag'}
+    assert effective['cat/isolated'] == {'iso'}
+    assert effective['cat/isolated/child'] == {'kid', 'iso'}
+
+
+def test_updates_restale_subtree(tree_db):
+    tree_db.get_effective_tags()
+    tree_db.update_folder_display_config('', tags='newRoot')
+    tree_db.update_folder_display_config('cat/isolated', inherit_tags=1)
+    tree_db.update_folder_display_config('Cat', tags='upper')
+    effective = tree_db.get_effective_tags()
+    for rel in TREE:
+        assert effective[rel] == expected_tags(tree_db, rel), rel
+    assert 'newroot' in effective['cat/isolated/child']
+
+
+def test_scanner_walk_matches_materialized_tags(tree_db, tmp_path):
+    pytest.importorskip("PyQt6")
+    from src.apps.scanner_worker import ScannerWorker
+
+    storage = tmp_path / "storage"
+    for rel in TREE:
+        (storage / rel).mkdir(parents=True, exist_ok=True)
+    tree_db.refresh_effective_tags()
+    configs = tree_db.get_all_folder_configs()
+    non_inheritable = tree_db.get_non_inheritable_tag_names()
+    legacy = {rel: {k: v for k, v in c.items() if k != 'effective_tags'} for rel, c in configs.items()}
+    worker = ScannerWorker.__new__(ScannerWorker)
+    worker._probe_cache = {}
+    for tag in ('roottag', 'lower', 'upper', 'iso', 'kid'):
+        search = {'selected_tags': {tag}, 'logic': 'or', 'non_inheritable_tags': non_inheritable}
+        fast = worker._recursive_search_sn(str(storage), str(storage), search, configs)
+        slow = worker._recursive_search_sn(str(storage), str(storage), search, legacy)
+        assert sorted(r['abs_path'] for r in fast) == sorted(r['abs_path'] for r in slow), tag
@@ -0,0 +1,78 @@
+"""Undeploy sweeps driven by the deployment ledger, whose keys are lowercased paths."""
+import os
+
+import pytest
+
+from src.core.link_master.deployer import Deployer
+
+posix_only = pytest.mark.skipif(os.name == 'nt', reason="case-sensitive filesystems only")
+
+
+@pytest.fixture
+def layout(tmp_path, db):
+    """Target/Mods with symlinks to storage/pkg files, all registered in the ledger."""
+    root = tmp_path / "Target"
+    (root / "Mods").mkdir(parents=True)
+    src = tmp_path / "storage" / "pkg"
+    src.mkdir(parents=True)
+    rows = []
+    for name in ('MyMod.txt', 'plain.txt'):
+        (src / name).write_text(name)
+        link = root / "Mods" / name
+        os.symlink(src / name, link)
+        rows.append((str(link), str(src / name), 'pkg', 'symlink'))
+    # Registered, but already deleted on disk
+    rows.append((str(root / "Mods" / "Gone.txt"), str(src / "Gone.txt"), 'pkg', 'symlink'))
+    db.register_deployed_files_bulk(rows)
+    deployer = Deployer()
+    deployer._db_instance = db
+    return deployer, db, str(root), str(src)
+
+
+def _ledger_count(db):
+    with db.get_connection() as conn:
+        return conn.execute("SELECT count(*) FROM lm_deployed_files").fetchone()[0]
+
+
+def test_sweep_removes_mixed_case_targets_and_their_rows(layout):
+    deployer, db, root, src = layout
+    removed, failed = deployer.remove_links_pointing_to([root], src, package_rel_path='pkg')
+    assert removed and not failed
+    mods = os.path.join(root, 'Mods')
+    assert not os.path.exists(mods) or os.listdir(mods) == []
+    assert _ledger_count(db) == 0
+
+
+@posix_only
+def test_sweep_leaves_unrelated_case_variants(layout, tmp_path):
+    deployer, db, root, src = layout
+    # Same lowercased key as MyMod.txt, but a user file that is not ours
+    other = os.path.join(root, 'Mods', 'mymod.txt')
+    with open(other, 'w') as f:
+        f.write('user file')
+    removed, failed = deployer.remove_links_pointing_to([root], src, package_rel_path='pkg')
+    assert removed and not failed
+    assert not os.path.lexists(os.path.join(root, 'Mods', 'MyMod.txt'))
+    with open(other) as f:
+        assert f.read() == 'user file'
+
+
+@posix_only
+def test_resolve_ledger_target(tmp_path):
+    (tmp_path / "Dir").mkdir()
+    (tmp_path / "Dir" / "File.txt").write_text("")
+    (tmp_path / "Dir" / "Twin").write_text("")
+    (tmp_path / "Dir" / "TWIN").write_text("")
+    (tmp_path / "src.txt").write_text("")
+    os.symlink(tmp_path / "src.txt", tmp_path / "Dir" / "Link")
+    (tmp_path / "Dir" / "LINK").write_text("")
+    base = str(tmp_path)
+    source_key = os.path.join(base, 'src.txt').lower()
+    listings = {}
+    assert Deployer._resolve_ledger_target(os.path.join(base, 'dir', 'file.txt'), listings) == (
+        'found', os.path.join(base, 'Dir', 'File.txt'))
+    assert Deployer._resolve_ledger_target(os.path.join(base, 'dir', 'twin'), listings)[0] == 'ambiguous'
+    assert Deployer._resolve_ledger_target(os.path.join(base, 'dir', 'twin'), listings, source_key)[0] == 'ambiguous'
+    assert Deployer._resolve_ledger_target(os.path.join(base, 'dir', 'link'), listings, source_key) == (
+        'found', os.path.join(base, 'Dir', 'Link'))
+    assert Deployer._resolve_ledger_target(os.path.join(base, 'dir', 'none'), listings)[0] == 'missing'
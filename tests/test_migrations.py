@@ -0,0 +1,87 @@
+"""Upgrading an unversioned (pre-migration) app DB and the lookups that depend on it."""
+import os
+import sqlite3
+
+import pytest
+
+from src.core.link_master.database import LinkMasterDB
+from src.core.link_master.migrations import APP_MIGRATIONS, LANE_APP, _app_v1_baseline, _get_lane_version
+
+ROWS = [
+    ('Cat', 'Upper'),
+    ('cat', 'lower'),
+    ('Cat/PkgA', 'alpha, Shared'),
+    ('cat/deep/PkgB', 'shared'),
+]
+
+
+@pytest.fixture
+def baseline_path(tmp_path):
+    """A DB as the app wrote it before versioning: baseline tables, user_version 0."""
+    path = str(tmp_path / "baseline.db")
+    conn = sqlite3.connect(path)
+    _app_v1_baseline(conn.cursor())
+    conn.executemany("INSERT INTO lm_folder_config (rel_path, tags) VALUES (?, ?)", ROWS)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _lane_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return _get_lane_version(conn.execute("PRAGMA user_version").fetchone()[0], LANE_APP)
+    finally:
+        conn.close()
+
+
+def test_baseline_db_is_migrated_to_current(baseline_path):
+    assert _lane_version(baseline_path) == 0
+    db = LinkMasterDB(db_path=baseline_path)
+    try:
+        assert _lane_version(baseline_path) == len(APP_MIGRATIONS)
+        rows = db.get_subtree_configs('', columns=['rel_path_norm', 'parent_rel'])
+        assert rows['Cat/PkgA']['rel_path_norm'] == 'cat/pkga'
+        assert rows['Cat/PkgA']['parent_rel'] == 'cat'
+        assert rows['cat/deep/PkgB']['parent_rel'] == 'cat/deep'
+        assert rows['Cat']['parent_rel'] == ''
+        # Derived indexes are backfilled from the existing rows
+        assert db.find_items_by_tags(all_tags=['shared']) == {'Cat/PkgA', 'cat/deep/PkgB'}
+        assert db.get_effective_tags(['Cat/PkgA'])['Cat/PkgA'] == {'alpha', 'shared', 'upper'}
+    finally:
+        db.close()
+
+
+def test_current_db_is_not_migrated_again(baseline_path):
+    LinkMasterDB(db_path=baseline_path).close()
+    conn = sqlite3.connect(baseline_path)
+    conn.execute("INSERT INTO lm_folder_config (rel_path) VALUES ('later')")
+    conn.commit()
+    conn.close()
+    db = LinkMasterDB(db_path=baseline_path)
+    try:
+        assert _lane_version(baseline_path) == len(APP_MIGRATIONS)
+        assert db.get_folder_config('later')['rel_path_norm'] == 'later'
+    finally:
+        db.close()
+
+
+def test_new_rows_get_normalized_keys(db):
+    db.update_folder_display_config('Mods\\Sub\\Pkg', tags='x')
+    config = db.get_folder_config('Mods/Sub/Pkg')
+    assert config['rel_path'] == 'Mods/Sub/Pkg'
+    assert (config['rel_path_norm'], config['parent_rel']) == ('mods/sub/pkg', 'mods/sub')
+    assert [rel for rel, _ in db.get_direct_children_configs('Mods/Sub')] == ['Mods/Sub/Pkg']
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="Windows lookups are case-insensitive by design")
+def test_get_folder_config_matches_exact_case(baseline_path):
+    db = LinkMasterDB(db_path=baseline_path)
+    try:
+        assert db.get_folder_config('cat')['tags'] == 'lower'
+        assert db.get_folder_config('Cat')['tags'] == 'Upper'
+        assert db.get_folder_config('CAT') is None
+        db.update_folder_display_config('cat', display_name='Lower')
+        assert db.get_folder_config('Cat')['display_name'] is None
+    finally:
+        db.close()
@@ -0,0 +1,70 @@
+from src.core.pixmap_cache import PixmapMemoryCache, pixmap_cost, tier_for
+
+MB = 1024 * 1024
+
+
+class FakePixmap:
+    """width()/height()/depth() like a QPixmap."""
+
+    def __init__(self, width, height, depth=32):
+        self._size = (width, height, depth)
+
+    def width(self):
+        return self._size[0]
+
+    def height(self):
+        return self._size[1]
+
+    def depth(self):
+        return self._size[2]
+
+
+def test_cost_and_tiers():
+    assert pixmap_cost(FakePixmap(256, 256)) == 256 * 256 * 4
+    assert pixmap_cost(FakePixmap(10, 10, depth=0)) == 400  # unknown depth counts as 32 bpp
+    assert tier_for(256, 100) == 'card'
+    assert tier_for(257, 100) == 'preview'
+
+
+def test_resident_bytes_stay_within_budgets():
+    budgets = {'card': 2 * MB, 'preview': 4 * MB}
+    cache = PixmapMemoryCache(budgets)
+    for i in range(200):
+        cache.put(('card', i), FakePixmap(256, 256), 'card')          # 256 KiB each
+        cache.put(('preview', i), FakePixmap(1024, 768), 'preview')   # 3 MiB each
+        stats = cache.stats()
+        assert stats['card']['bytes'] <= budgets['card']
+        assert stats['preview']['bytes'] <= budgets['preview']
+        assert cache.resident_bytes == stats['card']['bytes'] + stats['preview']['bytes']
+    stats = cache.stats()
+    assert stats['card']['entries'] == 8 and stats['preview']['entries'] == 1
+    assert stats['card']['evictions'] == 192
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = PixmapMemoryCache({'card': 3 * 256 * 256 * 4})
+    for key in 'abc':
+        cache.put(key, FakePixmap(256, 256), 'card')
+    assert cache.get('a', 'card') is not None
+    cache.put('d', FakePixmap(256, 256), 'card')
+    assert ('b', 'card') not in cache
+    assert all((k, 'card') in cache for k in 'acd')
+
+
+def test_previews_do_not_evict_cards():
+    cache = PixmapMemoryCache({'card': 1 * MB, 'preview': 1 * MB})
+    cache.put('icon', FakePixmap(64, 64), 'card')
+    for i in range(10):
+        cache.put(i, FakePixmap(500, 500), 'preview')
+    assert ('icon', 'card') in cache
+
+
+def test_oversized_and_replaced_entries():
+    cache = PixmapMemoryCache({'card': 1 * MB})
+    cache.put('big', FakePixmap(1024, 1024), 'card')   # 4 MiB: larger than the whole tier
+    assert ('big', 'card') not in cache and cache.resident_bytes == 0
+    cache.put('k', FakePixmap(100, 100), 'card')
+    cache.put('k', FakePixmap(200, 200), 'card')
+    assert len(cache) == 1 and cache.resident_bytes == 200 * 200 * 4
+    cache.set_budget('card', 1000)
+    assert len(cache) == 0 and cache.resident_bytes == 0
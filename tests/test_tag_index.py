@@ -0,0 +1,65 @@
+import pytest
+
+ITEMS = {
+    'Cat/a': 'Red, Big',
+    'Cat/b': 'red, small',
+    'Cat/c': 'blue, big',
+    'Cat/d': 'Blue, Red, "quoted", Big',
+    'Cat/e': '',
+}
+
+
+@pytest.fixture
+def tagged_db(db):
+    if not db.has_tag_index():
+        pytest.skip("SQLite build without JSON1: no tag index")
+    for rel, tags in ITEMS.items():
+        db.update_folder_display_config(rel, tags=tags)
+    return db
+
+
+def brute_force(all_tags=(), any_tags=(), exclude_tags=()):
+    result = set()
+    for rel, tags in ITEMS.items():
+        own = {t.strip().lower() for t in tags.split(',') if t.strip()}
+        if not set(all_tags) <= own:
+            continue
+        if any_tags and not own & set(any_tags):
+            continue
+        if own & set(exclude_tags):
+            continue
+        if not (all_tags or any_tags) and not exclude_tags:
+            continue
+        result.add(rel)
+    return result
+
+
+@pytest.mark.parametrize("query", [
+    {'all_tags': ['red']},
+    {'all_tags': ['RED', 'big']},
+    {'any_tags': ['small', 'blue']},
+    {'all_tags': ['big'], 'exclude_tags': ['blue']},
+    {'any_tags': ['red', 'blue'], 'exclude_tags': ['Big']},
+    {'exclude_tags': ['red']},
+    {'all_tags': ['"quoted"']},
+    {'all_tags': ['missing']},
+    {},
+])
+def test_queries_match_brute_force(tagged_db, query):
+    expected = brute_force(**{k: [t.lower() for t in v] for k, v in query.items()})
+    assert tagged_db.find_items_by_tags(**query) == expected
+
+
+def test_groups_need_one_tag_each(tagged_db):
+    assert tagged_db.find_items_by_tags(groups=[['red', 'blue'], ['small']]) == {'Cat/b'}
+    assert tagged_db.find_items_by_tags(groups=[['red'], ['big']], exclude_tags=['blue']) == {'Cat/a'}
+
+
+def test_index_follows_tag_edits(tagged_db):
+    tagged_db.update_folder_display_config('Cat/a', tags='green')
+    tagged_db.delete_folder_config('Cat/b')
+    assert tagged_db.find_items_by_tags(all_tags=['red']) == {'Cat/d'}
+    assert tagged_db.find_items_by_tags(all_tags=['green']) == {'Cat/a'}
+    assert tagged_db.get_item_tags(['Cat/a', 'Cat/e']) == {'Cat/a': {'green'}}
+    tagged_db.rebuild_tag_index()
+    assert tagged_db.find_items_by_tags(any_tags=['red', 'green']) == {'Cat/a', 'Cat/d'}